@@ -246,6 +246,15 @@ size_t PyTorchStreamReader::getRecordOffset(const std::string& name) {
 }
 
 
+std::tuple<size_t, bool> PyTorchStreamReader::getRecordStat(const std::string& name) {
+  mz_zip_archive_file_stat stat;
+  mz_zip_reader_file_stat(ar_.get(), getRecordID(name), &stat);
+  valid("retrieving file meta-data for ", name.c_str());
+  bool stored = stat.m_method == 0 && stat.m_comp_size == stat.m_uncomp_size;
+  return std::make_tuple(stat.m_uncomp_size, stored);
+}
+
+
 PyTorchStreamReader::~PyTorchStreamReader() {
   mz_zip_clear_last_error(ar_.get());
   mz_zip_reader_end(ar_.get());
@@ -157,6 +157,9 @@ class CAFFE2_API PyTorchStreamReader final {
   // return dataptr, size
   std::tuple<at::DataPtr, size_t> getRecord(const std::string& name);
   size_t getRecordOffset(const std::string& name);
+  // return size, and whether the record is stored uncompressed, i.e., its
+  // data can be read as is at getRecordOffset(name)
+  std::tuple<size_t, bool> getRecordStat(const std::string& name);
   bool hasRecord(const std::string& name);
   std::vector<std::string> getAllRecords();
 
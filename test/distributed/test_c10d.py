@@ -12,6 +12,7 @@ import time
 import unittest
 from datetime import timedelta
 from sys import platform
+from unittest import mock
 from contextlib import contextmanager
 
 from itertools import groupby, product
@@ -2649,6 +2650,194 @@ class DistributedDataParallelTest(MultiProcessTestCase):
             torch.manual_seed(1337 + iteration)
             input = input[torch.randperm(global_batch_size)]
 
+    def _test_comm_hook(self, make_state, hook, **kwargs):
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        # Ensure initialized weights and inputs are identical across processes
+        torch.manual_seed(1337)
+        model = nn.Sequential(nn.Linear(2, 10), nn.ReLU(), nn.Linear(10, 4))
+        ddp_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group, bucket_cap_mb=0.001)
+        hook_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group, bucket_cap_mb=0.001)
+        hook_model.register_comm_hook(make_state(process_group), hook)
+
+        batch_size = 2 * self.world_size
+        input = torch.randn(batch_size, 2)
+        local_input = input[self.rank * 2:(self.rank + 1) * 2]
+        for _ in range(3):
+            for m in (ddp_model, hook_model):
+                m.zero_grad()
+                m(local_input).sum().backward()
+            for p, hook_p in zip(ddp_model.parameters(), hook_model.parameters()):
+                self.assertEqual(p.grad, hook_p.grad, **kwargs)
+
+    @requires_gloo()
+    def test_allreduce_comm_hook(self):
+        from torch.distributed.algorithms.ddp_comm_hooks import allreduce_hook
+        self._test_comm_hook(lambda pg: pg, allreduce_hook)
+
+    @requires_gloo()
+    def test_fp16_compress_comm_hook(self):
+        from torch.distributed.algorithms.ddp_comm_hooks import fp16_compress_hook
+        self._test_comm_hook(lambda pg: pg, fp16_compress_hook, atol=1e-3, rtol=1e-3)
+
+    @requires_gloo()
+    def test_topk_comm_hook(self):
+        from torch.distributed.algorithms.ddp_comm_hooks import TopKState, topk_hook
+        # Communicating all elements is exact.
+        self._test_comm_hook(lambda pg: TopKState(pg, compression_ratio=1.0), topk_hook)
+
+    @requires_gloo()
+    def test_powerSGD_comm_hook(self):
+        from torch.distributed.algorithms.ddp_comm_hooks import PowerSGDState, powerSGD_hook
+        # A rank of at least the smaller dimension of all gradients is exact.
+        self._test_comm_hook(
+            lambda pg: PowerSGDState(pg, matrix_approximation_rank=10), powerSGD_hook,
+            atol=1e-4, rtol=1e-4)
+
+    @requires_gloo()
+    def test_custom_comm_hook(self):
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+        model = DistributedDataParallel(
+            nn.Linear(2, 4), process_group=process_group, bucket_cap_mb=0.001)
+
+        bucket_indices = []
+
+        def zeros_hook(state, bucket):
+            bucket_indices.append(bucket.get_index())
+            fut = torch.futures.Future()
+            fut.set_result([torch.zeros_like(bucket.get_tensors()[0])])
+            return fut
+
+        with self.assertRaisesRegex(TypeError, "must be callable"):
+            model.register_comm_hook(None, 1)
+        model.register_comm_hook(None, zeros_hook)
+        with self.assertRaisesRegex(RuntimeError, "can only be called once"):
+            model.register_comm_hook(None, zeros_hook)
+
+        model(torch.randn(2, 2)).sum().backward()
+        self.assertEqual(bucket_indices, list(range(len(bucket_indices))))
+        for p in model.parameters():
+            self.assertEqual(p.grad, torch.zeros_like(p))
+
+        # No hooks are called within no_sync
+        del bucket_indices[:]
+        with model.no_sync():
+            model(torch.randn(2, 2)).sum().backward()
+        self.assertEqual(bucket_indices, [])
+
+    @requires_gloo()
+    def test_comm_hook_work_future(self):
+        from torch.distributed.algorithms.ddp_comm_hooks.default_hooks import _allreduce_fut
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        # The future is completed by waiting for it, callbacks run then.
+        fut = _allreduce_fut(process_group, torch.ones(2))
+        doubled = fut.then(lambda fut: [fut.wait()[0] * 2])
+        self.assertFalse(fut.done())
+        self.assertEqual(doubled.wait()[0], torch.full((2,), 2.0 * self.world_size))
+        self.assertTrue(fut.done())
+        self.assertTrue(doubled.done())
+
+    @requires_gloo()
+    def test_gradient_as_bucket_view(self):
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        # Ensure initialized weights and inputs are identical across processes
+        torch.manual_seed(1337)
+        model = nn.Sequential(nn.Linear(2, 10), nn.ReLU(), nn.Linear(10, 4))
+        ddp_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group)
+        view_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group, gradient_as_bucket_view=True)
+        optimizer = torch.optim.SGD(ddp_model.parameters(), lr=0.1, momentum=0.9)
+        view_optimizer = torch.optim.SGD(view_model.parameters(), lr=0.1, momentum=0.9)
+
+        # All parameters fit into one bucket, whose buffer holds the gradients.
+        params = list(view_model.parameters())
+
+        def assert_grads_in_one_bucket():
+            grad_storage = params[0].grad.storage().data_ptr()
+            for p in params:
+                self.assertEqual(p.grad.storage().data_ptr(), grad_storage)
+
+        batch_size = 2 * self.world_size
+        input = torch.randn(batch_size, 2)
+        local_input = input[self.rank * 2:(self.rank + 1) * 2]
+        for i in range(4):
+            # Gradients released by zero_grad are moved back into the bucket.
+            set_to_none = i == 2
+            for m, o in ((ddp_model, optimizer), (view_model, view_optimizer)):
+                o.zero_grad(set_to_none=set_to_none)
+                m(local_input).sum().backward()
+                o.step()
+            for p, view_p in zip(ddp_model.parameters(), view_model.parameters()):
+                self.assertEqual(p.grad, view_p.grad)
+                self.assertEqual(p, view_p)
+            assert_grads_in_one_bucket()
+
+        # Communication hooks can be combined with bucket views.
+        from torch.distributed.algorithms.ddp_comm_hooks import fp16_compress_hook
+        view_model.register_comm_hook(process_group, fp16_compress_hook)
+        for m in (ddp_model, view_model):
+            m.zero_grad()
+            m(local_input).sum().backward()
+        for p, view_p in zip(ddp_model.parameters(), view_model.parameters()):
+            self.assertEqual(p.grad, view_p.grad, atol=1e-3, rtol=1e-3)
+        assert_grads_in_one_bucket()
+
+    @requires_gloo()
+    def test_static_graph(self):
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        class ConditionalNet(nn.Module):
+            def __init__(self):
+                super(ConditionalNet, self).__init__()
+                self.fc1 = nn.Linear(2, 10, bias=False)
+                self.fc2 = nn.Linear(10, 4, bias=False)
+                self.unused = nn.Linear(10, 4, bias=False)
+                self.use_unused = False
+
+            def forward(self, x):
+                x = F.relu(self.fc1(x))
+                return self.unused(x) if self.use_unused else self.fc2(x)
+
+        # Ensure initialized weights and inputs are identical across processes
+        torch.manual_seed(1337)
+        model = ConditionalNet()
+        ddp_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group, find_unused_parameters=True)
+        static_model = DistributedDataParallel(
+            copy.deepcopy(model), process_group=process_group, find_unused_parameters=True, static_graph=True)
+
+        batch_size = 2 * self.world_size
+        input = torch.randn(batch_size, 2)
+        local_input = input[self.rank * 2:(self.rank + 1) * 2]
+        find_tensors = torch.nn.parallel.distributed._find_tensors
+        for i in range(3):
+            ddp_model.zero_grad()
+            ddp_model(local_input).sum().backward()
+            # The outputs are only searched for unused parameters in the
+            # first iteration.
+            with mock.patch("torch.nn.parallel.distributed._find_tensors", wraps=find_tensors) as mock_find_tensors:
+                static_model.zero_grad()
+                static_model(local_input).sum().backward()
+            self.assertEqual(mock_find_tensors.call_count, 1 if i == 0 else 0)
+            for p, static_p in zip(ddp_model.parameters(), static_model.parameters()):
+                self.assertEqual(p.grad, static_p.grad)
+            self.assertIsNone(static_model.module.unused.weight.grad)
+
+        # The set of used parameters must not change.
+        static_model.module.use_unused = True
+        with self.assertRaisesRegex(RuntimeError, "static_graph=True must not change"):
+            static_model(local_input).sum().backward()
+
     @requires_gloo()
     def test_ignored_output(self):
         """
@@ -3431,6 +3620,84 @@ class CommTest(MultiProcessTestCase):
         self._test_broadcast_coalesced(process_group, device)
 
 
+class ZeroRedundancyOptimizerTest(MultiProcessTestCase):
+    def setUp(self):
+        super(ZeroRedundancyOptimizerTest, self).setUp()
+        self._fork_processes()
+
+    def tearDown(self):
+        super(ZeroRedundancyOptimizerTest, self).tearDown()
+        try:
+            os.remove(self.file_name)
+        except OSError:
+            pass
+
+    @property
+    def world_size(self):
+        return 2
+
+    @requires_gloo()
+    def test_zero_redundancy_optimizer(self):
+        from torch.distributed.optim import ZeroRedundancyOptimizer
+        c10d.init_process_group(
+            backend="gloo", init_method="file://{}".format(self.file_name),
+            world_size=self.world_size, rank=self.rank)
+
+        torch.manual_seed(1337)
+        model = nn.Sequential(nn.Linear(2, 10), nn.ReLU(), nn.Linear(10, 4))
+        ref_model = copy.deepcopy(model)
+        optimizer = ZeroRedundancyOptimizer(
+            [{'params': model[0].parameters()}, {'params': model[2].parameters(), 'lr': 0.1}],
+            torch.optim.Adam, lr=0.01)
+        ref_optimizer = torch.optim.Adam(
+            [{'params': ref_model[0].parameters()}, {'params': ref_model[2].parameters(), 'lr': 0.1}],
+            lr=0.01)
+        # Options of the local optimizer are visible.
+        self.assertEqual(optimizer.param_groups[0]['betas'], (0.9, 0.999))
+
+        input = torch.randn(4, 2)
+
+        def step(model, optimizer):
+            optimizer.zero_grad()
+            model(input).sum().backward()
+            optimizer.step()
+
+        for _ in range(3):
+            step(model, optimizer)
+            step(ref_model, ref_optimizer)
+            for p, ref_p in zip(model.parameters(), ref_model.parameters()):
+                self.assertEqual(p, ref_p)
+        # Each rank only holds the state of its parameters.
+        self.assertLess(len(optimizer.state), 4)
+
+        # Learning rate changes are passed to the local optimizer.
+        for group, ref_group in zip(optimizer.param_groups, ref_optimizer.param_groups):
+            group['lr'] *= 0.5
+            ref_group['lr'] *= 0.5
+        step(model, optimizer)
+        step(ref_model, ref_optimizer)
+        for p, ref_p in zip(model.parameters(), ref_model.parameters()):
+            self.assertEqual(p, ref_p)
+
+        # The consolidated state dict is the one of the non-sharded optimizer.
+        with self.assertRaisesRegex(RuntimeError, "consolidate_state_dict"):
+            optimizer.state_dict()
+        optimizer.consolidate_state_dict(to=0)
+        if self.rank == 0:
+            self.assertEqual(optimizer.state_dict(), ref_optimizer.state_dict())
+
+        new_optimizer = ZeroRedundancyOptimizer(
+            [{'params': model[0].parameters()}, {'params': model[2].parameters()}],
+            torch.optim.Adam, lr=0.01)
+        new_optimizer.load_state_dict(ref_optimizer.state_dict())
+        step(model, new_optimizer)
+        step(ref_model, ref_optimizer)
+        for p, ref_p in zip(model.parameters(), ref_model.parameters()):
+            self.assertEqual(p, ref_p)
+
+        c10d.destroy_process_group()
+
+
 if __name__ == '__main__':
     assert not torch.cuda._initialized, "test_distributed must not have initialized CUDA context on main process"
 
@@ -2,6 +2,7 @@ import contextlib
 import gc
 import sys
 import math
+import random
 import tempfile
 import time
 import threading
@@ -2656,6 +2657,78 @@ class TestAutograd(TestCase):
             # Now validate the json
             json.load(f)
 
+    @unittest.skipIf(IS_WINDOWS, """File open permission error on Windows,
+            https://github.com/pytorch/pytorch/issues/34086""")
+    def test_profiler_streaming_trace(self):
+        x = torch.randn(10, 10)
+        with profile() as prof:
+            y = x * 2 + 4
+
+        # The trace is streamed from the raw records, which are only parsed
+        # into FunctionEvents on demand.
+        with tempfile.NamedTemporaryFile(mode="w+") as f:
+            prof.export_chrome_trace(f.name)
+            self.assertIsNone(prof._function_events)
+            streamed = json.load(f)
+
+        with tempfile.NamedTemporaryFile(mode="w+") as f:
+            prof.function_events.export_chrome_trace(f.name)
+            exported = json.load(f)
+
+        self.assertEqual(len(streamed), len(prof.function_events))
+        key = lambda e: (e["ts"], -e["dur"], e["name"])  # noqa: E731
+        self.assertEqual(sorted(streamed, key=key), sorted(exported, key=key))
+
+        with tempfile.NamedTemporaryFile(mode="w+") as f:
+            EventList().export_chrome_trace(f.name)
+            self.assertEqual(json.load(f), [])
+
+    def test_profiler_schedule(self):
+        from torch.autograd.profiler import schedule, ProfilerAction
+        x = torch.randn(10, 10)
+
+        schedule_fn = schedule(wait=1, warmup=1, active=2, repeat=2)
+        self.assertEqual([schedule_fn(step) for step in range(9)], [
+            ProfilerAction.NONE, ProfilerAction.WARMUP, ProfilerAction.RECORD, ProfilerAction.RECORD_AND_SAVE,
+        ] * 2 + [ProfilerAction.NONE])
+
+        windows = []
+
+        def trace_handler(p):
+            windows.append(sorted(evt.name for evt in p.function_events if evt.name.startswith("step_")))
+
+        with profile(schedule=schedule_fn, on_trace_ready=trace_handler) as p:
+            for step in range(10):
+                self.assertEqual(torch.autograd._profiler_enabled(),
+                                 schedule_fn(step) != ProfilerAction.NONE)
+                with record_function("step_{}".format(step)):
+                    x * 2
+                p.step()
+        self.assertFalse(torch.autograd._profiler_enabled())
+        self.assertEqual(windows, [["step_2", "step_3"], ["step_6", "step_7"]])
+
+        # Cycles that aren't sampled aren't profiled
+        windows = []
+        with profile(schedule=schedule(wait=0, warmup=0, active=1, sample_prob=0.0),
+                     on_trace_ready=trace_handler) as p:
+            for step in range(3):
+                self.assertFalse(torch.autograd._profiler_enabled())
+                p.step()
+        self.assertEqual(windows, [])
+
+        # Every step of a cycle gets the same decision, without touching the
+        # global RNG
+        schedule_fn = schedule(wait=1, warmup=1, active=2, sample_prob=0.5)
+        random.seed(0)
+        state = random.getstate()
+        actions = [schedule_fn(step) for step in range(400)]
+        self.assertEqual(random.getstate(), state)
+        for cycle in range(100):
+            sampled = actions[4 * cycle + 1:4 * cycle + 4] != [ProfilerAction.NONE] * 3
+            self.assertEqual(actions[4 * cycle:4 * cycle + 4],
+                             [ProfilerAction.NONE, ProfilerAction.WARMUP, ProfilerAction.RECORD,
+                              ProfilerAction.RECORD_AND_SAVE] if sampled else [ProfilerAction.NONE] * 4)
+
     def test_profiler(self):
         x = torch.randn(10, 10)
 
@@ -2803,6 +2876,38 @@ class TestAutograd(TestCase):
 
         self.assertEqual(prof_table, prof_str)
 
+    def test_profiler_key_averages(self):
+        rnn = torch.nn.LSTM(10, 20, 2)
+        input = torch.randn(5, 3, 10)
+        with profile(record_shapes=True, profile_memory=True) as prof:
+            rnn(input)[0].sum().backward()
+
+        events = prof.function_events
+        events.populate_cpu_children()
+        for group_by_input_shapes in (False, True):
+            # Reference: add up the events one by one
+            expected = OrderedDict()
+            for evt in events:
+                if group_by_input_shapes:
+                    key = (evt.key, str(evt.input_shapes), evt.node_id)
+                else:
+                    key = (evt.key, evt.node_id)
+                expected.setdefault(key, FunctionEventAvg()).add(evt, group_by_input_shapes)
+
+            averages = prof.key_averages(group_by_input_shapes)
+            self.assertEqual(len(averages), len(expected))
+            for avg, expected_avg in zip(averages, expected.values()):
+                self.assertEqual(avg.key, expected_avg.key)
+                self.assertEqual(avg.input_shapes, expected_avg.input_shapes)
+                self.assertEqual(avg.count, expected_avg.count)
+                for attr in ["cpu_time_total", "self_cpu_time_total", "cuda_time_total"]:
+                    self.assertEqual(getattr(avg, attr), getattr(expected_avg, attr), atol=1e-3, rtol=0)
+                for attr in ["cpu_memory_usage", "self_cpu_memory_usage", "cuda_memory_usage",
+                             "self_cuda_memory_usage"]:
+                    self.assertEqual(getattr(avg, attr), getattr(expected_avg, attr))
+
+        self.assertEqual(EventList().key_averages(), [])
+
     def test_profiler_function_event_avg(self):
         avg = FunctionEventAvg()
         avg.add(FunctionEvent(id=0, node_id=0, name="foo", thread=0, cpu_start=10, cpu_end=15))
@@ -3003,6 +3108,81 @@ class TestAutograd(TestCase):
             ]
         )
 
+    def test_memory_timeline(self):
+        model = torch.nn.Sequential(torch.nn.Linear(16, 32), torch.nn.ReLU(), torch.nn.Linear(32, 4))
+        optimizer = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+        input = torch.randn(8, 16)
+        with profile(profile_memory=True, with_modules=True) as prof:
+            model(input).sum().backward()
+            with record_function("Optimizer.step"):
+                optimizer.step()
+
+        timeline = prof.memory_timeline(model.parameters(), optimizer)
+        self.assertTrue(len(timeline.events) > 0)
+        self.assertEqual(timeline.events, sorted(timeline.events, key=lambda evt: evt.time))
+        self.assertTrue(all(evt.device == 'cpu' and evt.size != 0 for evt in timeline.events))
+
+        # The peak is made up of the allocations live then
+        peak_time, peak_bytes = timeline.peak()
+        self.assertTrue(peak_bytes > 0)
+        live = timeline.live_at_peak()
+        self.assertEqual(sum(evt.size for evt in live), peak_bytes)
+        self.assertTrue(all(evt.time <= peak_time for evt in live))
+        self.assertEqual(sum(timeline.breakdown().values()), peak_bytes)
+
+        def last_allocation(tensor):
+            addr = tensor.storage().data_ptr()
+            return [evt for evt in timeline.events if evt.addr == addr and evt.size > 0][-1]
+
+        for p in model.parameters():
+            self.assertEqual(last_allocation(p.grad).category, 'gradients')
+            self.assertEqual(last_allocation(optimizer.state[p]['momentum_buffer']).category, 'optimizer state')
+        self.assertTrue(any(evt.category == 'activations' and 'nn.Module: Linear' in evt.stack
+                            for evt in timeline.events))
+        self.assertEqual(timeline.peak('cuda'), (None, 0))
+
+        with profile() as prof:
+            model(input)
+        with self.assertRaisesRegex(RuntimeError, "profile_memory=True"):
+            prof.memory_timeline()
+
+    def test_profiler_module_ranges_exceptions(self):
+        class Failing(torch.nn.Module):
+            def forward(self, x):
+                raise ValueError("failing")
+
+        class Catching(torch.nn.Module):
+            def __init__(self):
+                super(Catching, self).__init__()
+                self.failing = Failing()
+
+            def forward(self, x):
+                try:
+                    self.failing(x)
+                except ValueError:
+                    pass
+                return x * 2
+
+        with profile(with_modules=True) as prof:
+            Catching()(torch.randn(2))
+            with self.assertRaises(ValueError):
+                Failing()(torch.randn(2))
+            torch.randn(2).mul(3)
+
+        # the range of the failing module ends within the range of the module
+        # that caught the exception
+        def contains(outer, inner):
+            return outer.cpu_interval.start <= inner.cpu_interval.start and \
+                inner.cpu_interval.end <= outer.cpu_interval.end
+
+        module_events = [evt for evt in prof.function_events if evt.name.startswith('nn.Module')]
+        self.assertEqual([evt.name for evt in module_events],
+                         ['nn.Module: Catching', 'nn.Module: Failing', 'nn.Module: Failing'])
+        self.assertTrue(contains(module_events[0], module_events[1]))
+        # ops after the uncaught exception aren't attributed to the module
+        mul = [evt for evt in prof.function_events if evt.name == 'aten::mul'][-1]
+        self.assertFalse(any(contains(evt, mul) for evt in module_events))
+
     def test_record_function(self):
         x = torch.randn(10, 10)
 
@@ -5590,6 +5770,50 @@ class TestAutogradFunctional(TestCase):
         self.assertEqual(hvp, torch.mm(hes, v.unsqueeze(1)).squeeze(1))
         self.assertEqual(vhp, torch.mm(v.unsqueeze(0), hes).squeeze(0))
 
+    def test_jacobian_vectorize(self):
+        # Only uses operations that have a batching rule in their backward
+        def foo(x, y, z):
+            return (x * y).sum(dim=1), x * y
+
+        inputs = (torch.rand(3, 4), torch.rand(3, 4), torch.rand(2))
+        expected = autogradF.jacobian(foo, inputs)
+        for chunk_size in [None, 1, 5, 100]:
+            res = autogradF.jacobian(foo, inputs, vectorize=True, chunk_size=chunk_size)
+            self.assertEqual(res, expected)
+        self.assertEqual(res[0][2], torch.zeros(3, 2))
+
+        with self.assertRaisesRegex(RuntimeError, "Output 0 of the user-provided function is independent of input 2"):
+            autogradF.jacobian(foo, inputs, strict=True, vectorize=True)
+        with self.assertRaisesRegex(RuntimeError, "chunk_size to be positive"):
+            autogradF.jacobian(foo, inputs, vectorize=True, chunk_size=0)
+        with self.assertRaisesRegex(RuntimeError, "only supports chunk_size with vectorize=True"):
+            autogradF.jacobian(foo, inputs, chunk_size=2)
+
+    def test_jacobian_vectorize_fallback(self):
+        # The gradients of x are accumulated with add, which has no batching rule
+        def foo(x):
+            return x * x + x
+
+        inputs = torch.rand(3, 2)
+        expected = autogradF.jacobian(foo, inputs)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            res = autogradF.jacobian(foo, inputs, vectorize=True)
+        self.assertEqual(res, expected)
+        self.assertEqual(len(w), 1)
+        self.assertIn("falling back to one backward pass per row", str(w[0].message))
+
+    def test_hessian_vectorize(self):
+        def foo(x, y):
+            return (x * y).sum()
+
+        inputs = (torch.rand(2, 3), torch.rand(2, 3))
+        expected = autogradF.hessian(foo, inputs)
+        for chunk_size in [None, 2]:
+            res = autogradF.hessian(foo, inputs, vectorize=True, chunk_size=chunk_size)
+            self.assertEqual(res, expected)
+        self.assertEqual(res[0][1], torch.eye(6).view(2, 3, 2, 3))
+
 
 # Generic device type autograd tests.
 class TestAutogradDeviceType(TestCase):
@@ -1,5 +1,6 @@
 import math
 import sys
+import asyncio
 import errno
 import os
 import ctypes
@@ -11,10 +12,11 @@ import unittest
 import itertools
 import warnings
 import tempfile
+from collections import OrderedDict
 from torch import multiprocessing as mp
-from torch.utils.data import _utils, Dataset, IterableDataset, TensorDataset, DataLoader, ConcatDataset, ChainDataset
+from torch.utils.data import _utils, Dataset, IterableDataset, AsyncDataset, TensorDataset, DataLoader, ConcatDataset, ChainDataset
 from torch.utils.data._utils import MP_STATUS_CHECK_INTERVAL
-from torch.utils.data.dataset import random_split
+from torch.utils.data.dataset import random_split, Subset
 from torch._utils import ExceptionWrapper
 from torch.testing._internal.common_utils import (TestCase, run_tests, TEST_NUMPY, IS_WINDOWS,
                                                   IS_PYTORCH_CI, NO_MULTIPROCESSING_SPAWN, skipIfRocm,
@@ -201,6 +203,27 @@ class CountingIterableDataset(IterableDataset):
         return self.n
 
 
+class CountingAsyncDataset(AsyncDataset):
+    def __init__(self, n, max_in_flight=10):
+        super(CountingAsyncDataset, self).__init__()
+        self.n = n
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.loops = set()
+
+    async def __getitem__(self, i):
+        self.loops.add(asyncio.get_event_loop())
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return i
+
+    def __len__(self):
+        return self.n
+
+
 @unittest.skipIf(
     TEST_WITH_TSAN,
     "Fails with TSAN with the following error: starting new threads after multi-threaded "
@@ -247,6 +270,17 @@ class TestTensorDataset(TestCase):
             self.assertEqual(t2[i], source[i][2])
             self.assertEqual(t3[i], source[i][3])
 
+    def test_getitems(self):
+        t = torch.randn(15, 10)
+        l = torch.randperm(15)
+        source = TensorDataset(t, l)
+        indices = [3, 0, 14, 3, -1]
+        self.assertEqual(source.__getitems__(indices), [source[i] for i in indices])
+
+        subset = Subset(source, [5, 6, 7, 8])
+        self.assertEqual(subset.__getitems__([3, 0, 1]), [source[8], source[5], source[6]])
+        self.assertEqual(Subset(list(range(10)), [9, 2]).__getitems__([1, 0]), [2, 9])
+
 
 @unittest.skipIf(
     TEST_WITH_TSAN,
@@ -283,6 +317,13 @@ class TestConcatDataset(TestCase):
             # this one goes to 11
             result[11]
 
+    def test_getitems(self):
+        d1 = TensorDataset(torch.rand(7, 3), torch.rand(7))
+        d2 = TensorDataset(torch.rand(5, 3), torch.rand(5))
+        result = ConcatDataset([d1, list(range(4)), d2])
+        indices = [15, 0, 8, 7, -1, 11, 6]
+        self.assertEqual(result.__getitems__(indices), [result[i] for i in indices])
+
     def test_add_dataset(self):
         d1 = TensorDataset(torch.rand(7, 3, 28, 28), torch.rand(7))
         d2 = TensorDataset(torch.rand(7, 3, 28, 28), torch.rand(7))
@@ -700,6 +741,12 @@ def _test_get_worker_info():
     raise RuntimeError('Expected AttributeError')
 
 
+# used with test_shared_memory_slots_containers
+def collate_into_tuple_and_ordered_dict(batch):
+    data, labels = _utils.collate.default_collate(batch)
+    return (data, OrderedDict([('labels', labels)]))
+
+
 # test custom init function
 def init_fn(worker_id):
     torch.manual_seed(12345)
@@ -1280,6 +1327,231 @@ except RuntimeError as e:
     def test_shuffle_batch_workers(self):
         self._test_shuffle(DataLoader(self.dataset, batch_size=2, shuffle=True, num_workers=4))
 
+    def test_shared_memory_slots(self):
+        self._test_sequential(DataLoader(self.dataset, batch_size=2, num_workers=4, shared_memory_slots=3))
+        self._test_sequential(DataLoader(self.dataset, batch_size=None, num_workers=2, shared_memory_slots=3))
+        self._test_shuffle(DataLoader(self.dataset, batch_size=3, shuffle=True, num_workers=4,
+                                      shared_memory_slots=4))
+        # batches are only valid until the next one is requested
+        loader = DataLoader(self.dataset, batch_size=10, num_workers=2, shared_memory_slots=3)
+        batches = [[data.clone(), labels.clone()] for data, labels in loader]
+        self.assertEqual(batches, list(DataLoader(self.dataset, batch_size=10)))
+
+        with self.assertRaisesRegex(ValueError, "can only be used with multi-process loading"):
+            DataLoader(self.dataset, shared_memory_slots=3)
+        with self.assertRaisesRegex(ValueError, "should be at least 3"):
+            DataLoader(self.dataset, num_workers=2, shared_memory_slots=2)
+
+    def test_shared_memory_slots_containers(self):
+        # batches have the same container types as with the default transport
+        loader = DataLoader(self.dataset, batch_size=2, num_workers=2, shared_memory_slots=3,
+                            collate_fn=collate_into_tuple_and_ordered_dict)
+        for i, batch in enumerate(loader):
+            self.assertIs(type(batch), tuple)
+            self.assertIs(type(batch[1]), OrderedDict)
+            self.assertEqual(batch[0], self.data[2 * i:2 * i + 2])
+            self.assertEqual(batch[1]['labels'], self.labels[2 * i:2 * i + 2])
+
+    @unittest.skipIf(not TEST_CUDA, "CUDA unavailable")
+    def test_shared_memory_slots_pin_memory(self):
+        loader = DataLoader(self.dataset, batch_size=2, num_workers=4, pin_memory=True, shared_memory_slots=3)
+        # pinned batches don't refer to the slots and can be kept around
+        batches = list(loader)
+        for i, (input, target) in enumerate(batches):
+            self.assertTrue(input.is_pinned())
+            self.assertTrue(target.is_pinned())
+            self.assertEqual(input, self.data[2 * i:2 * i + 2])
+            self.assertEqual(target, self.labels[2 * i:2 * i + 2])
+
+    def test_thread_workers(self):
+        self._test_sequential(DataLoader(self.dataset, num_workers=4, worker_type='thread'))
+        self._test_sequential(DataLoader(self.dataset, batch_size=2, num_workers=4, worker_type='thread'))
+        self._test_shuffle(DataLoader(self.dataset, batch_size=2, shuffle=True, num_workers=4,
+                                      worker_type='thread'))
+        self._test_error(DataLoader(ErrorDataset(41), batch_size=2, shuffle=True, num_workers=4,
+                                    worker_type='thread'))
+
+        worker_infos = []
+
+        def record_worker_info(worker_id):
+            worker_info = torch.utils.data.get_worker_info()
+            self.assertEqual(worker_info.id, worker_id)
+            self.assertIs(worker_info.dataset, self.dataset)
+            worker_infos.append(worker_info)
+
+        loader = DataLoader(self.dataset, batch_size=2, num_workers=3, worker_type='thread',
+                            worker_init_fn=record_worker_info)
+        self.assertEqual(len(list(loader)), 50)
+        self.assertEqual(sorted(info.id for info in worker_infos), [0, 1, 2])
+        self.assertIsNone(torch.utils.data.get_worker_info())
+
+        # iterable-style datasets are split among the worker threads
+        loader = DataLoader(WorkerSpecificIterableDataset([2, 3]), num_workers=2, worker_type='thread')
+        self.assertEqual(sorted(x.item() for x in loader), [0, 0, 1, 1, 2])
+
+        with self.assertRaisesRegex(ValueError, "either 'process' or 'thread'"):
+            DataLoader(self.dataset, num_workers=2, worker_type='fiber')
+        with self.assertRaisesRegex(ValueError, "shared_memory_slots option can only be used with"):
+            DataLoader(self.dataset, num_workers=2, worker_type='thread', shared_memory_slots=3)
+        with self.assertRaisesRegex(ValueError, "multiprocessing_context can only be used with"):
+            DataLoader(self.dataset, num_workers=2, worker_type='thread', multiprocessing_context='spawn')
+
+    def test_persistent_workers(self):
+        loader = DataLoader(self.dataset, batch_size=2, num_workers=2, persistent_workers=True)
+        it = iter(loader)
+        workers = list(it._workers)
+        for _ in range(3):
+            self._test_sequential(loader)
+        self.assertIs(iter(loader), it)
+        self.assertEqual(it._workers, workers)
+        self.assertTrue(all(w.is_alive() for w in workers))
+
+        # stopping an epoch early drops its remaining batches
+        loader = DataLoader(self.dataset, batch_size=2, num_workers=2, persistent_workers=True,
+                            shared_memory_slots=3)
+        for _ in range(3):
+            for i, (input, target) in enumerate(loader):
+                self.assertEqual(input, self.data[2 * i:2 * i + 2])
+                if i == 5:
+                    break
+        self._test_sequential(loader)
+
+        self._test_shuffle(DataLoader(self.dataset, batch_size=2, shuffle=True, num_workers=2,
+                                      persistent_workers=True, pin_memory=TEST_CUDA))
+
+        # exhausted iterable-style dataset replicas start over
+        loader = DataLoader(WorkerSpecificIterableDataset([2, 3]), num_workers=2, persistent_workers=True)
+        for _ in range(3):
+            self.assertEqual(sorted(x.item() for x in loader), [0, 0, 1, 1, 2])
+
+        workers = loader._iterator._workers
+        del loader, it
+        gc.collect()
+        for w in workers:
+            w.join(JOIN_TIMEOUT)
+            self.assertFalse(w.is_alive())
+
+        with self.assertRaisesRegex(ValueError, "persistent_workers option needs num_workers > 0"):
+            DataLoader(self.dataset, persistent_workers=True)
+
+    def test_prefetch_factor(self):
+        for prefetch_factor in (1, 4):
+            loader = DataLoader(self.dataset, batch_size=2, num_workers=2, prefetch_factor=prefetch_factor)
+            it = iter(loader)
+            self.assertEqual(it._tasks_outstanding, 2 * prefetch_factor)
+            del it
+            self._test_sequential(loader)
+        self._test_sequential(DataLoader(self.dataset, batch_size=2, num_workers=2, prefetch_factor=4,
+                                         shared_memory_slots=5))
+
+        with self.assertRaisesRegex(ValueError, "prefetch_factor option should be positive"):
+            DataLoader(self.dataset, num_workers=2, prefetch_factor=0)
+        with self.assertRaisesRegex(ValueError, "could only be specified in multiprocessing"):
+            DataLoader(self.dataset, prefetch_factor=4)
+        with self.assertRaisesRegex(ValueError, "could only be specified in multiprocessing"):
+            DataLoader(self.dataset, adaptive_prefetch=True)
+        with self.assertRaisesRegex(ValueError, "should be at least 5"):
+            DataLoader(self.dataset, num_workers=2, prefetch_factor=4, shared_memory_slots=4)
+
+    def test_adaptive_prefetch(self):
+        self._test_sequential(DataLoader(self.dataset, num_workers=2, prefetch_factor=4, adaptive_prefetch=True))
+        self._test_shuffle(DataLoader(self.dataset, batch_size=2, shuffle=True, num_workers=2,
+                                      prefetch_factor=4, adaptive_prefetch=True))
+
+        it = iter(DataLoader(self.dataset, num_workers=2, prefetch_factor=4, adaptive_prefetch=True))
+        self.assertEqual(it._prefetch_window, 8)
+        # batches that are ready in time shrink the window down to one task per worker
+        for _ in range(50):
+            it._wait_time = 0.
+            it._adapt_prefetch_window()
+        self.assertEqual(it._prefetch_window, 2)
+        # waiting for batches grows it back, up to `prefetch_factor` tasks per worker
+        for _ in range(10):
+            it._wait_time = 1.
+            it._adapt_prefetch_window()
+        self.assertEqual(it._prefetch_window, 8)
+        self.assertLessEqual(it._tasks_outstanding, 8)
+        self.assertEqual(len(list(it)), 100)
+
+    def test_async_dataset(self):
+        dataset = CountingAsyncDataset(20)
+        loader = DataLoader(dataset, batch_size=5)
+        for i, batch in enumerate(loader):
+            self.assertEqual(batch, torch.arange(5 * i, 5 * i + 5))
+        # the samples of the next batch are fetched along with the current one
+        self.assertEqual(dataset.peak_in_flight, 10)
+
+        dataset = CountingAsyncDataset(20)
+        self.assertEqual(list(DataLoader(dataset, batch_size=None)), list(range(20)))
+        self.assertEqual(dataset.peak_in_flight, 10)
+
+        # batches larger than the window are fetched at once
+        dataset = CountingAsyncDataset(20, max_in_flight=4)
+        self.assertEqual(list(DataLoader(dataset, batch_size=10)), [torch.arange(10), torch.arange(10, 20)])
+        self.assertEqual(dataset.peak_in_flight, 10)
+
+        for worker_type in ('process', 'thread'):
+            loader = DataLoader(CountingAsyncDataset(40), batch_size=5, num_workers=2, worker_type=worker_type)
+            self.assertEqual(torch.cat(list(loader)), torch.arange(40))
+
+        dataset = CountingAsyncDataset(20)
+        loader = DataLoader(dataset, batch_size=5, sampler=[0, 3, 3, 7, 1, 1, 1, 2])
+        self.assertEqual(list(loader), [torch.tensor([0, 3, 3, 7, 1]), torch.tensor([1, 1, 2])])
+
+    def test_async_iteration(self):
+        async def consume(loader):
+            batches = []
+            async for batch in loader:
+                batches.append(batch)
+            return batches
+
+        async def consume_sync(loader):
+            return list(loader)
+
+        loop = asyncio.new_event_loop()
+        try:
+            for loader in (DataLoader(self.dataset, batch_size=2),
+                           DataLoader(self.dataset, batch_size=2, num_workers=2),
+                           DataLoader(CountingAsyncDataset(20), batch_size=5, num_workers=2)):
+                self.assertEqual(loop.run_until_complete(consume(loader)), list(loader))
+
+            # without workers, samples are awaited on the caller's loop
+            dataset = CountingAsyncDataset(20)
+            batches = loop.run_until_complete(consume(DataLoader(dataset, batch_size=5)))
+            self.assertEqual(torch.cat(batches), torch.arange(20))
+            self.assertEqual(dataset.loops, {loop})
+            self.assertEqual(dataset.peak_in_flight, 10)
+
+            # a plain for loop also works within a running loop
+            batches = loop.run_until_complete(consume_sync(DataLoader(CountingAsyncDataset(20), batch_size=5)))
+            self.assertEqual(torch.cat(batches), torch.arange(20))
+        finally:
+            loop.close()
+
+    def test_getitems_fetch(self):
+        class BulkDataset(Dataset):
+            def __init__(self):
+                self.calls = []
+
+            def __getitem__(self, idx):
+                raise AssertionError("samples should be fetched in bulk")
+
+            def __getitems__(self, indices):
+                self.calls.append(list(indices))
+                return [2 * idx for idx in indices]
+
+            def __len__(self):
+                return 10
+
+        dataset = BulkDataset()
+        loader = DataLoader(dataset, batch_size=4)
+        self.assertEqual(list(loader), [torch.tensor([0, 2, 4, 6]), torch.tensor([8, 10, 12, 14]),
+                                        torch.tensor([16, 18])])
+        self.assertEqual(dataset.calls, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+
+        self._test_sequential(DataLoader(self.dataset, batch_size=2, num_workers=2))
+        self._test_shuffle(DataLoader(Subset(self.dataset, list(range(100))), batch_size=2, shuffle=True))
+
     def test_random_sampler(self):
 
         from collections import Counter
@@ -1371,6 +1643,121 @@ except RuntimeError as e:
             self.assertEqual(list(fn()), list(fn()))
 
 
+    def test_sampler_state_dict(self):
+        from torch.utils.data import RandomSampler, BatchSampler, SequentialSampler
+        from torch.utils.data.distributed import DistributedSampler
+
+        for fn in (
+            lambda: RandomSampler(self.dataset, generator=torch.Generator().manual_seed(42)),
+            lambda: RandomSampler(self.dataset, num_samples=30, replacement=True),
+            lambda: DistributedSampler(self.dataset, num_replicas=3, rank=1, seed=3),
+            lambda: BatchSampler(RandomSampler(self.dataset), batch_size=3, drop_last=False),
+        ):
+            sampler = fn()
+            it = iter(sampler)
+            seen = [next(it) for _ in range(10)]
+            state_dict = sampler.state_dict()
+            remaining = list(it)
+
+            # a new sampler continues right after the saved position
+            resumed = fn()
+            resumed.load_state_dict(state_dict)
+            self.assertEqual(list(resumed), remaining)
+            self.assertEqual(len(seen) + len(remaining), len(sampler))
+
+        sampler = DistributedSampler(self.dataset, num_replicas=2, rank=0)
+        sampler.set_epoch(5)
+        it = iter(sampler)
+        next(it)
+        resumed = DistributedSampler(self.dataset, num_replicas=2, rank=0)
+        resumed.load_state_dict(sampler.state_dict())
+        self.assertEqual(resumed.epoch, 5)
+        self.assertEqual(list(resumed), list(it))
+
+        # the position is kept by the wrapped sampler only
+        self.assertIsNone(BatchSampler(SequentialSampler(self.dataset), batch_size=3, drop_last=True).state_dict())
+
+    def test_batch_sampler_concurrent_iteration(self):
+        from torch.utils.data import BatchSampler, SequentialSampler
+
+        sampler = BatchSampler(SequentialSampler(range(10)), batch_size=3, drop_last=False)
+        batches = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+        self.assertEqual(list(zip(sampler, sampler)), list(zip(batches, batches)))
+        self.assertEqual([[b for b in sampler] for _ in sampler], [batches] * len(batches))
+
+        loader = DataLoader(self.dataset, batch_size=4)
+        pairs = list(zip(loader, loader))
+        self.assertEqual(len(pairs), len(loader))
+        for (first, second), batch in zip(pairs, loader):
+            self.assertEqual(first, batch)
+            self.assertEqual(second, batch)
+
+        # each iterator keeps the progress of its own pass
+        loader = DataLoader(self.dataset, batch_size=4, shuffle=True)
+        it1, it2 = iter(loader), iter(loader)
+        next(it1)
+        for _ in range(3):
+            next(it2)
+        state_dict = it1.state_dict()
+        remaining = list(it1)
+        resumed = DataLoader(self.dataset, batch_size=4, shuffle=True)
+        resumed.load_state_dict(state_dict)
+        self.assertEqual(list(resumed), remaining)
+
+    def test_resume_iteration(self):
+        for kwargs in ({}, {'num_workers': 2}, {'num_workers': 2, 'persistent_workers': True}):
+            loader = DataLoader(self.dataset, batch_size=3, shuffle=True, **kwargs)
+            it = iter(loader)
+            for _ in range(10):
+                next(it)
+            state_dict = it.state_dict()
+            self.assertEqual(state_dict['num_yielded'], 10)
+            remaining = list(it)
+
+            # e.g., after a restart
+            resumed = DataLoader(self.dataset, batch_size=3, shuffle=True, **kwargs)
+            resumed.load_state_dict(state_dict)
+            self.assertEqual(list(resumed), remaining)
+            # only the next iterator resumes
+            self.assertEqual(len(list(resumed)), len(resumed))
+
+            # before any batch was yielded
+            it = iter(loader)
+            state_dict = it.state_dict()
+            resumed.load_state_dict(state_dict)
+            self.assertEqual(list(resumed), list(it))
+
+        # without a checkpointable sampler, the indices are skipped
+        loader = DataLoader(self.dataset, batch_size=4, sampler=list(range(20)))
+        it = iter(loader)
+        next(it)
+        resumed = DataLoader(self.dataset, batch_size=4, sampler=list(range(20)))
+        resumed.load_state_dict(it.state_dict())
+        self.assertEqual(list(resumed), list(it))
+
+        with self.assertRaisesRegex(ValueError, "only supported for map-style datasets"):
+            DataLoader(CountingIterableDataset(20)).load_state_dict({'sampler': None, 'num_yielded': 1})
+
+    def test_shuffle_global_rng_order(self):
+        # The base seed of the workers is drawn from the global RNG before the
+        # permutation of a batched loader, and after it without batching.
+        n = len(self.dataset)
+        torch.manual_seed(7)
+        base_seed = torch.empty((), dtype=torch.int64).random_().item()
+        perm = torch.randperm(n)
+        torch.manual_seed(7)
+        it = iter(DataLoader(self.dataset, batch_size=2, shuffle=True))
+        self.assertEqual(it._base_seed, base_seed)
+        self.assertEqual(torch.cat([target for _, target in it]), self.labels[perm])
+
+        torch.manual_seed(7)
+        perm = torch.randperm(n)
+        base_seed = torch.empty((), dtype=torch.int64).random_().item()
+        torch.manual_seed(7)
+        it = iter(DataLoader(self.dataset, batch_size=None, shuffle=True))
+        self.assertEqual(it._base_seed, base_seed)
+        self.assertEqual(torch.stack([target for _, target in it]), self.labels[perm])
+
     def _test_sampler(self, **kwargs):
         indices = range(2, 12)  # using a regular iterable
         dl = DataLoader(self.dataset, sampler=indices, batch_size=2, **kwargs)
@@ -39,6 +39,16 @@ class TestFuture(TestCase):
         ):
             fut.set_result(1)
 
+    def test_set_exception(self):
+        fut = Future()
+        then_fut = fut.then(lambda x: x.wait() + 1)
+        fut.set_exception(ValueError("foo"))
+        with self.assertRaisesRegex(ValueError, "foo"):
+            fut.wait()
+        # the callback raises it too
+        with self.assertRaisesRegex(RuntimeError, "foo"):
+            then_fut.wait()
+
     def test_pickle_future(self):
         fut = Future()
         errMsg = "Can not pickle torch.futures.Future"
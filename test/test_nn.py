@@ -595,6 +595,14 @@ class TestNN(NNTestCase):
         self.assertEqual(module.weight.grad.data, module.weight.data.clone().zero_())
         self.assertEqual(module.bias.grad.data, module.bias.data.clone().zero_())
 
+        # Force set to None.
+        module.zero_grad(set_to_none=True)
+        self.assertIsNone(module.weight.grad)
+        self.assertIsNone(module.bias.grad)
+        module(i).sum().backward()
+        self.assertIsNotNone(module.weight.grad)
+        self.assertGreater(module.weight.grad.data.abs().sum(), 0)
+
     def test_no_grad(self):
         for dtype in [torch.bfloat16, torch.float, torch.double]:
             module = nn.Conv2d(2, 5, kernel_size=3, padding=1).to(dtype)
@@ -1684,6 +1692,14 @@ class TestNN(NNTestCase):
             scale = compare_scaling(grads)
             self.assertEqual(scale, 1)
 
+        # Parameters without a gradient are skipped
+        l.bias.grad = None
+        norm = clip_grad_norm_(l.parameters(), max_norm)
+        self.assertEqual(norm, l.weight.grad.norm())
+        self.assertIsNone(l.bias.grad)
+        l.weight.grad = None
+        self.assertEqual(clip_grad_norm_(l.parameters(), max_norm), 0)
+
         # Should accept a single Tensor as input
         p1, p2 = torch.randn(10, 10), torch.randn(10, 10)
         g = torch.arange(1., 101).view(10, 10)
@@ -292,6 +292,26 @@ class TestOptim(TestCase):
             lambda params: optim.SGD(params, lr=0.005),
             [lambda opt: StepLR(opt, gamma=0.99999, step_size=300)]
         )
+        self._test_rosenbrock_sparse(
+            lambda params: optim.SGD(params, lr=5e-3, momentum=0.9, foreach=True)
+        )
+
+    def test_sgd_foreach_sparse(self):
+        # sparse gradients fall back to the per-parameter update
+        def make_params():
+            torch.manual_seed(0)
+            return [torch.randn(10, 5, requires_grad=True), torch.randn(10, requires_grad=True)]
+
+        params, params_foreach = make_params(), make_params()
+        optimizer = optim.SGD(params, lr=1e-2, momentum=0.9)
+        optimizer_foreach = optim.SGD(params_foreach, lr=1e-2, momentum=0.9, foreach=True)
+        for i in range(3):
+            for ps, opt in ((params, optimizer), (params_foreach, optimizer_foreach)):
+                ps[0].grad = torch.sparse_coo_tensor([[i, 4]], torch.ones(2, 5), (10, 5))
+                ps[1].grad = torch.sin(ps[1].detach())
+                opt.step()
+            for p, p_foreach in zip(params, params_foreach):
+                self.assertEqual(p, p_foreach)
 
     def test_adam(self):
         self._test_basic_cases(
@@ -464,6 +484,166 @@ class TestOptim(TestCase):
         with self.assertRaisesRegex(ValueError, "Invalid eta values: 1.0, 0.5"):
             optim.Rprop(None, lr=1e-2, etas=(1.0, 0.5))
 
+    def _test_foreach(self, optimizer_cls, **kwargs):
+        def make_params():
+            torch.manual_seed(0)
+            # the last two parameters are laid out back to back in memory
+            flat = torch.randn(15)
+            return [torch.randn(10, 5, requires_grad=True),
+                    torch.randn(10, 2)[..., 0].requires_grad_(),
+                    flat[:10].view(2, 5).requires_grad_(),
+                    flat[10:].requires_grad_()]
+
+        params, params_foreach = make_params(), make_params()
+        optimizer = optimizer_cls(params, **kwargs)
+        optimizer_foreach = optimizer_cls(params_foreach, foreach=True, **kwargs)
+
+        def step(i, optimizer, params):
+            # some parameters don't have a gradient in some steps
+            for j, p in enumerate(params):
+                p.grad = None if (i + j) % 3 == 0 else torch.sin(p.detach() * (i + 1))
+            optimizer.step()
+
+        for i in range(6):
+            step(i, optimizer, params)
+            step(i, optimizer_foreach, params_foreach)
+            for p, p_foreach in zip(params, params_foreach):
+                self.assertEqual(p, p_foreach)
+
+        # state saved by either implementation can be loaded by the other
+        # (param group options, including foreach, are loaded too)
+        optimizer_loaded = optimizer_cls(params_foreach, **kwargs)
+        state_dict = deepcopy(optimizer.state_dict())
+        state_dict['param_groups'][0]['foreach'] = True
+        optimizer_loaded.load_state_dict(state_dict)
+        state_dict = deepcopy(optimizer_foreach.state_dict())
+        state_dict['param_groups'][0]['foreach'] = False
+        optimizer.load_state_dict(state_dict)
+        for i in range(6, 10):
+            step(i, optimizer, params)
+            step(i, optimizer_loaded, params_foreach)
+            for p, p_foreach in zip(params, params_foreach):
+                self.assertEqual(p, p_foreach)
+
+    def test_foreach(self):
+        self._test_foreach(optim.SGD, lr=1e-2)
+        self._test_foreach(optim.SGD, lr=1e-2, momentum=0.9, dampening=0.1, weight_decay=0.1)
+        self._test_foreach(optim.SGD, lr=1e-2, momentum=0.9, nesterov=True)
+        self._test_foreach(optim.Adam, lr=1e-2, weight_decay=0.1)
+        self._test_foreach(optim.Adam, lr=1e-2, amsgrad=True)
+        self._test_foreach(optim.AdamW, lr=1e-2)
+        self._test_foreach(optim.AdamW, lr=1e-2, amsgrad=True)
+        self._test_foreach(optim.Adadelta, weight_decay=0.1)
+        self._test_foreach(optim.Adagrad, lr=1e-2, lr_decay=1e-3, initial_accumulator_value=0.1)
+        self._test_foreach(optim.Adamax, lr=1e-2, weight_decay=0.1)
+        self._test_foreach(optim.RMSprop, lr=1e-2, weight_decay=0.1)
+        self._test_foreach(optim.RMSprop, lr=1e-2, momentum=0.9, centered=True)
+
+    def test_foreach_basic(self):
+        self._test_basic_cases(
+            lambda weight, bias: optim.SGD([weight, bias], lr=1e-3, momentum=0.9, foreach=True)
+        )
+        self._test_basic_cases(
+            lambda weight, bias: optim.Adam(
+                self._build_params_dict(weight, bias, lr=1e-2),
+                lr=1e-3, amsgrad=True, foreach=True)
+        )
+        self._test_basic_cases(
+            lambda weight, bias: optim.Adagrad([weight, bias], lr=1e-1, foreach=True)
+        )
+
+    def test_zero_grad_set_to_none(self):
+        constructors = [
+            lambda params: optim.SGD(params, lr=1e-2, momentum=0.9),
+            lambda params: optim.SGD(params, lr=1e-2, momentum=0.9, foreach=True),
+            lambda params: optim.Adam(params, lr=1e-2),
+            lambda params: optim.Adam(params, lr=1e-2, foreach=True),
+            lambda params: optim.AdamW(params, lr=1e-2),
+            lambda params: optim.Adadelta(params),
+            lambda params: optim.Adagrad(params, lr=1e-2),
+            lambda params: optim.Adagrad(params, lr=1e-2, foreach=True),
+            lambda params: optim.Adamax(params, lr=1e-2),
+            lambda params: optim.RMSprop(params, lr=1e-2, momentum=0.9),
+            lambda params: optim.ASGD(params, lr=1e-2),
+            lambda params: optim.Rprop(params, lr=1e-2),
+        ]
+        for constructor in constructors:
+            weight = torch.randn(10, 5, requires_grad=True)
+            bias = torch.randn(10, requires_grad=True)
+            optimizer = constructor([weight, bias])
+            input = torch.randn(5)
+            for i in range(3):
+                optimizer.zero_grad(set_to_none=True)
+                self.assertIsNone(weight.grad)
+                self.assertIsNone(bias.grad)
+                # only the weight receives a gradient
+                weight.mv(input).sum().backward()
+                self.assertIsNone(bias.grad)
+                bias_before = bias.clone()
+                optimizer.step()
+                self.assertEqual(bias, bias_before)
+
+    def test_flatten_parameters(self):
+        def make_model():
+            torch.manual_seed(0)
+            return torch.nn.Sequential(torch.nn.Linear(5, 4), torch.nn.ReLU(), torch.nn.Linear(4, 2))
+
+        model, model_flat = make_model(), make_model()
+        input = torch.randn(3, 5)
+        optimizer = optim.Adam(model.parameters(), lr=1e-2, foreach=True)
+        optimizer_flat = optim.Adam(model_flat.parameters(), lr=1e-2, foreach=True)
+
+        def step(model, optimizer):
+            optimizer.zero_grad()
+            model(input).pow(2).sum().backward()
+            optimizer.step()
+
+        # flatten with existing gradients and state
+        step(model, optimizer)
+        step(model_flat, optimizer_flat)
+        flat_grads = optimizer_flat.flatten_parameters()
+        self.assertEqual(len(flat_grads), 1)
+        self.assertEqual(flat_grads[0], torch.cat([p.grad.view(-1) for p in model.parameters()]))
+        params = list(model_flat.parameters())
+        for name in ('exp_avg', 'exp_avg_sq'):
+            self.assertEqual(optimizer_flat.state[params[1]][name].storage().data_ptr(),
+                             optimizer_flat.state[params[0]][name].storage().data_ptr())
+
+        for i in range(5):
+            step(model, optimizer)
+            step(model_flat, optimizer_flat)
+            for p, p_flat in zip(model.parameters(), model_flat.parameters()):
+                self.assertEqual(p, p_flat)
+                self.assertEqual(p.grad, p_flat.grad)
+            # gradients keep living in the flat buffer
+            for p in params:
+                self.assertEqual(p.grad.storage().data_ptr(), flat_grads[0].storage().data_ptr())
+                self.assertEqual(p.storage().data_ptr(), params[0].storage().data_ptr())
+
+        # Module.zero_grad works on gradient views
+        model_flat.zero_grad()
+        self.assertEqual(flat_grads[0], torch.zeros_like(flat_grads[0]))
+
+        # replaced gradients are moved back into the flat buffer
+        params[0].grad = None
+        optimizer_flat.zero_grad()
+        self.assertEqual(params[0].grad.storage().data_ptr(), flat_grads[0].storage().data_ptr())
+
+        # loaded state is flattened again
+        optimizer_flat.load_state_dict(optimizer.state_dict())
+        self.assertEqual(optimizer_flat.state[params[1]]['exp_avg'].storage().data_ptr(),
+                         optimizer_flat.state[params[0]]['exp_avg'].storage().data_ptr())
+
+        # parameters updated at once are still seen as modified in-place
+        versions = [p._version for p in params]
+        step(model_flat, optimizer_flat)
+        for p, version in zip(params, versions):
+            self.assertGreater(p._version, version)
+        loss = model_flat(input).pow(2).sum()
+        optimizer_flat.step()
+        with self.assertRaisesRegex(RuntimeError, "modified by an inplace operation"):
+            loss.backward()
+
     def test_lbfgs(self):
         self._test_basic_cases(
             lambda weight, bias: optim.LBFGS([weight, bias]),
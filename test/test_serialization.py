@@ -738,6 +738,182 @@ class TestSerialization(TestCase, SerializationMixin):
             torch.save(model, path)
             torch.load(path)
 
+    @unittest.skipIf(IS_WINDOWS, "NamedTemporaryFile on windows")
+    def test_serialization_mmap(self):
+        x = torch.randn(5, 5)
+        y = torch.arange(10, dtype=torch.int64)
+        state = {'x': x, 'y': y, 'x_view': x[1:3]}
+
+        with tempfile.NamedTemporaryFile() as f:
+            torch.save(state, f.name)
+            loaded = torch.load(f.name, mmap=True)
+            self.assertEqual(loaded['x'], x)
+            self.assertEqual(loaded['y'], y)
+            self.assertEqual(loaded['x_view'], x[1:3])
+            # storage sharing is preserved across mapped records
+            self.assertEqual(loaded['x'].storage().data_ptr(), loaded['x_view'].storage().data_ptr())
+            # the file is mapped privately, writes never reach the file
+            loaded['x'].zero_()
+            self.assertEqual(torch.load(f.name)['x'], x)
+
+        # compressed records (e.g., of a checkpoint repacked by another tool)
+        # are read into memory instead
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path, compressed = os.path.join(tmpdir, 'x.pt'), os.path.join(tmpdir, 'x_compressed.pt')
+            torch.save(state, path)
+            with zipfile.ZipFile(path) as src, \
+                    zipfile.ZipFile(compressed, 'w', compression=zipfile.ZIP_DEFLATED) as dst:
+                for name in src.namelist():
+                    dst.writestr(name, src.read(name))
+            loaded = torch.load(compressed, mmap=True)
+            self.assertEqual(loaded['x'], x)
+            self.assertEqual(loaded['y'], y)
+
+    def test_serialization_save_path_errors(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'missing', 'tensor.pt')
+            with self.assertRaises(FileNotFoundError):
+                torch.save(torch.randn(2), path)
+            with self.assertRaises(FileNotFoundError):
+                torch.save(torch.randn(2), pathlib.Path(path))
+
+    @unittest.skipIf(not torch.cuda.is_available(), "CUDA not available")
+    def test_serialization_cuda_staging(self):
+        tensors = [torch.randn(100, device='cuda') for _ in range(5)]
+        tensors.append(torch.randn(10))
+        tensors.append(torch.empty(0, device='cuda'))
+        orig_staging_bytes = torch.serialization._SAVE_STAGING_BYTES
+        # Smaller than a single storage, so every record is staged on its own
+        torch.serialization._SAVE_STAGING_BYTES = 16
+        try:
+            with BytesIOContext() as f:
+                torch.save(tensors, f)
+                f.seek(0)
+                loaded = torch.load(f)
+        finally:
+            torch.serialization._SAVE_STAGING_BYTES = orig_staging_bytes
+        self.assertEqual(loaded, tensors)
+
+    def test_serialization_sharded(self):
+        model = torch.nn.Sequential(torch.nn.Linear(10, 20), torch.nn.Linear(20, 20), torch.nn.Linear(20, 5))
+        state_dict = model.state_dict()
+        # tied tensors have to stay in one shard
+        state_dict['tied'] = state_dict['1.weight'][2:4]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            torch.serialization.save_sharded(state_dict, tmpdir, max_shard_size=1000)
+            self.assertEqual(len([f for f in os.listdir(tmpdir) if f.startswith('shard-')]), 3)
+
+            loaded = torch.serialization.load_sharded(tmpdir)
+            self.assertEqual(list(loaded.keys()), list(state_dict.keys()))
+            for key in state_dict:
+                self.assertEqual(loaded[key], state_dict[key])
+            self.assertEqual(loaded['tied'].storage().data_ptr(), loaded['1.weight'].storage().data_ptr())
+            self.assertEqual(loaded._metadata, state_dict._metadata)
+            model.load_state_dict({k: v for k, v in loaded.items() if k != 'tied'})
+
+            # every shard is a regular checkpoint
+            shard = torch.load(os.path.join(tmpdir, 'shard-00000-of-00003.pt'))
+            self.assertEqual(shard['0.weight'], state_dict['0.weight'])
+
+            # only the shards holding the requested keys are read
+            os.remove(os.path.join(tmpdir, 'shard-00000-of-00003.pt'))
+            loaded = torch.serialization.load_sharded(tmpdir, keys=['2.bias', '2.weight'], mmap=True)
+            self.assertEqual(list(loaded.keys()), ['2.weight', '2.bias'])
+            self.assertEqual(loaded['2.weight'], state_dict['2.weight'])
+
+            with self.assertRaisesRegex(KeyError, "not found in checkpoint"):
+                torch.serialization.load_sharded(tmpdir, keys=['missing'])
+
+    def test_serialization_sharded_invalid(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaisesRegex(TypeError, "to be a dense tensor"):
+                torch.serialization.save_sharded({'a': 1}, tmpdir)
+
+    def test_serialization_save_async(self):
+        x = torch.randn(5, 5)
+        state = {'x': x, 'x_view': x[1:3], 'n': 3}
+        expected = copy.deepcopy(state)
+
+        with tempfile.NamedTemporaryFile() as f:
+            fut = torch.save_async(state, f.name)
+            # the snapshot is taken before save_async returns
+            x.zero_()
+            self.assertIsNone(fut.wait())
+            loaded = torch.load(f.name)
+        self.assertEqual(loaded, expected)
+        self.assertEqual(loaded['x'].storage().data_ptr(), loaded['x_view'].storage().data_ptr())
+
+        with BytesIOContext() as f:
+            torch.save_async(state, f).wait()
+            f.seek(0)
+            self.assertEqual(torch.load(f), state)
+
+    def test_serialization_save_async_error(self):
+        path = os.path.join(tempfile.mkdtemp(), 'missing', 'file.pt')
+        with self.assertRaises(Exception) as ctx:
+            torch.save(torch.randn(2), path)
+        fut = torch.save_async(torch.randn(2), path)
+        # the error is the same as torch.save's
+        with self.assertRaises(type(ctx.exception)) as fut_ctx:
+            fut.wait()
+        self.assertEqual(str(fut_ctx.exception), str(ctx.exception))
+
+    def test_serialization_delta(self):
+        model = torch.nn.Sequential(torch.nn.Linear(10, 10), torch.nn.Linear(10, 10))
+
+        def record_names(path):
+            return [name for name in zipfile.ZipFile(path).namelist() if '/data/' in name]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            step0, step1, step2 = (os.path.join(tmpdir, 'step{}.pt'.format(i)) for i in range(3))
+            torch.serialization.save_delta(model.state_dict(), step0, None)
+            self.assertEqual(len(record_names(step0)), 4)
+
+            with torch.no_grad():
+                model[1].weight.add_(1)
+            torch.serialization.save_delta(model.state_dict(), step1, base=step0)
+            self.assertEqual(len(record_names(step1)), 1)
+            loaded = torch.load(step1)
+            for key, value in model.state_dict().items():
+                self.assertEqual(loaded[key], value)
+
+            # a chain of deltas resolves records through every base
+            with torch.no_grad():
+                model[1].bias.add_(1)
+            torch.serialization.save_delta(model.state_dict(), step2, base=step1)
+            self.assertEqual(len(record_names(step2)), 1)
+            loaded = torch.load(step2)
+            for key, value in model.state_dict().items():
+                self.assertEqual(loaded[key], value)
+
+            # a regular checkpoint can be the base as well
+            torch.save(model.state_dict(), step0)
+            torch.serialization.save_delta(model.state_dict(), step1, base=step0)
+            self.assertEqual(len(record_names(step1)), 0)
+            self.assertEqual(torch.load(step1)['0.weight'], model[0].weight)
+
+            # the records are checked against the hashes saved in the delta
+            with torch.no_grad():
+                model[0].weight.add_(1)
+            torch.save(model.state_dict(), step0)
+            with self.assertRaisesRegex(RuntimeError, "holds different data"):
+                torch.load(step1)
+            torch.serialization.save_delta(model.state_dict(), step0, None)
+            with self.assertRaisesRegex(RuntimeError, "holds different data"):
+                torch.load(step1)
+
+            with open(step1, 'rb') as f:
+                with self.assertRaisesRegex(RuntimeError, "can only be loaded from a file name"):
+                    torch.load(f)
+
+    def test_serialization_mmap_requires_path(self):
+        with BytesIOContext() as f:
+            torch.save(torch.randn(2), f)
+            f.seek(0)
+            with self.assertRaisesRegex(ValueError, "mmap=True requires f to be a file name"):
+                torch.load(f, mmap=True)
+
     def run(self, *args, **kwargs):
         with serialization_method(use_zip=True):
             return super(TestSerialization, self).run(*args, **kwargs)
@@ -45,6 +45,7 @@ def get_ignored_functions():
         torch.initial_seed,
         torch.seed,
         torch.save,
+        torch.save_async,
         torch.load,
         torch.set_printoptions,
         torch.fork,
@@ -189,7 +189,11 @@ def vmap(func: Callable, in_dims: in_dims_t = 0, out_dims: out_dims_t = 0) -> Ca
     warnings.warn(
         'torch.vmap is an experimental prototype that is subject to '
         'change and/or deletion. Please use at your own risk.')
+    return _vmap(func, in_dims, out_dims)
 
+# A version of vmap but without the initial "experimental prototype" warning,
+# for internal callers (e.g. torch.autograd.functional).
+def _vmap(func: Callable, in_dims: in_dims_t = 0, out_dims: out_dims_t = 0) -> Callable:
     @functools.wraps(func)
     def wrapped(*args):
         fn_name = func.__name__
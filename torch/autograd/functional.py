@@ -1,4 +1,6 @@
 import torch
+import warnings
+from torch._vmap_internals import _vmap
 
 # Utility functions
 
@@ -363,7 +365,54 @@ def jvp(func, inputs, v=None, create_graph=False, strict=False):
     return _tuple_postprocess(outputs, is_outputs_tuple), _tuple_postprocess(jvp, is_outputs_tuple)
 
 
-def jacobian(func, inputs, create_graph=False, strict=False):
+def _vectorized_jacobian(outputs, inputs, create_graph, strict, chunk_size):
+    # Computes the Jacobian of each output with one backward pass per chunk of
+    # rows instead of one per row, by vmapping the vector-Jacobian product over
+    # the rows of the identity matrix, i.e., the one-hot grad_outputs.
+    jacobian = tuple()
+    for i, out in enumerate(outputs):
+
+        def vjp_rows(v):
+            vj = _autograd_grad((out,), inputs, (v,), retain_graph=True, create_graph=create_graph)
+            res = tuple()
+            for el_idx, (vj_el, inp_el) in enumerate(zip(vj, inputs)):
+                if vj_el is None:
+                    if strict:
+                        msg = ("Output {} of the user-provided function is "
+                               "independent of input {}. This is not allowed in "
+                               "strict mode.".format(i, el_idx))
+                        raise RuntimeError(msg)
+                    # Not batched, vmap expands it along the rows
+                    vj_el = torch.zeros_like(inp_el)
+                res += (vj_el,)
+            return res
+
+        numel = out.nelement()
+        step = chunk_size if chunk_size is not None else max(numel, 1)
+        jac_i = tuple([] for _ in range(len(inputs)))
+        for start in range(0, numel, step):
+            num_rows = min(step, numel - start)
+            basis = torch.zeros(num_rows, numel, dtype=out.dtype, device=out.device)
+            basis[torch.arange(num_rows), torch.arange(start, start + num_rows)] = 1
+            rows = _vmap(vjp_rows)(basis.view((num_rows,) + out.size()))
+            for jac_i_el, rows_el in zip(jac_i, rows):
+                jac_i_el.append(rows_el)
+
+        jac_i = tuple(torch.cat(jac_i_el, dim=0).view(out.size() + inputs[el_idx].size())
+                      for (el_idx, jac_i_el) in enumerate(jac_i))
+        if strict and create_graph:
+            for el_idx, jac_i_el in enumerate(jac_i):
+                if not jac_i_el.requires_grad:
+                    msg = ("The jacobian of the user-provided function is "
+                           "independent of input {}. This is not allowed in "
+                           "strict mode when create_graph=True.".format(el_idx))
+                    raise RuntimeError(msg)
+        jacobian += (jac_i, )
+
+    return jacobian
+
+
+def jacobian(func, inputs, create_graph=False, strict=False, vectorize=False, chunk_size=None):
     r"""Function that computes the Jacobian of a given function.
 
     Args:
@@ -379,6 +428,16 @@ def jacobian(func, inputs, create_graph=False, strict=False):
             independent of it. If ``False``, we return a Tensor of zeros as the
             jacobian for said inputs, which is the expected mathematical value.
             Defaults to ``False``.
+        vectorize (bool, optional): This feature is experimental. If ``True``,
+            the rows of the Jacobian of each output are computed with
+            :func:`torch.vmap` in a single batched backward pass, instead of
+            one backward pass per row. If some operation in the backward pass
+            of ``func`` doesn't support vmap yet, a warning is raised and the
+            rows are computed one by one. Defaults to ``False``.
+        chunk_size (int, optional): If ``vectorize`` is ``True``, the number of
+            rows computed per batched backward pass, to bound the memory used
+            by the batched gradients. Defaults to ``None``, i.e., all the rows
+            of an output at once.
 
     Returns:
         Jacobian (Tensor or nested tuple of Tensors): if there are a single
@@ -420,6 +479,12 @@ def jacobian(func, inputs, create_graph=False, strict=False):
                  [0., 3.]]))
     """
 
+    if chunk_size is not None:
+        if not vectorize:
+            raise RuntimeError("jacobian only supports chunk_size with vectorize=True")
+        if chunk_size < 1:
+            raise RuntimeError("Expected chunk_size to be positive, but got {}".format(chunk_size))
+
     is_inputs_tuple, inputs = _as_tuple(inputs, "inputs", "jacobian")
     inputs = _grad_preprocess(inputs, create_graph=create_graph, need_graph=True)
 
@@ -429,6 +494,19 @@ def jacobian(func, inputs, create_graph=False, strict=False):
                                           "jacobian")
     _check_requires_grad(outputs, "outputs", strict=strict)
 
+    if vectorize:
+        try:
+            jacobian = _vectorized_jacobian(outputs, inputs, create_graph, strict, chunk_size)
+        except RuntimeError as e:
+            # Some operations in the backward pass have no batching rule yet
+            if "inside of vmap" not in str(e):
+                raise
+            warnings.warn("jacobian: falling back to one backward pass per row, because some "
+                          "operations in the backward pass of the function don't support vmap yet")
+        else:
+            jacobian = _grad_postprocess(jacobian, create_graph)
+            return _tuple_postprocess(jacobian, (is_outputs_tuple, is_inputs_tuple))
+
     jacobian = tuple()
     for i, out in enumerate(outputs):
 
@@ -461,7 +539,7 @@ def jacobian(func, inputs, create_graph=False, strict=False):
     return _tuple_postprocess(jacobian, (is_outputs_tuple, is_inputs_tuple))
 
 
-def hessian(func, inputs, create_graph=False, strict=False):
+def hessian(func, inputs, create_graph=False, strict=False, vectorize=False, chunk_size=None):
     r"""Function that computes the Hessian of a given scalar function.
 
     Args:
@@ -476,6 +554,13 @@ def hessian(func, inputs, create_graph=False, strict=False):
             such that all the outputs are independent of it. If ``False``, we return a Tensor of zeros as the
             hessian for said inputs, which is the expected mathematical value.
             Defaults to ``False``.
+        vectorize (bool, optional): This feature is experimental. If ``True``,
+            the rows of the Hessian are computed with :func:`torch.vmap` in a
+            single batched double backward pass, instead of one per row (see
+            :func:`jacobian`). Defaults to ``False``.
+        chunk_size (int, optional): If ``vectorize`` is ``True``, the number of
+            rows computed per batched pass. Defaults to ``None``, i.e., all the
+            rows at once.
 
     Returns:
         Hessian (Tensor or a tuple of tuple of Tensors) if there are a single input,
@@ -549,11 +634,19 @@ def hessian(func, inputs, create_graph=False, strict=False):
         return out.squeeze()
 
     def jac_func(*inp):
-        jac = jacobian(ensure_single_output_function, inp, create_graph=True)
+        if vectorize:
+            # Only the double backward of func is batched by vmap then, not
+            # the views that jacobian uses to build its result.
+            out = ensure_single_output_function(*inp)
+            jac = _autograd_grad((out,), inp, create_graph=True)
+            jac = _fill_in_zeros(jac, inp, strict=False, create_graph=True, stage="back")
+        else:
+            jac = jacobian(ensure_single_output_function, inp, create_graph=True)
         _check_requires_grad(jac, "jacobian", strict=strict)
         return jac
 
-    res = jacobian(jac_func, inputs, create_graph=create_graph, strict=strict)
+    res = jacobian(jac_func, inputs, create_graph=create_graph, strict=strict,
+                   vectorize=vectorize, chunk_size=chunk_size)
     return _tuple_postprocess(res, (is_inputs_tuple, is_inputs_tuple))
 
 
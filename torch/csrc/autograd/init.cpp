@@ -7,6 +7,7 @@
 #include <torch/csrc/autograd/profiler.h>
 #include <torch/csrc/autograd/python_function.h>
 #include <torch/csrc/autograd/function.h>
+#include <torch/csrc/autograd/variable.h>
 
 PyObject* THPAutograd_initExtension(PyObject* _unused, PyObject *unused) {
   using namespace torch::autograd::profiler;
@@ -50,6 +51,7 @@ PyObject* THPAutograd_initExtension(PyObject* _unused, PyObject *unused) {
       .def("shapes", &Event::shapes)
       .def("cpu_memory_usage", &Event::cpu_memory_usage)
       .def("cuda_memory_usage", &Event::cuda_memory_usage)
+      .def("memory_addr", &Event::memory_addr)
       .def("handle", &Event::handle)
       .def("node_id", &Event::node_id)
       .def("is_remote", &Event::isRemote);
@@ -60,6 +62,13 @@ PyObject* THPAutograd_initExtension(PyObject* _unused, PyObject *unused) {
   m.def("_enable_record_function", [](bool enable) {
     at::enableRecordFunction(enable);
   });
+  // Marks tensors as modified in-place, e.g., after they were updated through
+  // another tensor that aliases their storage but not their version counter.
+  m.def("_increment_version", [](const std::vector<at::Tensor>& tensors) {
+    for (const auto& tensor : tensors) {
+      torch::autograd::impl::bump_version(tensor);
+    }
+  });
 
   Py_RETURN_TRUE;
 }
@@ -255,7 +255,7 @@ struct ProfilerThreadLocalState
   }
 
   void reportMemoryUsage(
-      void* /* unused */, int64_t alloc_size, c10::Device device) override {
+      void* ptr, int64_t alloc_size, c10::Device device) override {
     if (config_.profile_memory && config_.state != ProfilerState::Disabled) {
       uint64_t thread_id = at::RecordFunction::currentThreadId();
       Event evt(
@@ -264,6 +264,7 @@ struct ProfilerThreadLocalState
           thread_id,
           config_.state == ProfilerState::CUDA);
       evt.updateMemoryStats(alloc_size, device);
+      evt.setMemoryAddr(ptr);
       getEventList(thread_id).record(std::move(evt));
     }
   }
@@ -255,6 +255,15 @@ struct TORCH_API Event final {
     return cuda_memory_usage_;
   }
 
+  // Address of the allocated or freed memory, for MemoryAlloc events.
+  int64_t memory_addr() const {
+    return memory_addr_;
+  }
+
+  void setMemoryAddr(void* ptr) {
+    memory_addr_ = static_cast<int64_t>(reinterpret_cast<intptr_t>(ptr));
+  }
+
   at::RecordFunctionHandle handle() const {
     return handle_;
   }
@@ -291,6 +300,7 @@ private:
   std::vector<std::vector<int64_t>> shapes_;
   int64_t cpu_memory_usage_ = 0;
   int64_t cuda_memory_usage_ = 0;
+  int64_t memory_addr_ = 0;
   int device_ = -1;
   CUDAEventStub cuda_event = nullptr;
   int node_id_ = 0;
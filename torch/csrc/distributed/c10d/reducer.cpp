@@ -30,7 +30,9 @@ Reducer::Reducer(
     std::shared_ptr<c10d::ProcessGroup> process_group,
     std::vector<std::vector<bool>> expect_sparse_gradients,
     int64_t bucket_bytes_cap,
-    bool find_unused_parameters)
+    bool find_unused_parameters,
+    bool gradient_as_bucket_view,
+    bool static_graph)
     : replicas_(std::move(replicas)),
       process_group_(std::move(process_group)),
       expect_sparse_gradients_(std::move(expect_sparse_gradients)),
@@ -39,6 +41,9 @@ Reducer::Reducer(
       next_bucket_(0),
       has_marked_unused_parameters_(false),
       find_unused_parameters_(find_unused_parameters),
+      gradient_as_bucket_view_(gradient_as_bucket_view),
+      static_graph_(static_graph),
+      num_iterations_(0),
       local_used_maps_reduced_(false),
       backward_stats_base_(0),
       has_rebuilt_bucket_(false),
@@ -131,7 +136,7 @@ Reducer::Reducer(
   }
 
   // See Note [Skip allreducing local_used_maps_dev]
-  if (find_unused_parameters_) {
+  if (find_unused_parameters_ || static_graph_) {
     // Initialize locally used parameter maps
     {
       const auto replica_count = replicas_.size();
@@ -169,6 +174,9 @@ Reducer::Reducer(
 // local_used_maps_dev_, because all parameters will be reduced anyway.
 // Therefore, we can avoid allocating memory for local_used_maps and
 // local_used_maps_dev_ if find_unused_parameters_ is false.
+// If static_graph_ is set, local_used_maps_dev_ is only allreduced in the
+// first iteration, and the globally unused parameters found then are reused
+// in later iterations (see search_unused_parameters).
 
 Reducer::~Reducer() noexcept(false) {
   // Remove all hooks on variables registered by this Reducer. This is necessary
@@ -311,13 +319,15 @@ void Reducer::mark_variable_ready_dense(VariableIndex index) {
           bucket_view.toString(),
           ", got ",
           grad.toString());
-      // Assert that the grad tensor and the bucket don't share storage.
-      // If they did, we could avoid the copy altogether.
-      // The reason for not doing this is that existing code calls
-      // `detach_` from `zero_grad`, which is incompatible with views.
-      TORCH_INTERNAL_ASSERT(!grad.is_alias_of(bucket_view));
       TORCH_INTERNAL_ASSERT(grad.device() == bucket_view.device());
       TORCH_INTERNAL_ASSERT(grad.numel() == bucket_view.numel());
+      // If the grad is the bucket view (see gradient_as_bucket_view_), it
+      // already is in the bucket and only needs to be divided.
+      if (grad.is_alias_of(bucket_view)) {
+        bucket_view.div_(process_group_->getSize());
+        // The grad is modified in place and doesn't need to be written back.
+        return false;
+      }
       // AccumulateGrad doesn't HAVE to obey the grad layout contract.
       // The penalty for disobedience is reduced performance, not numerical
       // death. Warnings here help diagnose poor DDP performance.
@@ -344,6 +354,14 @@ void Reducer::mark_variable_ready_dense(VariableIndex index) {
       wrapped.unsafeGetTensorImpl()->set_wrapped_number(true);
       // Divides while copying into the bucket view.
       at::native::mul_out(bucket_view, grad, wrapped);
+      if (gradient_as_bucket_view_) {
+        // The grad was replaced since the buckets were initialized (e.g., it
+        // was set to None by `zero_grad` and allocated again by autograd).
+        // Point it back to the bucket view.
+        grad = bucket_view;
+        // The grad is modified and needs to be written back.
+        return true;
+      }
     } else {
       bucket_view.zero_();
     }
@@ -385,7 +403,7 @@ void Reducer::autograd_hook(VariableIndex index) {
   std::lock_guard<std::mutex> lock(this->mutex_);
 
   // See Note [Skip allreducing local_used_maps_dev]
-  if (find_unused_parameters_) {
+  if (search_unused_parameters()) {
     // Since it gets here, this param has been used for this iteration. We want
     // to mark it in local_used_maps_. During no_sync session, the same var can
     // be set multiple times, which is OK as does not affect correctness. As
@@ -400,16 +418,28 @@ void Reducer::autograd_hook(VariableIndex index) {
     return;
   }
 
+  if (static_graph_ && !static_graph_unused_.empty() &&
+      static_graph_unused_[index.variable_index]) {
+    TORCH_CHECK(
+        false,
+        "Parameter at index ",
+        index.variable_index,
+        " received a gradient, but didn't in the first iteration. The set of ",
+        "parameters used by a module with static_graph=True must not change ",
+        "across iterations.");
+  }
+
   // Rebuild bucket only if 1) it is the first time to rebuild bucket 2)
   // find_unused_parameters_ is false, currently it does not support when there
-  // are unused parameters 3) this backward pass needs to run allreduce. Here,
-  // we just dump tensors and their parameter indices into rebuilt_params_ and
-  // rebuilt_param_indices_ based on gradient arriving order, and then at the
-  // end of finalize_backward(), buckets will be rebuilt based on
-  // rebuilt_params_ and rebuilt_param_indices_, and then will be broadcasted
-  // and intialized. Also we only need to dump tensors and parameter indcies of
-  // one replica.
-  if (!has_rebuilt_bucket_ && !find_unused_parameters_ &&
+  // are unused parameters, unless static_graph_ is set 3) this backward pass
+  // needs to run allreduce. Here, we just dump tensors and their parameter
+  // indices into rebuilt_params_ and rebuilt_param_indices_ based on gradient
+  // arriving order, and then at the beginning of the next forward pass,
+  // buckets will be rebuilt based on rebuilt_params_ and
+  // rebuilt_param_indices_, and then will be broadcasted and intialized (see
+  // rebuild_buckets()). Also we only need to dump tensors and parameter
+  // indcies of one replica.
+  if (!has_rebuilt_bucket_ && (!find_unused_parameters_ || static_graph_) &&
       index.replica_index == 0) {
     rebuilt_params_.push_back(
         replicas_[index.replica_index][index.variable_index]);
@@ -420,8 +450,10 @@ void Reducer::autograd_hook(VariableIndex index) {
   // went unused when computing the model output, they won't be part of the
   // autograd graph, and won't receive gradients. These parameters are
   // discovered in the `prepare_for_backward` function and their indexes stored
-  // in the `unused_parameters_` vector.
-  if (!has_marked_unused_parameters_ && find_unused_parameters_) {
+  // in the `unused_parameters_` vector. With `static_graph_`, they are only
+  // discovered in the first iteration and reused from then on.
+  if (!has_marked_unused_parameters_ &&
+      (find_unused_parameters_ || static_graph_)) {
     has_marked_unused_parameters_ = true;
     for (const auto& unused_index : unused_parameters_) {
       mark_variable_ready(unused_index);
@@ -509,7 +541,7 @@ void Reducer::mark_variable_ready(VariableIndex index) {
   // final bucket was marked ready.
   if (next_bucket_ == buckets_.size()) {
     // See Note [Skip allreducing local_used_maps_dev]
-    if (find_unused_parameters_) {
+    if (search_unused_parameters()) {
       // H2D from local_used_maps_ to local_used_maps_dev_
       for (size_t i = 0; i < local_used_maps_.size(); i++) {
         // We do async H2D to avoid the blocking overhead. The async copy and
@@ -527,20 +559,10 @@ void Reducer::mark_variable_ready(VariableIndex index) {
     const c10::Stream currentStream =
         guard.getStream(replica.contents.device());
     torch::autograd::Engine::get_default_engine().queue_callback([=] {
-      std::unique_lock<std::mutex> lock(this->mutex_);
+      std::lock_guard<std::mutex> lock(this->mutex_);
       // Run callback with the current stream
       c10::OptionalStreamGuard currentStreamGuard{currentStream};
       this->finalize_backward();
-      // Rebuild bucket if this is the first time to rebuild
-      if (!rebuilt_params_.empty()) {
-        auto rebuilt_bucket_indices = rebuildBuckets();
-        // Unlock before initialize_buckets() as initialize_buckets() requires a
-        // lock, it could result in self deadlock without unlocking here.
-        lock.unlock();
-        initialize_buckets(std::move(rebuilt_bucket_indices));
-      } else {
-        lock.unlock();
-      }
     });
   }
 }
@@ -721,6 +743,27 @@ void Reducer::initialize_buckets(
                 replica.contents.narrow(0, offset, length).view(v.sizes()));
           }
         }
+
+        // With gradient_as_bucket_view_, point the grads that are already
+        // defined to their bucket views. Others are pointed to them once they
+        // are ready in the backward pass. When buckets are rebuilt, this
+        // moves the grads from the previous buckets into the new ones.
+        if (gradient_as_bucket_view_) {
+          for (size_t i = 0; i < replica.variables.size(); i++) {
+            auto& v = replica.variables[i];
+            const auto& bucket_view = replica.bucket_views[i];
+            runGradCallbackForVariable(v, [&](auto& grad) {
+              if (grad.defined() && !grad.is_alias_of(bucket_view)) {
+                bucket_view.copy_(grad);
+                grad = bucket_view;
+                // The grad is modified and needs to be written back.
+                return true;
+              }
+              // The grad is not modified and doesn't need to be written back.
+              return false;
+            });
+          }
+        }
       }
 
       // Add bucket replica to enclosing bucket.
@@ -782,9 +825,16 @@ void Reducer::prepare_for_backward(
         "list, dict, iterable).");
   }
 
+  TORCH_CHECK(
+      !static_graph_ || num_iterations_ != 1 || !static_graph_unused_.empty(),
+      "The first forward pass of a module with static_graph=True must be ",
+      "followed by a backward pass, which records the parameters that receive ",
+      "gradients.");
+
   // Reset accounting.
   expect_autograd_hooks_ = true;
   next_bucket_ = 0;
+  num_iterations_++;
   backward_stats_base_ = current_time_in_nanos();
   for (auto& bucket : buckets_) {
     for (auto& replica : bucket.replicas) {
@@ -795,12 +845,18 @@ void Reducer::prepare_for_backward(
 
   // Reset unused parameter accounting.
   has_marked_unused_parameters_ = false;
+
+  // With a static graph, the unused parameters found in the first iteration
+  // are marked ready again, without searching the autograd graph.
+  if (static_graph_ && num_iterations_ > 1) {
+    return;
+  }
   unused_parameters_.clear();
 
   // If find_unused_parameters_ is false, we assume that autograd hooks for ALL
   // variables will be called, and we don't have to search the autograd graph
   // for presence of these hooks.
-  if (!find_unused_parameters_) {
+  if (!search_unused_parameters()) {
     return;
   }
 
@@ -852,7 +908,11 @@ void Reducer::finalize_bucket_dense(Bucket& bucket) {
 
       bool global_unused = false;
       // See Note [Skip allreducing local_used_maps_dev]
-      if (find_unused_parameters_) {
+      if (static_graph_ && num_iterations_ > 1) {
+        global_unused =
+            static_graph_globally_unused_[bucket.variable_indices
+                                              [intra_bucket_index]];
+      } else if (search_unused_parameters()) {
         // Determine if this param has been used globally or not.
         //
         // If the variable was used locally, it is also used globally and then
@@ -893,10 +953,18 @@ void Reducer::finalize_bucket_dense(Bucket& bucket) {
         // If a parameter is globally unused, we keep its grad untouched.
         if (!global_unused) {
           if (!grad.defined()) {
-            // Creates grad according to the "Gradient Layout Contract"
-            // (see torch/csrc/grad/AccumulateGrad.h)
-            grad = torch::autograd::utils::clone_obey_contract(
-                bucket_view, variable);
+            if (gradient_as_bucket_view_) {
+              // The parameter was unused in this process only.
+              grad = bucket_view;
+            } else {
+              // Creates grad according to the "Gradient Layout Contract"
+              // (see torch/csrc/grad/AccumulateGrad.h)
+              grad = torch::autograd::utils::clone_obey_contract(
+                  bucket_view, variable);
+            }
+          } else if (grad.is_alias_of(bucket_view)) {
+            // The reduction already wrote the result into the grad.
+            return false;
           } else {
             grad.copy_(bucket_view);
           }
@@ -935,7 +1003,29 @@ void Reducer::finalize_backward() {
   }
 
   // See Note [Skip allreducing local_used_maps_dev]
-  if (find_unused_parameters_) {
+  if (search_unused_parameters()) {
+    if (static_graph_) {
+      // Record the parameters that were unused in the first iteration.
+      if (!local_used_maps_reduced_) {
+        local_used_work_->wait();
+        for (size_t i = 0; i < local_used_maps_.size(); i++) {
+          local_used_maps_[i].copy_(local_used_maps_dev_[i]);
+        }
+        local_used_maps_reduced_ = true;
+      }
+      const auto variable_count = replicas_[0].size();
+      static_graph_unused_.assign(variable_count, false);
+      for (const auto& index : unused_parameters_) {
+        if (index.replica_index == 0) {
+          static_graph_unused_[index.variable_index] = true;
+        }
+      }
+      auto local_used = local_used_maps_[0].accessor<int, 1>();
+      static_graph_globally_unused_.resize(variable_count);
+      for (size_t i = 0; i < variable_count; i++) {
+        static_graph_globally_unused_[i] = local_used[i] == 0;
+      }
+    }
     // Reset unused parameter accounting.
     for (auto& local_used : local_used_maps_) {
       local_used.fill_(0);
@@ -953,6 +1043,14 @@ void Reducer::finalize_backward() {
   }
 }
 
+bool Reducer::search_unused_parameters() const {
+  // See Note [Skip allreducing local_used_maps_dev]
+  if (static_graph_) {
+    return num_iterations_ <= 1;
+  }
+  return find_unused_parameters_;
+}
+
 void Reducer::runGradCallbackForVariable(
     torch::autograd::Variable& variable,
     GradCallback&& cb) {
@@ -1050,7 +1148,30 @@ void Reducer::sync_bucket_indices(
   }
 }
 
-std::vector<std::vector<size_t>> Reducer::rebuildBuckets() {
+bool Reducer::rebuild_buckets() {
+  std::unique_lock<std::mutex> lock(mutex_);
+  // Only rebuild once, after a complete backward pass recorded the order in
+  // which gradients were ready.
+  if (has_rebuilt_bucket_ || rebuilt_params_.empty() ||
+      expect_autograd_hooks_) {
+    return false;
+  }
+
+  if (static_graph_) {
+    // Parameters that didn't receive a gradient in the first iteration go
+    // last, in the order of their indices.
+    std::vector<bool> rebuilt(replicas_[0].size(), false);
+    for (const auto index : rebuilt_param_indices_) {
+      rebuilt[index] = true;
+    }
+    for (size_t index = 0; index < rebuilt.size(); index++) {
+      if (!rebuilt[index]) {
+        rebuilt_params_.push_back(replicas_[0][index]);
+        rebuilt_param_indices_.push_back(index);
+      }
+    }
+  }
+
   TORCH_INTERNAL_ASSERT(
       rebuilt_params_.size() == rebuilt_param_indices_.size(),
       "rebuilt parameter tensors size is not same as rebuilt parameter indices size.");
@@ -1076,7 +1197,11 @@ std::vector<std::vector<size_t>> Reducer::rebuildBuckets() {
   rebuilt_params_.clear();
   rebuilt_param_indices_.clear();
 
-  return rebuilt_bucket_indices;
+  // Unlock before initialize_buckets() as initialize_buckets() requires a
+  // lock, it could result in self deadlock without unlocking here.
+  lock.unlock();
+  initialize_buckets(std::move(rebuilt_bucket_indices));
+  return true;
 }
 
 namespace {
@@ -29,7 +29,9 @@ class Reducer {
       std::shared_ptr<c10d::ProcessGroup> process_group,
       std::vector<std::vector<bool>> expect_sparse_gradients,
       int64_t bucket_bytes_cap,
-      bool find_unused_parameters);
+      bool find_unused_parameters,
+      bool gradient_as_bucket_view,
+      bool static_graph);
 
   ~Reducer() noexcept(false);
 
@@ -46,6 +48,13 @@ class Reducer {
   void prepare_for_backward(
       const std::vector<torch::autograd::Variable>& outputs);
 
+  // Rebuilds the buckets in the order in which gradients were ready in the
+  // first iteration, once. This is called at the beginning of the next
+  // forward pass rather than at the end of the backward pass, because it
+  // broadcasts the bucket assignment of rank 0 to all processes. Returns
+  // whether the buckets were rebuilt.
+  bool rebuild_buckets();
+
   // Returns the relative time in nanoseconds when gradients were ready,
   // with respect to the time `prepare_for_backward` was called. The outer
   // vector is for model replicas and the inner vector is for parameters.
@@ -80,6 +89,22 @@ class Reducer {
 
   bool has_marked_unused_parameters_;
   const bool find_unused_parameters_;
+  // If true, the grads of dense parameters are views into the flat bucket
+  // contents, so they are neither copied into the buckets before the
+  // reduction nor copied back afterwards.
+  const bool gradient_as_bucket_view_;
+  // If true, the set of parameters that receive gradients and the order in
+  // which they do are the same in every iteration. They are recorded in the
+  // first iteration, so that unused parameters are found without traversing
+  // the autograd graph from then on.
+  const bool static_graph_;
+  // Number of iterations, i.e. calls to `prepare_for_backward`.
+  int64_t num_iterations_;
+  // With static_graph_, the parameters that received no gradient in the
+  // first iteration, in this process and in all processes respectively.
+  // Indexed by variable index, and empty until the first iteration finished.
+  std::vector<bool> static_graph_unused_;
+  std::vector<bool> static_graph_globally_unused_;
   std::vector<VariableIndex> unused_parameters_;
   // Locally used parameter maps indicating if parameters are used locally
   // during the current iteration or no_sync session if no_sync is on. One
@@ -117,19 +142,13 @@ class Reducer {
 
   void finalize_backward();
 
+  // Whether unused parameters are found by traversing the autograd graph and
+  // reduced across processes in the current iteration.
+  bool search_unused_parameters() const;
+
   // Broadcast rebuilt buckets from rank 0 to other ranks before initializing
   // the buckets
   void sync_bucket_indices(std::vector<std::vector<size_t>>& bucket_indices);
-  // Rebuild buckets based on rebuilt_params_ and rebuilt_param_indices_
-  // TODO this function makes broadcast communication call and
-  // could be overlapped with next forward() call, thus
-  // it could be async. Will make it async when rebuilding buckets for
-  // find_unused_parameters = true case, as we could rebuild buckets more than
-  // once for find_unused_parameters = true case, where subgraphs are trained
-  // and parameter indices order may change more frequently.
-  // For find_unused_parameters = false case, buckets are only rebuilt once,
-  // the performance cost is negligible.
-  std::vector<std::vector<size_t>> rebuildBuckets();
 
   using GradCallback =
       torch::distributed::autograd::DistAutogradContext::GradCallback;
@@ -158,6 +177,7 @@ class Reducer {
     // grad.copy_(bucket_views[i]) and
     // bucket_views[i].copy_(grad)
     // provide convenient ways to move grad data in/out of contents.
+    // If gradient_as_bucket_view_ is set, the grads are these views.
     std::vector<at::Tensor> bucket_views;
 
     // Variables that contribute to this bucket replica. Use refcounted value
@@ -676,6 +676,8 @@ void initJITBindings(PyObject* module) {
       .def(py::init<std::string>())
       .def(py::init([](const py::object& buffer) {
         auto writer_func = [=](const void* data, size_t size) {
+          // write_record may be called with the GIL released
+          pybind11::gil_scoped_acquire acquire;
           auto bytes = py::bytes(reinterpret_cast<const char*>(data), size);
           buffer.attr("write")(std::move(bytes));
           return size;
@@ -698,7 +700,10 @@ void initJITBindings(PyObject* module) {
              size_t size) {
             return self.writeRecord(
                 name, reinterpret_cast<const char*>(data), size);
-          });
+          },
+          // Release the GIL while writing raw storage data so that other
+          // threads can stage the next records in the meantime.
+          py::call_guard<pybind11::gil_scoped_release>());
 
   py::enum_<MobileOptimizerType>(m, "MobileOptimizerType")
       .value("CONV_BN_FUSION", MobileOptimizerType::CONV_BN_FUSION)
@@ -791,13 +796,94 @@ void initJITBindings(PyObject* module) {
              const std::string& key,
              size_t numel,
              py::object data_type_obj) {
-            at::DataPtr data(std::get<0>(self.getRecord(key)));
+            at::DataPtr data;
+            size_t record_size;
+            std::tie(data, record_size) = self.getRecord(key);
+            auto scalar_type =
+                reinterpret_cast<THPDtype*>(data_type_obj.ptr())->scalar_type;
+            size_t nbytes = numel * elementSize(scalar_type);
+            TORCH_CHECK(
+                nbytes <= record_size,
+                "record ",
+                key,
+                " has ",
+                record_size,
+                " bytes, but ",
+                nbytes,
+                " were expected");
+
+            c10::Storage storage(
+                c10::Storage::use_byte_size_t(),
+                nbytes,
+                std::move(data),
+                /*allocator=*/nullptr,
+                /*resizable=*/false);
+            auto ptr =
+                c10::make_intrusive<at::TensorImpl, at::UndefinedTensorImpl>(
+                    std::move(storage),
+                    at::DispatchKeySet(),
+                    at::CPU(scalar_type).typeMeta());
+            return at::Tensor(std::move(ptr));
+          })
+      .def(
+          "has_record",
+          [](PyTorchStreamReader& self, const std::string& key) {
+            return self.hasRecord(key);
+          })
+      .def(
+          "get_record_offset",
+          [](PyTorchStreamReader& self, const std::string& key) {
+            return self.getRecordOffset(key);
+          })
+      .def(
+          "get_storage_from_mapped_record",
+          [](PyTorchStreamReader& self,
+             const std::string& key,
+             size_t numel,
+             py::object data_type_obj,
+             const at::Tensor& mapped_file) {
+            // `mapped_file` is a uint8 tensor holding an mmap of the whole
+            // archive. Records written by PyTorchStreamWriter are stored
+            // uncompressed and 64 byte aligned, so the storage can alias the
+            // mapping directly and pages are only faulted in on first access.
+            // Compressed records (e.g., of archives written by other tools)
+            // are read into memory instead.
             auto scalar_type =
                 reinterpret_cast<THPDtype*>(data_type_obj.ptr())->scalar_type;
+            size_t nbytes = numel * elementSize(scalar_type);
+            size_t record_size;
+            bool stored;
+            std::tie(record_size, stored) = self.getRecordStat(key);
+            TORCH_CHECK(
+                nbytes <= record_size,
+                "record ",
+                key,
+                " has ",
+                record_size,
+                " bytes, but ",
+                nbytes,
+                " were expected");
+            at::DataPtr data;
+            if (stored) {
+              size_t offset = self.getRecordOffset(key);
+              TORCH_CHECK(
+                  offset + nbytes <= mapped_file.storage().nbytes(),
+                  "record ",
+                  key,
+                  " is out of bounds of the mapped file");
+              auto base = new c10::Storage(mapped_file.storage());
+              data = at::DataPtr(
+                  static_cast<char*>(base->data()) + offset,
+                  base,
+                  [](void* ctx) { delete static_cast<c10::Storage*>(ctx); },
+                  at::kCPU);
+            } else {
+              data = std::get<0>(self.getRecord(key));
+            }
 
             c10::Storage storage(
                 c10::Storage::use_byte_size_t(),
-                numel * elementSize(scalar_type),
+                nbytes,
                 std::move(data),
                 /*allocator=*/nullptr,
                 /*resizable=*/false);
@@ -927,6 +1013,10 @@ void initJITBindings(PyObject* module) {
           "set_result",
           // Intentionally not releasing GIL
           &PythonFutureWrapper::markCompleted)
+      .def(
+          "_set_unwrap_func",
+          // Intentionally not releasing GIL as this just does an assign
+          &PythonFutureWrapper::setUnwrapFunc)
       .def(
           py::pickle(
               /* __getstate__ */
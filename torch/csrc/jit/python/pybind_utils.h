@@ -144,6 +144,16 @@ struct VISIBILITY_HIDDEN PythonFutureWrapper
     fut->markCompleted(std::move(value));
   }
 
+  // Sets unwrap_func from Python, e.g., to raise the exception a Future was
+  // completed with in Future.set_exception.
+  void setUnwrapFunc(py::function unwrapFunc) {
+    DCHECK(PyGILState_Check());
+    auto pf = std::make_shared<PythonFunctionGuard>(std::move(unwrapFunc));
+    unwrap_func = [pf(std::move(pf))](py::object value) {
+      pf->func_(std::move(value));
+    };
+  }
+
   c10::intrusive_ptr<c10::ivalue::Future> fut;
   // unwrap_func works like a callback for the value returned by
   // PythonFutureWrapper::wait().
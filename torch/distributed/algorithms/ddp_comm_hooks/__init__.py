@@ -0,0 +1,19 @@
+"""
+Communication hooks for :class:`~torch.nn.parallel.DistributedDataParallel`.
+
+A communication hook is registered with
+:meth:`~torch.nn.parallel.DistributedDataParallel.register_comm_hook` and
+replaces the all-reduce of each gradient bucket. It is called as
+``hook(state, bucket)`` with a :class:`~torch.nn.parallel._reducer.GradBucket`
+once all gradients of the bucket are ready, and returns a future, e.g., a
+:class:`torch.futures.Future`, whose value is a list holding one tensor with
+the reduced (averaged) gradients of the bucket, laid out like
+``bucket.get_tensors()[0]``.
+
+The built-in hooks return futures that are backed by the c10d work handles of
+their collectives and are completed when DDP waits for them at the end of the
+backward pass.
+"""
+from .default_hooks import allreduce_hook, fp16_compress_hook
+from .topk_hook import TopKState, topk_hook
+from .powerSGD_hook import PowerSGDState, powerSGD_hook
@@ -0,0 +1,103 @@
+import torch
+import torch.distributed as dist
+
+
+class _WorkFuture(object):
+    r"""
+    A future with the ``wait``, ``then`` and ``done`` methods of
+    :class:`torch.futures.Future`, whose value is computed by ``wait_fn``,
+    e.g., by waiting for c10d works.
+
+    It is completed by the first call to :meth:`wait`, which DDP makes for
+    every bucket, in order, at the end of the backward pass. Callbacks added
+    with :meth:`then` run then as well, on the same thread, so collectives
+    issued by them are issued in the same order on all processes. No thread
+    is needed to complete the future while the backward pass is running.
+    """
+
+    def __init__(self, wait_fn):
+        self._wait_fn = wait_fn
+        self._value = None
+        self._done = False
+
+    def done(self):
+        return self._done
+
+    def wait(self):
+        if not self._done:
+            self._value = self._wait_fn()
+            self._done = True
+            self._wait_fn = None
+        return self._value
+
+    def then(self, callback):
+        def wait_fn():
+            self.wait()
+            return callback(self)
+        return _WorkFuture(wait_fn)
+
+
+def _get_future(works, value):
+    r"""
+    Returns a future that holds ``value`` once all of ``works`` have
+    finished.
+    """
+    def wait_fn():
+        for work in works:
+            work.wait()
+        return value
+
+    return _WorkFuture(wait_fn)
+
+
+def _get_world_size(process_group):
+    # Process groups may also be created without going through
+    # `dist.new_group`, in which case `dist.get_world_size` doesn't know them.
+    return process_group.size() if process_group is not None else dist.get_world_size()
+
+
+def _allreduce_fut(process_group, tensor):
+    group_to_use = process_group if process_group is not None else dist.group.WORLD
+    work = dist.all_reduce(tensor, group=group_to_use, async_op=True)
+    return _get_future([work], [tensor])
+
+
+def allreduce_hook(process_group, bucket):
+    r"""
+    Averages the gradients of the bucket with one all-reduce, like
+    :class:`~torch.nn.parallel.DistributedDataParallel` does without a hook.
+
+    Arguments:
+        process_group: the process group to reduce over, or ``None`` for the
+            default group. This is the ``state`` of the hook.
+        bucket (GradBucket): the bucket to reduce.
+
+    Example::
+        >>> ddp_model.register_comm_hook(process_group, allreduce_hook)
+    """
+    tensor = bucket.get_tensors()[0]
+    tensor.div_(_get_world_size(process_group))
+    return _allreduce_fut(process_group, tensor)
+
+
+def fp16_compress_hook(process_group, bucket):
+    r"""
+    Casts the gradients of the bucket to ``torch.float16``, averages them with
+    one all-reduce and casts the result back, which halves the communicated
+    volume of ``torch.float32`` gradients.
+
+    Arguments:
+        process_group: the process group to reduce over, or ``None`` for the
+            default group. This is the ``state`` of the hook.
+        bucket (GradBucket): the bucket to reduce.
+
+    Example::
+        >>> ddp_model.register_comm_hook(process_group, fp16_compress_hook)
+    """
+    tensor = bucket.get_tensors()[0]
+    compressed_tensor = tensor.to(torch.float16).div_(_get_world_size(process_group))
+
+    def decompress(fut):
+        return [fut.wait()[0].to(tensor.dtype)]
+
+    return _allreduce_fut(process_group, compressed_tensor).then(decompress)
@@ -0,0 +1,152 @@
+import torch
+
+from .default_hooks import _allreduce_fut, _get_world_size
+
+
+def _orthogonalize(matrix, epsilon=1e-8):
+    # Gram-Schmidt orthogonalization of the columns of `matrix`, in-place.
+    num_cols = matrix.shape[1]
+    for i in range(num_cols):
+        col = matrix[:, i:i + 1]
+        col.div_(col.norm().add_(epsilon))
+        if i + 1 < num_cols:
+            rest = matrix[:, i + 1:]
+            rest.sub_(col.mm(col.t().mm(rest)))
+
+
+class PowerSGDState(object):
+    r"""
+    State of :func:`powerSGD_hook`.
+
+    Arguments:
+        process_group: the process group to reduce over, or ``None`` for the
+            default group.
+        matrix_approximation_rank (int): rank of the approximation of the
+            gradient matrices (default: 1).
+        use_error_feedback (bool): whether to add the approximation error to
+            the gradients of the next iteration (default: True).
+        warm_start (bool): whether to start the power iteration of an
+            iteration from the result of the previous one instead of from a
+            random matrix (default: True).
+        random_seed (int): seed of the random initial matrices, which have to
+            be the same on all processes (default: 0).
+    """
+
+    def __init__(self, process_group, matrix_approximation_rank=1, use_error_feedback=True,
+                 warm_start=True, random_seed=0):
+        if matrix_approximation_rank < 1:
+            raise ValueError("Invalid matrix_approximation_rank: {}".format(matrix_approximation_rank))
+        self.process_group = process_group
+        self.matrix_approximation_rank = matrix_approximation_rank
+        self.use_error_feedback = use_error_feedback
+        self.warm_start = warm_start
+        self.rng = torch.Generator()
+        self.rng.manual_seed(random_seed)
+        # bucket index => approximation error of the previous iteration
+        self.error_dict = {}
+        # bucket index => flat buffers of the P and Q matrices
+        self.p_memory_dict = {}
+        self.q_memory_dict = {}
+
+
+def powerSGD_hook(state, bucket):
+    r"""
+    Low-rank gradient compression from `PowerSGD: Practical Low-Rank Gradient
+    Compression for Distributed Optimization`_.
+
+    Every gradient of the bucket with two or more dimensions is viewed as an
+    ``n x m`` matrix ``M`` and approximated by ``P Q^T`` with one step of power
+    iteration: ``P = M Q`` is all-reduced and orthogonalized, then
+    ``Q = M^T P`` is all-reduced, where ``P`` and ``Q`` have
+    ``state.matrix_approximation_rank`` columns. This communicates
+    ``(n + m) * rank`` instead of ``n * m`` elements. The other gradients
+    (e.g., biases) are all-reduced uncompressed.
+
+    Arguments:
+        state (PowerSGDState): the state of the hook.
+        bucket (GradBucket): the bucket to reduce.
+
+    Example::
+        >>> state = PowerSGDState(process_group, matrix_approximation_rank=2)
+        >>> ddp_model.register_comm_hook(state, powerSGD_hook)
+
+    .. _PowerSGD\: Practical Low-Rank Gradient Compression for Distributed Optimization:
+        https://arxiv.org/abs/1905.13727
+    """
+    process_group = state.process_group
+    world_size = _get_world_size(process_group)
+    bucket_index = bucket.get_index()
+    input_tensor = bucket.get_tensors()[0]
+
+    if state.use_error_feedback:
+        if bucket_index in state.error_dict:
+            input_tensor.add_(state.error_dict[bucket_index])
+        input_tensor_cp = input_tensor.clone()
+
+    # The per-parameter tensors are views into `input_tensor`.
+    tensors = bucket.get_per_parameter_tensors()
+    rank_1_tensors = [t for t in tensors if t.dim() <= 1]
+    matrices = [t.view(t.shape[0], -1) for t in tensors if t.dim() > 1]
+    rank = state.matrix_approximation_rank
+
+    # Lay out all P and Q matrices of the bucket in two flat buffers, so that
+    # each is all-reduced at once.
+    p_sizes = [(m.shape[0], min(rank, *m.shape)) for m in matrices]
+    q_sizes = [(m.shape[1], min(rank, *m.shape)) for m in matrices]
+    need_init = not state.warm_start or bucket_index not in state.q_memory_dict
+    if bucket_index not in state.p_memory_dict:
+        state.p_memory_dict[bucket_index] = input_tensor.new_empty(sum(n * r for n, r in p_sizes))
+        state.q_memory_dict[bucket_index] = input_tensor.new_empty(sum(n * r for n, r in q_sizes))
+    p_memory = state.p_memory_dict[bucket_index]
+    q_memory = state.q_memory_dict[bucket_index]
+    ps = [chunk.view(size) for chunk, size in zip(p_memory.split([n * r for n, r in p_sizes]), p_sizes)]
+    qs = [chunk.view(size) for chunk, size in zip(q_memory.split([n * r for n, r in q_sizes]), q_sizes)]
+
+    if need_init:
+        # Same initial Q on all processes, from the shared seed.
+        q_memory.copy_(torch.randn(q_memory.numel(), generator=state.rng))
+        for q in qs:
+            _orthogonalize(q)
+
+    if rank_1_tensors:
+        rank_1_tensor = torch.cat([t.reshape(-1) for t in rank_1_tensors]).div_(world_size)
+        rank_1_fut = _allreduce_fut(process_group, rank_1_tensor)
+
+    def copy_rank_1_result():
+        if rank_1_tensors:
+            rank_1_result = rank_1_fut.wait()[0]
+            for t, chunk in zip(rank_1_tensors, rank_1_result.split([t.numel() for t in rank_1_tensors])):
+                t.copy_(chunk.view_as(t))
+
+    if not matrices:
+        def decompress(fut):
+            copy_rank_1_result()
+            return [input_tensor]
+
+        return rank_1_fut.then(decompress)
+
+    for matrix, q, p in zip(matrices, qs, ps):
+        torch.matmul(matrix, q, out=p)
+
+    def compute_q(fut):
+        # The callback runs when DDP waits for the bucket at the end of the
+        # backward pass, in bucket order on all processes, so the second
+        # all-reduce can be issued and waited for here.
+        fut.wait()
+        for p in ps:
+            _orthogonalize(p)
+        for matrix, q, p in zip(matrices, qs, ps):
+            torch.matmul(matrix.t(), p, out=q)
+        _allreduce_fut(process_group, q_memory).wait()
+
+        for matrix, q, p in zip(matrices, qs, ps):
+            torch.matmul(p, q.t(), out=matrix)
+        for matrix in matrices:
+            matrix.div_(world_size)
+        copy_rank_1_result()
+
+        if state.use_error_feedback:
+            state.error_dict[bucket_index] = input_tensor_cp.sub_(input_tensor)
+        return [input_tensor]
+
+    return _allreduce_fut(process_group, p_memory).then(compute_q)
@@ -0,0 +1,80 @@
+import torch
+import torch.distributed as dist
+
+from .default_hooks import _get_future, _get_world_size
+
+
+class TopKState(object):
+    r"""
+    State of :func:`topk_hook`.
+
+    Arguments:
+        process_group: the process group to reduce over, or ``None`` for the
+            default group.
+        compression_ratio (float): fraction of the elements of each bucket
+            that are communicated (default: 0.01).
+        use_error_feedback (bool): whether to add the part of the gradients
+            that wasn't communicated to the gradients of the next iteration
+            (default: True).
+    """
+
+    def __init__(self, process_group, compression_ratio=0.01, use_error_feedback=True):
+        if not 0.0 < compression_ratio <= 1.0:
+            raise ValueError("Invalid compression_ratio: {}".format(compression_ratio))
+        self.process_group = process_group
+        self.compression_ratio = compression_ratio
+        self.use_error_feedback = use_error_feedback
+        # bucket index => residual of the previous iteration
+        self.error_dict = {}
+
+
+def topk_hook(state, bucket):
+    r"""
+    Sparsifies the gradients of the bucket by only communicating the
+    ``state.compression_ratio`` fraction of its elements with the largest
+    magnitudes. Every process all-gathers the values and indices of the
+    elements selected by the others, and the average is rebuilt as a dense
+    tensor. With ``state.use_error_feedback``, the elements that weren't
+    communicated are accumulated locally and added to the next iteration's
+    gradients.
+
+    Arguments:
+        state (TopKState): the state of the hook.
+        bucket (GradBucket): the bucket to reduce.
+
+    Example::
+        >>> state = TopKState(process_group, compression_ratio=0.01)
+        >>> ddp_model.register_comm_hook(state, topk_hook)
+    """
+    group_to_use = state.process_group if state.process_group is not None else dist.group.WORLD
+    world_size = _get_world_size(state.process_group)
+    tensor = bucket.get_tensors()[0]
+
+    if state.use_error_feedback:
+        bucket_index = bucket.get_index()
+        if bucket_index in state.error_dict:
+            tensor.add_(state.error_dict[bucket_index])
+
+    k = max(1, int(tensor.numel() * state.compression_ratio))
+    _, indices = tensor.abs().topk(k, sorted=False)
+    values = tensor[indices]
+
+    if state.use_error_feedback:
+        error = tensor.clone()
+        error[indices] = 0
+        state.error_dict[bucket_index] = error
+
+    all_indices = [torch.empty_like(indices) for _ in range(world_size)]
+    all_values = [torch.empty_like(values) for _ in range(world_size)]
+    works = [
+        dist.all_gather(all_indices, indices, group=group_to_use, async_op=True),
+        dist.all_gather(all_values, values, group=group_to_use, async_op=True),
+    ]
+
+    def decompress(fut):
+        fut.wait()
+        result = torch.zeros_like(tensor)
+        result.index_add_(0, torch.cat(all_indices), torch.cat(all_values))
+        return [result.div_(world_size)]
+
+    return _get_future(works, None).then(decompress)
@@ -1,32 +1,53 @@
+import torch
 import torch.distributed.rpc as rpc
 import torch.distributed.autograd as dist_autograd
 
 from collections import defaultdict
+from contextlib import ExitStack
 from threading import Lock
+from weakref import WeakValueDictionary
 
 
 class _LocalOptimizer:
-    # Ideally we would only need to share a lock for instances of
-    # _LocalOptimizer that deal with the same parameters. We are
-    # making a simplifying assumption here that if there is more
-    # than one instance of _LocalOptimizer per worker, they will
-    # be optimizing the same parameters (e.g. each data parallel
-    # trainer will create its own instance of _LocalOptimizer but
-    # they will all optimize the same parameters on each worker)
-    global_lock = Lock()
+    # Instances of _LocalOptimizer that deal with the same parameters (e.g.
+    # each data parallel trainer creates its own instance of _LocalOptimizer,
+    # but they all optimize the same parameters on each worker) must not step
+    # concurrently, while instances with disjoint parameters can. Therefore,
+    # every parameter has a lock, shared by all instances that optimize it,
+    # and a step holds the locks of all its parameters. They are acquired in
+    # the order of the parameter ids, so that instances whose parameters only
+    # partially overlap can't deadlock.
+    _param_locks = WeakValueDictionary()  # id(param) -> Lock
+    _param_locks_lock = Lock()
 
     def __init__(self, optim_cls, local_params_rref, *args, **kwargs):
+        self._local_params = [rref.local_value() for rref in local_params_rref]
         self.optim = optim_cls(
-            [rref.local_value() for rref in local_params_rref],
+            self._local_params,
             *args,
             **kwargs)
 
+        # The locks are only kept alive by the instances that use them, which
+        # also keep their parameters (and thereby their ids) alive.
+        with _LocalOptimizer._param_locks_lock:
+            self._locks = []
+            for param_id in sorted({id(param) for param in self._local_params}):
+                lock = _LocalOptimizer._param_locks.get(param_id)
+                if lock is None:
+                    lock = _LocalOptimizer._param_locks[param_id] = Lock()
+                self._locks.append(lock)
+
     def step(self, autograd_ctx_id):
         all_local_grads = dist_autograd.get_gradients(autograd_ctx_id)
 
-        with _LocalOptimizer.global_lock:
-            for param, grad in all_local_grads.items():
-                param.grad = grad
+        with ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            # Only the gradients of our own parameters are set, as other
+            # parameters may be stepped concurrently by other instances.
+            for param in self._local_params:
+                if param in all_local_grads:
+                    param.grad = all_local_grads[param]
             self.optim.step()
 
 
@@ -66,8 +87,10 @@ class DistributedOptimizer:
     Concurrent calls to
     :meth:`~torch.distributed.optim.DistributedOptimizer.step`,
     either from the same or different clients, will
-    be serialized on each worker -- as each worker's optimizer can only work
-    on one set of gradients at a time. However, there is no guarantee that
+    be serialized on each worker for the parameters they have in common -- as
+    a parameter can only be updated with one set of gradients at a time --
+    while optimizers of disjoint parameters step concurrently. However, there
+    is no guarantee that
     the full forward-backward-optimizer sequence will execute for one client
     at a time. This means that the gradients being applied may not correspond
     to the latest forward pass executed on a given worker. Also, there is no
@@ -121,21 +144,33 @@ class DistributedOptimizer:
 
         self.remote_optimizers = _wait_for_all(remote_optim_futs)
 
-    def step(self, context_id):
+    def step(self, context_id, async_op=False):
         """
         Performs a single optimization step.
 
         This will call :meth:`torch.optim.Optimizer.step` on each worker
         containing parameters to be optimized, and will block until all workers
-        return. The provided ``context_id`` will be used to retrieve the
-        corresponding :class:`~torch.distributed.autograd.context` that
-        contains the gradients that should be applied to the parameters.
+        return, unless ``async_op`` is set. The provided ``context_id`` will be
+        used to retrieve the corresponding
+        :class:`~torch.distributed.autograd.context` that contains the
+        gradients that should be applied to the parameters.
 
         Args:
             context_id: the autograd context id for which we should run the
                 optimizer step.
+            async_op (bool, optional): if ``True``, return immediately with a
+                :class:`~torch.futures.Future` that is completed once all
+                workers have finished their step, and whose :meth:`wait`
+                raises if any of them failed. The autograd context must stay
+                alive until then (default: ``False``).
+
+        Returns:
+            A :class:`~torch.futures.Future` if ``async_op`` is set, and
+            ``None`` otherwise.
         """
         dist_autograd._is_valid_context(context_id)
+        # There is a single local optimizer per worker, so this sends one
+        # request to each worker.
         rpc_futs = []
         for optim in self.remote_optimizers:
             rpc_futs.append(rpc.rpc_async(
@@ -143,4 +178,7 @@ class DistributedOptimizer:
                 _local_optimizer_step,
                 args=(optim, context_id),
             ))
+        if async_op:
+            return torch.futures.collect_all(rpc_futs).then(
+                lambda fut: _wait_for_all(fut.wait()))
         _wait_for_all(rpc_futs)
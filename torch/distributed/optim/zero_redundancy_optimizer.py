@@ -0,0 +1,241 @@
+import io
+from itertools import chain
+
+import torch
+import torch.distributed as dist
+from torch.distributed.distributed_c10d import _get_global_rank
+from torch.optim import Optimizer
+from torch.optim._multi_tensor import _flatten, _flat_alias, _group_params, _unflatten
+
+
+def _broadcast_object(obj, src_rank, group=dist.group.WORLD, device=torch.device("cpu")):
+    r"""
+    Broadcasts ``obj`` (on ``src_rank``, a global rank) to all ranks of
+    ``group``, serialized with :func:`torch.save`, and returns it.
+    """
+    if dist.get_rank() == src_rank:
+        buffer = io.BytesIO()
+        torch.save(obj, buffer)
+        data = bytearray(buffer.getbuffer())
+        length_tensor = torch.tensor([len(data)], dtype=torch.long, device=device)
+        data_tensor = torch.tensor(data, dtype=torch.uint8, device=device)
+        dist.broadcast(length_tensor, src=src_rank, group=group)
+        dist.broadcast(data_tensor, src=src_rank, group=group)
+    else:
+        length_tensor = torch.tensor([0], dtype=torch.long, device=device)
+        dist.broadcast(length_tensor, src=src_rank, group=group)
+        data_tensor = torch.empty(int(length_tensor.item()), dtype=torch.uint8, device=device)
+        dist.broadcast(data_tensor, src=src_rank, group=group)
+        buffer = io.BytesIO(data_tensor.cpu().numpy().tobytes())
+        obj = torch.load(buffer, map_location=device)
+    return obj
+
+
+class ZeroRedundancyOptimizer(Optimizer):
+    r"""
+    Wraps an arbitrary :class:`torch.optim.Optimizer` and shards its state
+    across the ranks of a process group, as described in `ZeRO: Memory
+    Optimizations Toward Training Trillion Parameter Models`_.
+
+    Every parameter is assigned to one rank, balancing the number of elements
+    per rank. Each rank only holds the optimizer state of its parameters, and
+    :meth:`step` only updates those, after which the updated parameters are
+    broadcast from their ranks to all the others. This is meant to be used with
+    :class:`~torch.nn.parallel.DistributedDataParallel`, which makes the
+    gradients the same on all ranks.
+
+    The :attr:`param_groups` hold all parameters, so that, e.g.,
+    :meth:`zero_grad` and learning rate schedulers work as usual; options of
+    the param groups are passed to the local optimizer at every step.
+
+    Arguments:
+        params (iterable): an iterable of :class:`torch.Tensor` s or
+            :class:`dict` s, like for any optimizer.
+        optimizer_class (type): the class of the local optimizer.
+        group (ProcessGroup, optional): the process group to shard over, as
+            returned by :func:`torch.distributed.new_group` (default: the
+            default process group).
+        defaults: any further keyword arguments are passed to the local
+            optimizer.
+
+    Example::
+
+        >>> import torch.nn as nn
+        >>> from torch.distributed.optim import ZeroRedundancyOptimizer
+        >>> from torch.nn.parallel import DistributedDataParallel as DDP
+        >>>
+        >>> model = nn.Sequential(*[nn.Linear(2000, 2000).to(rank) for _ in range(20)])
+        >>> ddp = DDP(model, device_ids=[rank])
+        >>> opt = ZeroRedundancyOptimizer(ddp.parameters(), optim.Adam, lr=0.01)
+        >>> ddp(inputs).sum().backward()
+        >>> opt.step()
+
+    .. _ZeRO\: Memory Optimizations Toward Training Trillion Parameter Models:
+        https://arxiv.org/abs/1910.02054
+    """
+
+    def __init__(self, params, optimizer_class, group=None, **defaults):
+        self.group = group if group is not None else dist.group.WORLD
+        self.world_size = dist.get_world_size(self.group)
+        self.rank = dist.get_rank(self.group)
+        # rank => parameters assigned to it, and their number of elements
+        self._params_per_rank = [[] for _ in range(self.world_size)]
+        self._numel_per_rank = [0] * self.world_size
+        self._all_states = []
+        self.optim = None
+
+        # Partitions the parameters through add_param_group
+        super(ZeroRedundancyOptimizer, self).__init__(params, defaults)
+
+        self.optim = optimizer_class([dict(g, params=self._local_params(g)) for g in self.param_groups],
+                                     **defaults)
+        # Make the options of the local optimizer visible in param_groups
+        for group, local_group in zip(self.param_groups, self.optim.param_groups):
+            for name, value in local_group.items():
+                group.setdefault(name, value)
+
+    def _global_rank(self, rank):
+        if self.group is dist.group.WORLD:
+            return rank
+        return _get_global_rank(self.group, rank)
+
+    def _local_params(self, param_group):
+        local_params = set(self._params_per_rank[self.rank])
+        return [p for p in param_group['params'] if p in local_params]
+
+    def add_param_group(self, param_group):
+        r"""Adds a param group and assigns its parameters to ranks.
+
+        Arguments:
+            param_group (dict): Specifies what Tensors should be optimized along with group
+            specific optimization options.
+        """
+        super(ZeroRedundancyOptimizer, self).add_param_group(param_group)
+        for param in self.param_groups[-1]['params']:
+            rank = min(range(self.world_size), key=lambda r: self._numel_per_rank[r])
+            self._params_per_rank[rank].append(param)
+            self._numel_per_rank[rank] += param.numel()
+        if self.optim is not None:
+            self.optim.add_param_group(dict(self.param_groups[-1], params=self._local_params(self.param_groups[-1])))
+
+    @property
+    def state(self):
+        r"""The state of the local optimizer, i.e., of the parameters of this
+        rank."""
+        return self.optim.state if self.optim is not None else {}
+
+    @state.setter
+    def state(self, value):
+        # Optimizer.__init__ assigns it, but the state lives in self.optim.
+        pass
+
+    def step(self, closure=None):
+        r"""Performs a single optimization step on the parameters of this
+        rank, and broadcasts the updated parameters to all ranks.
+
+        Arguments:
+            closure (callable, optional): A closure that reevaluates the model
+                and returns the loss.
+        """
+        for group, local_group in zip(self.param_groups, self.optim.param_groups):
+            for name, value in group.items():
+                if name != 'params':
+                    local_group[name] = value
+
+        if closure is not None:
+            loss = self.optim.step(closure)
+        else:
+            loss = self.optim.step()
+
+        self._broadcast_params()
+        return loss
+
+    @torch.no_grad()
+    def _broadcast_params(self):
+        # One broadcast per rank and device/dtype, on flat buffers
+        handles = []
+        for rank, params in enumerate(self._params_per_rank):
+            for params in _group_params(params):
+                flat = _flatten(params)
+                handles.append((dist.broadcast(flat, src=self._global_rank(rank), group=self.group, async_op=True),
+                                params, flat))
+        for handle, params, flat in handles:
+            handle.wait()
+            if _flat_alias(params) is None:
+                for p, view in zip(params, _unflatten(flat, params)):
+                    p.copy_(view)
+            else:
+                # Received directly into the parameters
+                torch.autograd._increment_version(params)
+
+    def consolidate_state_dict(self, to=0):
+        r"""Gathers the optimizer state of all ranks on rank ``to``, so that
+        :meth:`state_dict` can be called there. Needs to be called on all
+        ranks.
+
+        Arguments:
+            to (int): the rank (within the group) that receives the state
+                (default: 0).
+        """
+        self._all_states = []
+        device = self._params_per_rank[self.rank][0].device if self._params_per_rank[self.rank] \
+            else torch.device('cpu')
+        if dist.get_backend(self.group) == dist.Backend.NCCL:
+            device = torch.device('cuda', torch.cuda.current_device())
+        for rank in range(self.world_size):
+            local_state = self.optim.state_dict() if rank == self.rank else None
+            local_state = _broadcast_object(local_state, self._global_rank(rank), self.group, device)
+            if self.rank == to:
+                self._all_states.append(local_state)
+
+    def _local_index_maps(self):
+        # rank => [global index of the n-th parameter in the local state dict]
+        global_index = {}
+        for p in chain.from_iterable(g['params'] for g in self.param_groups):
+            global_index.setdefault(p, len(global_index))
+        index_maps = []
+        for rank in range(self.world_size):
+            rank_params = set(self._params_per_rank[rank])
+            index_maps.append([global_index[p] for group in self.param_groups
+                               for p in group['params'] if p in rank_params])
+        return index_maps
+
+    def state_dict(self):
+        r"""Returns the state of the optimizer, in the format of the local
+        optimizer class as if it wasn't sharded.
+
+        Can only be called on the rank that :meth:`consolidate_state_dict` was
+        called with.
+        """
+        if len(self._all_states) == 0:
+            raise RuntimeError("Optimizer state has not been consolidated on this rank. "
+                               "Please call `consolidate_state_dict(to)` on all ranks beforehand.")
+        state_dict = super(ZeroRedundancyOptimizer, self).state_dict()
+        state = {}
+        for index_map, local_state_dict in zip(self._local_index_maps(), self._all_states):
+            for local_index, param_state in local_state_dict['state'].items():
+                state[index_map[local_index]] = param_state
+        state_dict['state'] = state
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        r"""Loads a state dict as returned by :meth:`state_dict` (or by a
+        non-sharded optimizer of the same class). Each rank only keeps the
+        state of its parameters.
+
+        Arguments:
+            state_dict (dict): optimizer state.
+        """
+        if len(self.param_groups) != len(state_dict['param_groups']):
+            raise ValueError("loaded state dict has a different number of "
+                             "parameter groups")
+        for group, saved_group in zip(self.param_groups, state_dict['param_groups']):
+            group.update((k, v) for k, v in saved_group.items() if k != 'params')
+
+        index_map = self._local_index_maps()[self.rank]
+        local_index = {global_index: i for i, global_index in enumerate(index_map)}
+        local_state_dict = self.optim.state_dict()
+        local_state_dict['state'] = {local_index[k]: v for k, v in state_dict['state'].items() if k in local_index}
+        for local_group, saved_group in zip(local_state_dict['param_groups'], state_dict['param_groups']):
+            local_group.update((k, v) for k, v in saved_group.items() if k != 'params')
+        self.optim.load_state_dict(local_state_dict)
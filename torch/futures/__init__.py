@@ -84,6 +84,35 @@ class _PyFuture(torch._C.Future):
         """
         super().set_result(result)
 
+    def set_exception(self, result):
+        r"""
+        Set an exception for this ``Future``, which will mark this ``Future`` as
+        completed with an error and trigger all attached callbacks. Calling
+        ``wait()`` on this ``Future`` raises :attr:`result`. Note that a
+        ``Future`` cannot be marked completed twice.
+
+        Arguments:
+            result (BaseException): the exception for this ``Future``.
+
+        Example::
+            >>> import torch
+            >>>
+            >>> fut = torch.futures.Future()
+            >>> fut.set_exception(ValueError("foo"))
+            >>> fut.wait()
+            >>>
+            >>> # Output:
+            >>> # ValueError: foo
+        """
+        assert isinstance(result, BaseException), "{} is of type {}, not an Exception.".format(
+            result, type(result))
+
+        def raise_error(fut_result):
+            raise fut_result
+
+        super()._set_unwrap_func(raise_error)
+        self.set_result(result)
+
 
 def collect_all(futures):
     r"""
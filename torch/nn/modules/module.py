@@ -52,6 +52,9 @@ purposes"""
 _global_backward_hooks = OrderedDict()
 _global_forward_pre_hooks = OrderedDict()
 _global_forward_hooks = OrderedDict()
+# Number of active `torch.autograd.profiler.profile(with_modules=True)`, which
+# record a range around the forward pass of every module.
+_module_range_profilers = 0
 
 
 def register_module_forward_pre_hook(hook: Callable[..., None]) -> RemovableHandle:
@@ -711,6 +714,11 @@ class Module:
                 tracing_state.pop_scope()
         return result
 
+    def _profiled_forward(self, *input, **kwargs):
+        # The range also ends if forward raises an exception
+        with torch.autograd.profiler.record_function("nn.Module: " + type(self).__name__):
+            return self.forward(*input, **kwargs)
+
     def _call_impl(self, *input, **kwargs):
         for hook in itertools.chain(
                 _global_forward_pre_hooks.values(),
@@ -722,6 +730,8 @@ class Module:
                 input = result
         if torch._C._get_tracing_state():
             result = self._slow_forward(*input, **kwargs)
+        elif _module_range_profilers:
+            result = self._profiled_forward(*input, **kwargs)
         else:
             result = self.forward(*input, **kwargs)
         for hook in itertools.chain(
@@ -1310,8 +1320,14 @@ class Module:
             p.requires_grad_(requires_grad)
         return self
 
-    def zero_grad(self) -> None:
-        r"""Sets gradients of all model parameters to zero."""
+    def zero_grad(self, set_to_none: bool = False) -> None:
+        r"""Sets gradients of all model parameters to zero. See similar function
+        under :class:`torch.optim.Optimizer` for more context.
+
+        Arguments:
+            set_to_none (bool): instead of setting to zero, set the grads to None.
+                See :meth:`torch.optim.Optimizer.zero_grad` for details.
+        """
         if getattr(self, '_is_replica', False):
             warnings.warn(
                 "Calling .zero_grad() from a module created with nn.DataParallel() has no effect. "
@@ -1321,8 +1337,16 @@ class Module:
 
         for p in self.parameters():
             if p.grad is not None:
-                p.grad.detach_()
-                p.grad.zero_()
+                if set_to_none:
+                    p.grad = None
+                else:
+                    # Gradients may be views (e.g., into the flat buffers of
+                    # Optimizer.flatten_parameters), which can't be detached in-place
+                    if p.grad.grad_fn is not None:
+                        p.grad.detach_()
+                    else:
+                        p.grad.requires_grad_(False)
+                    p.grad.zero_()
 
     def share_memory(self: T) -> T:
         return self._apply(lambda t: t.share_memory_())
@@ -0,0 +1,251 @@
+import threading
+import weakref
+
+import torch
+import torch.distributed as dist
+from torch.autograd import Variable
+
+
+class GradBucket(object):
+    r"""
+    A bucket of gradients, as passed to the communication hooks of
+    :class:`~torch.nn.parallel.DistributedDataParallel`.
+
+    The gradients of the parameters of the bucket are copied into one flat
+    tensor (see :meth:`get_tensors`) before the hook is called, or already are
+    views into it with ``gradient_as_bucket_view=True``. The hook may modify
+    this tensor in-place.
+    """
+
+    def __init__(self, index, tensor, parameter_indices, views, is_last):
+        self._index = index
+        self._tensor = tensor
+        self._parameter_indices = parameter_indices
+        self._views = views
+        self._is_last = is_last
+
+    def get_index(self):
+        r"""Returns the index of the bucket. Buckets are reduced in the order
+        of their indices, which is the same on all processes."""
+        return self._index
+
+    def get_tensors(self):
+        r"""Returns a list with the flat tensor holding the gradients of the
+        bucket."""
+        return [self._tensor]
+
+    def get_per_parameter_tensors(self):
+        r"""Returns views into the flat tensor of :meth:`get_tensors`, one
+        per parameter of the bucket, with the shapes of the parameters."""
+        return list(self._views)
+
+    def is_the_last_bucket_to_allreduce(self):
+        r"""Returns whether this is the last bucket reduced in an iteration."""
+        return self._is_last
+
+
+def _view_as_parameters(tensor, views):
+    # Splits `tensor` into views with the shapes of `views`.
+    chunks = tensor.split([v.numel() for v in views])
+    return [chunk.view(v.size()) for chunk, v in zip(chunks, views)]
+
+
+class _Reducer(object):
+    r"""
+    Python implementation of the gradient reduction of
+    :class:`~torch.nn.parallel.DistributedDataParallel`, used instead of the
+    C++ ``Reducer`` when a communication hook is registered.
+
+    Like the C++ reducer, it is notified by autograd hooks on the gradient
+    accumulators of the parameters when their gradients are ready, copies the
+    gradients of a bucket into a flat tensor once all of them are ready and
+    starts the reduction of the bucket, here by calling ``hook(state, bucket)``,
+    which returns a future (e.g., a :class:`torch.futures.Future`). Buckets are started in the
+    same order on all processes. At the end of the backward pass, the buckets
+    that still have pending parameters (e.g., unused ones, which contribute a
+    zero gradient) are started as well, and the results of all futures are
+    copied back into the gradients.
+
+    With ``gradient_as_bucket_view=True``, the ``.grad`` fields of the
+    parameters are views into the flat bucket tensors, so gradients are
+    accumulated directly into the buckets and neither copied into them before
+    the hook is called nor out of them afterwards (unless a hook returns a
+    different tensor).
+
+    With ``static_graph=True``, the set of parameters that receive gradients
+    and the order in which their gradients become ready are recorded in the
+    first iteration (and taken from the first process, so that all processes
+    agree). From then on, parameters that were unused are marked ready when
+    the backward pass is prepared, so buckets don't wait for them, and the
+    buckets are rebuilt (with ``bucket_size_limits``) by
+    :meth:`_rebuild_buckets` at the beginning of the next forward pass to
+    follow the recorded order, so that each bucket is started as soon as
+    possible.
+
+    Only supports a single model replica with dense gradients.
+    """
+
+    def __init__(self, parameters, bucket_indices, process_group, hook, state,
+                 gradient_as_bucket_view=False, static_graph=False, bucket_size_limits=None):
+        self.parameters = parameters
+        self.process_group = process_group
+        self.hook = hook
+        self.state = state
+        self.gradient_as_bucket_view = gradient_as_bucket_view
+        self.static_graph = static_graph
+        self.bucket_size_limits = bucket_size_limits
+        # Indices of the parameters in the order in which their gradients
+        # became ready, while recording the first iteration of a static graph.
+        self.ready_order = [] if static_graph else None
+        self.unused_parameters = set()
+        self._build_buckets(bucket_indices)
+
+        self.lock = threading.Lock()
+        self.expect_autograd_hooks = False
+        self.callback_queued = False
+        self.next_bucket = 0
+        self.pending = []
+        self.futures = []
+
+        # The hooks only hold a weak reference to the reducer, so that they
+        # don't keep it alive after the DDP module is gone.
+        self_ref = weakref.ref(self)
+        self.grad_accumulators = []
+        for index, param in enumerate(parameters):
+            grad_accumulator = param.expand_as(param).grad_fn.next_functions[0][0]
+            grad_accumulator.register_hook(_make_autograd_hook(self_ref, index))
+            self.grad_accumulators.append(grad_accumulator)
+
+    def _build_buckets(self, bucket_indices):
+        self.buckets = []
+        self.bucket_of = [None] * len(self.parameters)
+        for bucket_index, indices in enumerate(bucket_indices):
+            params = [self.parameters[i] for i in indices]
+            tensor = torch.zeros(sum(p.numel() for p in params), dtype=params[0].dtype, device=params[0].device)
+            self.buckets.append(GradBucket(bucket_index, tensor, indices, _view_as_parameters(tensor, params),
+                                           bucket_index == len(bucket_indices) - 1))
+            for i in indices:
+                self.bucket_of[i] = bucket_index
+
+        if self.gradient_as_bucket_view:
+            with torch.no_grad():
+                for bucket in self.buckets:
+                    for index, view in zip(bucket._parameter_indices, bucket._views):
+                        param = self.parameters[index]
+                        if param.grad is not None:
+                            view.copy_(param.grad)
+                        param.grad = view
+
+    def prepare_for_backward(self, outputs):
+        # Unlike the C++ reducer, unused parameters don't need to be found by
+        # traversing the graph from `outputs`: buckets that aren't ready at
+        # the end of the backward pass are reduced then.
+        with self.lock:
+            self.expect_autograd_hooks = True
+            self.callback_queued = False
+            self.next_bucket = 0
+            self.pending = [len(b._parameter_indices) for b in self.buckets]
+            self.futures = [None] * len(self.buckets)
+            for index in self.unused_parameters:
+                self.pending[self.bucket_of[index]] -= 1
+
+    def autograd_hook(self, index):
+        with self.lock:
+            if not self.expect_autograd_hooks:
+                return
+            if index in self.unused_parameters:
+                raise RuntimeError(
+                    "Parameter {} received a gradient, but didn't in the first iteration. The set of parameters "
+                    "used by a module with static_graph=True must not change across iterations.".format(index))
+            if self.ready_order is not None:
+                self.ready_order.append(index)
+            if not self.callback_queued:
+                self.callback_queued = True
+                Variable._execution_engine.queue_callback(self.finalize_backward)
+            self.pending[self.bucket_of[index]] -= 1
+            # Buckets are started in order, so that all processes issue the
+            # same sequence of collectives.
+            while self.next_bucket < len(self.buckets) and self.pending[self.next_bucket] == 0:
+                self._start_bucket(self.buckets[self.next_bucket])
+                self.next_bucket += 1
+
+    def _start_bucket(self, bucket):
+        for index, view in zip(bucket._parameter_indices, bucket._views):
+            param = self.parameters[index]
+            if param.grad is None:
+                view.zero_()
+            elif param.grad is not view:
+                view.copy_(param.grad)
+                if self.gradient_as_bucket_view:
+                    # e.g., after zero_grad(set_to_none=True), autograd
+                    # stole the freshly computed gradient
+                    param.grad = view
+        self.futures[bucket.get_index()] = self.hook(self.state, bucket)
+
+    def finalize_backward(self):
+        with self.lock:
+            while self.next_bucket < len(self.buckets):
+                self._start_bucket(self.buckets[self.next_bucket])
+                self.next_bucket += 1
+            self.expect_autograd_hooks = False
+            futures = self.futures
+            self.futures = []
+
+        with torch.no_grad():
+            for bucket, future in zip(self.buckets, futures):
+                result = future.wait()[0]
+                bucket_tensor = bucket.get_tensors()[0]
+                if self.gradient_as_bucket_view:
+                    if result is not bucket_tensor:
+                        bucket_tensor.copy_(result)
+                    for index, view in zip(bucket._parameter_indices, bucket._views):
+                        param = self.parameters[index]
+                        if param.grad is not view:
+                            param.grad = view
+                    continue
+                for index, view in zip(bucket._parameter_indices, _view_as_parameters(result, bucket._views)):
+                    param = self.parameters[index]
+                    if param.grad is None:
+                        param.grad = view.clone()
+                    else:
+                        param.grad.copy_(view)
+
+    def _rebuild_buckets(self):
+        # Called at the beginning of every forward pass, like the C++ reducer.
+        # Rebuilds once, after the first iteration of a static graph.
+        with self.lock:
+            if not self.ready_order or self.expect_autograd_hooks:
+                return False
+            ready_order, self.ready_order = self.ready_order, None
+        num_parameters = len(self.parameters)
+        device = self.parameters[0].device
+
+        # A parameter is used if it received a gradient on any process.
+        used = torch.zeros(num_parameters, dtype=torch.int32, device=device)
+        used[ready_order] = 1
+        self.process_group.allreduce(used).wait()
+        used = used.tolist()
+        self.unused_parameters = {i for i in range(num_parameters) if used[i] == 0}
+
+        # All processes take the ready order of the first one, so that they
+        # build the same buckets. Unused parameters go last.
+        ready = set(ready_order)
+        order = ready_order + [i for i in range(num_parameters) if i not in ready]
+        order_tensor = torch.tensor(order, dtype=torch.long, device=device)
+        self.process_group.broadcast(order_tensor, 0).wait()
+        order = order_tensor.tolist()
+
+        # Buckets of the tensors in ready order are sorted by the first
+        # position (not parameter index) they include.
+        bucket_indices = dist._compute_bucket_assignment_by_size(
+            [self.parameters[i] for i in order], self.bucket_size_limits)
+        self._build_buckets([[order[position] for position in positions] for positions in bucket_indices])
+        return True
+
+
+def _make_autograd_hook(reducer_ref, index):
+    def hook(*unused):
+        reducer = reducer_ref()
+        if reducer is not None:
+            reducer.autograd_hook(index)
+    return hook
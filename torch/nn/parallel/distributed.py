@@ -14,6 +14,7 @@ from ..modules import Module
 from .replicate import replicate
 from .scatter_gather import scatter_kwargs, gather
 from .parallel_apply import parallel_apply
+from ._reducer import _Reducer
 from torch._utils import _get_device_index, _get_all_device_indices
 
 
@@ -248,6 +249,32 @@ class DistributedDataParallel(Module):
                          are getting different gradients, which should not
                          happen if DistributedDataParallel is correctly used.
                          (default: ``False``)
+        gradient_as_bucket_view (bool): when set to ``True``, the ``.grad``
+                         fields of the parameters are views into the flat
+                         buffers that are all-reduced, so gradients are
+                         neither copied into these buffers before the
+                         all-reduce nor copied back afterwards, which saves
+                         the memory of one copy of the gradients. Gradients
+                         that are defined at construction are moved into the
+                         buffers, others (e.g., set to ``None`` by
+                         ``zero_grad(set_to_none=True)``) are moved into them
+                         in the next backward pass. Sparse gradients are not
+                         affected. (default: ``False``)
+        static_graph (bool): when set to ``True``, DDP assumes that the set of
+                         parameters that receive gradients, and the order in
+                         which they do, is the same in every iteration. These
+                         are recorded in the first iteration (on the first
+                         process) and reused from then on: parameters that
+                         were unused are marked ready for reduction without
+                         traversing the autograd graph of the outputs, even
+                         with :attr:`find_unused_parameters`, and the gradient
+                         buckets are rebuilt to follow the order in which
+                         gradients become ready, so that reductions overlap
+                         better with the backward pass. The buckets are
+                         rebuilt at the beginning of the second forward pass.
+                         A parameter that receives a gradient after being
+                         unused in the first iteration raises an error.
+                         (default: ``False``)
 
     Attributes:
         module (Module): the module to be parallelized
@@ -262,7 +289,9 @@ class DistributedDataParallel(Module):
                  process_group=None,
                  bucket_cap_mb=25,
                  find_unused_parameters=False,
-                 check_reduction=False):
+                 check_reduction=False,
+                 gradient_as_bucket_view=False,
+                 static_graph=False):
 
         super(DistributedDataParallel, self).__init__()
 
@@ -309,6 +338,8 @@ class DistributedDataParallel(Module):
         self.module = module
         self.broadcast_buffers = broadcast_buffers
         self.find_unused_parameters = find_unused_parameters
+        self.gradient_as_bucket_view = gradient_as_bucket_view
+        self.static_graph = static_graph
         self.require_backward_grad_sync = True
         self.require_forward_param_sync = True
 
@@ -324,6 +355,9 @@ class DistributedDataParallel(Module):
         # reduction bucket size
         self.bucket_bytes_cap = int(bucket_cap_mb * 1024 * 1024)
 
+        # set by register_comm_hook
+        self._comm_hook = None
+
         # Sync params and buffers
         module_states = list(self.module.state_dict().values())
         if len(module_states) > 0:
@@ -437,13 +471,20 @@ class DistributedDataParallel(Module):
         # Note: reverse list of buckets because we want to approximate the
         # order in which their gradients are produced, and assume they
         # are used in the forward pass in the order they are defined.
+        self._bucket_indices = list(reversed(bucket_indices))
+        self._reducer_parameters = parameters
+        self._expect_sparse_gradient = expect_sparse_gradient
         self.reducer = dist.Reducer(
             parameters,
-            list(reversed(bucket_indices)),
+            self._bucket_indices,
             self.process_group,
             expect_sparse_gradient,
             self.bucket_bytes_cap,
-            self.find_unused_parameters)
+            self.find_unused_parameters,
+            self.gradient_as_bucket_view,
+            self.static_graph)
+        # Number of iterations in which gradients were reduced
+        self.num_iterations = 0
 
         # passing a handle to torch.nn.SyncBatchNorm layer
         self._passing_sync_batchnorm_handle(self._module_copies)
@@ -453,6 +494,8 @@ class DistributedDataParallel(Module):
         attrs = copy.copy(self.__dict__)
         del attrs['process_group']
         del attrs['reducer']
+        # communication hooks and their state aren't serialized
+        attrs['_comm_hook'] = None
         return attrs
 
     def __setstate__(self, state):
@@ -461,6 +504,9 @@ class DistributedDataParallel(Module):
         super(DistributedDataParallel, self).__setstate__(state)
         self.__dict__.setdefault('require_forward_param_sync', True)
         self.__dict__.setdefault('require_backward_grad_sync', True)
+        self.__dict__.setdefault('_comm_hook', None)
+        self.__dict__.setdefault('gradient_as_bucket_view', False)
+        self.__dict__.setdefault('static_graph', False)
         self._ddp_init_helper()
 
     def _check_default_group(self):
@@ -501,7 +547,89 @@ class DistributedDataParallel(Module):
         finally:
             self.require_backward_grad_sync = old_require_backward_grad_sync
 
+    def register_comm_hook(self, state, hook):
+        r"""
+        Registers a communication hook, which replaces the all-reduce of each
+        gradient bucket, e.g., to compress the gradients before they are
+        communicated. See :mod:`torch.distributed.algorithms.ddp_comm_hooks`
+        for built-in hooks.
+
+        The hook is called as ``hook(state, bucket)`` once all gradients of a
+        bucket are ready in the backward pass, where ``bucket`` is a
+        :class:`~torch.nn.parallel._reducer.GradBucket` whose
+        ``get_tensors()[0]`` holds the gradients of the bucket in one flat
+        tensor. It has to return a future, e.g., a
+        :class:`torch.futures.Future`, whose value is a list with one tensor
+        of the same size, holding the averaged gradients of the bucket. At the
+        end of the backward pass, the futures are waited for in bucket order
+        and their values are copied back into the ``.grad`` fields of the
+        parameters. Buckets are passed to the hook in the same order on all
+        processes, and a hook must issue the same collectives on all
+        processes.
+
+        Arguments:
+            state (object): passed to the hook as its first argument, e.g.,
+                the process group or compression state.
+            hook (callable): the hook, with the signature
+                ``hook(state: object, bucket: GradBucket) -> torch.futures.Future``.
+
+        .. warning ::
+            The hook can only be registered once, before the first forward
+            pass, and is only supported for modules that are not replicated
+            over several devices within one process, and without sparse
+            gradients. Hooks aren't preserved when the module is pickled.
+
+        .. note ::
+            The C++ reducer that DDP uses by default has no extension point
+            for hooks, so registering a hook replaces it with a reducer
+            implemented in Python, which honors ``gradient_as_bucket_view``
+            and ``static_graph`` as well. It runs a Python autograd hook under
+            a lock for every parameter, and, without ``static_graph``, only
+            reduces the buckets of parameters that received no gradient at
+            the end of the backward pass (so ``find_unused_parameters`` is not
+            needed, and the outputs are not searched). The hook itself has to
+            offset this per-iteration overhead, e.g., by communicating less.
+
+        Example::
+
+            >>> from torch.distributed.algorithms.ddp_comm_hooks import fp16_compress_hook
+            >>> ddp = torch.nn.parallel.DistributedDataParallel(model, device_ids=[rank])
+            >>> ddp.register_comm_hook(None, fp16_compress_hook)
+        """
+        if not callable(hook):
+            raise TypeError("Communication hook must be callable, but got {}".format(torch.typename(hook)))
+        if self._comm_hook is not None:
+            raise RuntimeError("register_comm_hook can only be called once.")
+        self._check_python_reducer_supported("Registering a communication hook")
+        self._comm_hook = (state, hook)
+        # Replacing the C++ reducer removes its autograd hooks.
+        self.reducer = self._make_python_reducer(hook, state)
+
+    def _make_python_reducer(self, hook, state):
+        return _Reducer(
+            self._reducer_parameters[0],
+            self._bucket_indices,
+            self.process_group,
+            hook,
+            state,
+            gradient_as_bucket_view=self.gradient_as_bucket_view,
+            static_graph=self.static_graph,
+            bucket_size_limits=[dist._DEFAULT_FIRST_BUCKET_BYTES, self.bucket_bytes_cap])
+
+    def _check_python_reducer_supported(self, feature):
+        if len(self._module_copies) > 1:
+            raise RuntimeError("{} is not supported for modules replicated over multiple "
+                               "devices in a single process.".format(feature))
+        if any(self._expect_sparse_gradient[0]):
+            raise RuntimeError("{} is not supported for modules with sparse gradients.".format(feature))
+
     def forward(self, *inputs, **kwargs):
+        if torch.is_grad_enabled():
+            # Buckets follow the order in which gradients were ready in the
+            # first iteration from here on. This communicates, so it is done
+            # here rather than at the end of the first backward pass.
+            self.reducer._rebuild_buckets()
+
         if self.require_forward_param_sync:
             self._sync_params()
 
@@ -517,12 +645,21 @@ class DistributedDataParallel(Module):
 
         if torch.is_grad_enabled() and self.require_backward_grad_sync:
             self.require_forward_param_sync = True
+            self.num_iterations += 1
             # We'll return the output object verbatim since it is a freeform
             # object. We need to find any tensors in this object, though,
             # because we need to figure out which parameters were used during
             # this forward pass, to ensure we short circuit reduction for any
-            # unused parameters. Only if `find_unused_parameters` is set.
-            if self.find_unused_parameters:
+            # unused parameters. Only if `find_unused_parameters` is set, or
+            # in the first iteration with `static_graph`, which records the
+            # unused parameters for later iterations. The Python reducer
+            # doesn't need them, it reduces unused parameters at the end of
+            # the backward pass.
+            if self.static_graph:
+                search_unused_parameters = self.num_iterations == 1
+            else:
+                search_unused_parameters = self.find_unused_parameters
+            if search_unused_parameters and not isinstance(self.reducer, _Reducer):
                 self.reducer.prepare_for_backward(list(_find_tensors(output)))
             else:
                 self.reducer.prepare_for_backward([])
@@ -573,7 +710,12 @@ class DistributedDataParallel(Module):
                         # to zero the grads on all model replicas as well.
                         # This snippet is copied from torch.optim.Optimizer.
                         if param.grad is not None:
-                            param.grad.detach_()
+                            # With gradient_as_bucket_view, grads are views
+                            # into the buckets, which can't be detached in-place
+                            if param.grad.grad_fn is not None:
+                                param.grad.detach_()
+                            else:
+                                param.grad.requires_grad_(False)
                             param.grad.zero_()
 
             # module buffer sync
@@ -1,5 +1,5 @@
 from ..modules import Module
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from .common_types import _devices_t, _device_t
 
 
@@ -13,9 +13,14 @@ class DistributedDataParallel(Module):
     check_reduction: bool = ...
     broadcast_bucket_size: float = ...
     bucket_bytes_cap: float = ...
+    gradient_as_bucket_view: bool = ...
+    static_graph: bool = ...
 
     # TODO type process_group once `distributed` module is stubbed
     def __init__(self, module: Module, device_ids: Optional[_devices_t] = ...,
                  output_device: Optional[_device_t] = ..., dim: int = ...,
                  broadcast_buffers: bool = ..., process_group: Optional[Any] = ..., bucket_cap_mb: float = ...,
-                 check_reduction: bool = ...) -> None: ...
+                 check_reduction: bool = ..., gradient_as_bucket_view: bool = ...,
+                 static_graph: bool = ...) -> None: ...
+
+    def register_comm_hook(self, state: Any, hook: Callable) -> None: ...
@@ -0,0 +1,93 @@
+r"""Helpers for the multi-tensor code paths of the optimizers (``foreach=True``).
+
+A multi-tensor step applies every elementwise operation of the algorithm to the
+parameters (of the same device and dtype) of a param group at once, on a single
+flat tensor, instead of launching a few small kernels per parameter.
+
+Optimizer state used by these code paths lives in flat buffers, and the state
+tensors of each parameter are views into them, so that it doesn't have to be
+copied for every step. State loaded through ``load_state_dict`` is moved into
+a flat buffer once, at the first step. Gradients (and parameters, e.g., for
+weight decay) are concatenated for every step, unless they already lie back to
+back in memory.
+"""
+
+from collections import OrderedDict
+
+import torch
+
+
+def _flat_alias(tensors):
+    r"""Returns a 1-D tensor that aliases all of ``tensors`` if they are
+    contiguous and lie back to back (in this order) in the same storage, and
+    ``None`` otherwise."""
+    first = tensors[0]
+    storage = first.storage()
+    offset = expected_offset = first.storage_offset()
+    for t in tensors:
+        if not t.is_contiguous() or t.dtype != first.dtype or t.device != first.device or \
+                t.storage_offset() != expected_offset or t.storage().data_ptr() != storage.data_ptr():
+            return None
+        expected_offset += t.numel()
+    return torch.empty(0, dtype=first.dtype, device=first.device).set_(
+        storage, offset, (expected_offset - offset,))
+
+
+def _flatten(tensors):
+    r"""Returns the elements of ``tensors`` as one 1-D tensor. This is a view
+    if possible (see :func:`_flat_alias`), and a copy otherwise."""
+    flat = _flat_alias(tensors)
+    if flat is None:
+        flat = torch.cat([t.reshape(-1) for t in tensors])
+    return flat
+
+
+def _unflatten(flat, tensors):
+    r"""Splits ``flat`` into views with the shapes of ``tensors``."""
+    views = flat.split([t.numel() for t in tensors])
+    return [view.view(t.size()) for view, t in zip(views, tensors)]
+
+
+def _group_params(params, key=None):
+    r"""Groups ``params`` by device, dtype and ``key(p)``, keeping their order."""
+    groups = OrderedDict()
+    for p in params:
+        group_key = (p.device, p.dtype) + ((key(p),) if key is not None else ())
+        groups.setdefault(group_key, []).append(p)
+    return list(groups.values())
+
+
+def _init_flat_state(state, params, name, flat):
+    r"""Sets ``state[p][name]`` of ``params`` to views into ``flat``."""
+    for p, view in zip(params, _unflatten(flat, params)):
+        state[p][name] = view
+
+
+def _flat_state(state, params, name):
+    r"""Returns ``state[p][name]`` of ``params`` as one flat tensor that aliases
+    them, after moving them into a new flat buffer if they aren't already laid
+    out that way."""
+    tensors = [state[p][name] for p in params]
+    flat = _flat_alias(tensors)
+    if flat is None:
+        flat = torch.cat([t.reshape(-1) for t in tensors])
+        _init_flat_state(state, params, name, flat)
+    return flat
+
+
+def _update_params(params, update, *flat_args):
+    r"""Calls ``update(p, *args)``, where ``args`` are the slices of ``flat_args``
+    for ``p``, for all ``params``. This is a single call with the flat
+    parameters if they are laid out back to back in memory.
+
+    ``update`` must modify ``p`` in-place. The version counters of ``params``
+    are incremented like for per-parameter updates, so that autograd still
+    detects parameters modified between the forward and the backward pass."""
+    flat_params = _flat_alias(params)
+    if flat_params is not None:
+        update(flat_params, *flat_args)
+        # The alias has a version counter of its own
+        torch.autograd._increment_version(params)
+    else:
+        for p, *args in zip(params, *[_unflatten(flat_arg, params) for flat_arg in flat_args]):
+            update(p, *args)
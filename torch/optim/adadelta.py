@@ -1,6 +1,7 @@
 import torch
 
 from .optimizer import Optimizer
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class Adadelta(Optimizer):
@@ -18,11 +19,14 @@ class Adadelta(Optimizer):
         lr (float, optional): coefficient that scale delta before it is applied
             to the parameters (default: 1.0)
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter (default: False)
 
     __ https://arxiv.org/abs/1212.5701
     """
 
-    def __init__(self, params, lr=1.0, rho=0.9, eps=1e-6, weight_decay=0):
+    def __init__(self, params, lr=1.0, rho=0.9, eps=1e-6, weight_decay=0, foreach=False):
         if not 0.0 <= lr:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if not 0.0 <= rho <= 1.0:
@@ -32,9 +36,14 @@ class Adadelta(Optimizer):
         if not 0.0 <= weight_decay:
             raise ValueError("Invalid weight_decay value: {}".format(weight_decay))
 
-        defaults = dict(lr=lr, rho=rho, eps=eps, weight_decay=weight_decay)
+        defaults = dict(lr=lr, rho=rho, eps=eps, weight_decay=weight_decay, foreach=foreach)
         super(Adadelta, self).__init__(params, defaults)
 
+    def __setstate__(self, state):
+        super(Adadelta, self).__setstate__(state)
+        for group in self.param_groups:
+            group.setdefault('foreach', False)
+
     @torch.no_grad()
     def step(self, closure=None):
         """Performs a single optimization step.
@@ -49,6 +58,9 @@ class Adadelta(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
+                continue
             for p in group['params']:
                 if p.grad is None:
                     continue
@@ -78,3 +90,34 @@ class Adadelta(Optimizer):
                 acc_delta.mul_(rho).addcmul_(delta, delta, value=1 - rho)
 
         return loss
+
+    def _foreach_step(self, group):
+        params = [p for p in group['params'] if p.grad is not None]
+        if any(p.grad.is_sparse for p in params):
+            raise RuntimeError('Adadelta does not support sparse gradients')
+        rho, eps = group['rho'], group['eps']
+
+        for params in _group_params(params, key=lambda p: len(self.state[p]) == 0):
+            grad = _flatten([p.grad for p in params])
+
+            # State initialization
+            if len(self.state[params[0]]) == 0:
+                for p in params:
+                    self.state[p]['step'] = 0
+                _init_flat_state(self.state, params, 'square_avg', torch.zeros_like(grad))
+                _init_flat_state(self.state, params, 'acc_delta', torch.zeros_like(grad))
+
+            square_avg = _flat_state(self.state, params, 'square_avg')
+            acc_delta = _flat_state(self.state, params, 'acc_delta')
+
+            for p in params:
+                self.state[p]['step'] += 1
+
+            if group['weight_decay'] != 0:
+                grad = grad.add(_flatten(params), alpha=group['weight_decay'])
+
+            square_avg.mul_(rho).addcmul_(grad, grad, value=1 - rho)
+            std = square_avg.add(eps).sqrt_()
+            delta = acc_delta.add(eps).sqrt_().div_(std).mul_(grad)
+            _update_params(params, lambda p, delta: p.add_(delta, alpha=-group['lr']), delta)
+            acc_delta.mul_(rho).addcmul_(delta, delta, value=1 - rho)
@@ -1,5 +1,6 @@
 import torch
 from .optimizer import Optimizer
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class Adagrad(Optimizer):
@@ -16,12 +17,17 @@ class Adagrad(Optimizer):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         eps (float, optional): term added to the denominator to improve
             numerical stability (default: 1e-10)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter. Parameters with sparse
+            gradients are still updated one by one (default: False)
 
     .. _Adaptive Subgradient Methods for Online Learning and Stochastic
         Optimization: http://jmlr.org/papers/v12/duchi11a.html
     """
 
-    def __init__(self, params, lr=1e-2, lr_decay=0, weight_decay=0, initial_accumulator_value=0, eps=1e-10):
+    def __init__(self, params, lr=1e-2, lr_decay=0, weight_decay=0, initial_accumulator_value=0, eps=1e-10,
+                 foreach=False):
         if not 0.0 <= lr:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if not 0.0 <= lr_decay:
@@ -34,15 +40,28 @@ class Adagrad(Optimizer):
             raise ValueError("Invalid epsilon value: {}".format(eps))
 
         defaults = dict(lr=lr, lr_decay=lr_decay, eps=eps, weight_decay=weight_decay,
-                        initial_accumulator_value=initial_accumulator_value)
+                        initial_accumulator_value=initial_accumulator_value, foreach=foreach)
         super(Adagrad, self).__init__(params, defaults)
 
         for group in self.param_groups:
+            if group['foreach']:
+                for params in _group_params(group['params']):
+                    for p in params:
+                        self.state[p]['step'] = 0
+                    flat_sum = torch.full((sum(p.numel() for p in params),), group['initial_accumulator_value'],
+                                          dtype=params[0].dtype, device=params[0].device)
+                    _init_flat_state(self.state, params, 'sum', flat_sum)
+                continue
             for p in group['params']:
                 state = self.state[p]
                 state['step'] = 0
                 state['sum'] = torch.full_like(p, initial_accumulator_value, memory_format=torch.preserve_format)
 
+    def __setstate__(self, state):
+        super(Adagrad, self).__setstate__(state)
+        for group in self.param_groups:
+            group.setdefault('foreach', False)
+
     def share_memory(self):
         for group in self.param_groups:
             for p in group['params']:
@@ -63,8 +82,10 @@ class Adagrad(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
             for p in group['params']:
-                if p.grad is None:
+                if p.grad is None or (group['foreach'] and not p.grad.is_sparse):
                     continue
 
                 grad = p.grad
@@ -100,3 +121,25 @@ class Adagrad(Optimizer):
                     p.addcdiv_(grad, std, value=-clr)
 
         return loss
+
+    def _foreach_step(self, group):
+        # Sparse gradients are handled by the per-parameter loop in step()
+        params = [p for p in group['params'] if p.grad is not None and not p.grad.is_sparse]
+
+        # Parameters are updated together if they have the same step count
+        for params in _group_params(params, key=lambda p: self.state[p]['step']):
+            grad = _flatten([p.grad for p in params])
+            state_sum = _flat_state(self.state, params, 'sum')
+
+            step = self.state[params[0]]['step'] + 1
+            for p in params:
+                self.state[p]['step'] = step
+
+            if group['weight_decay'] != 0:
+                grad = grad.add(_flatten(params), alpha=group['weight_decay'])
+
+            clr = group['lr'] / (1 + (step - 1) * group['lr_decay'])
+
+            state_sum.addcmul_(grad, grad, value=1)
+            std = state_sum.sqrt().add_(group['eps'])
+            _update_params(params, lambda p, grad, std: p.addcdiv_(grad, std, value=-clr), grad, std)
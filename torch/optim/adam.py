@@ -1,6 +1,7 @@
 import math
 import torch
 from .optimizer import Optimizer
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class Adam(Optimizer):
@@ -20,6 +21,9 @@ class Adam(Optimizer):
         amsgrad (boolean, optional): whether to use the AMSGrad variant of this
             algorithm from the paper `On the Convergence of Adam and Beyond`_
             (default: False)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter (default: False)
 
     .. _Adam\: A Method for Stochastic Optimization:
         https://arxiv.org/abs/1412.6980
@@ -28,7 +32,7 @@ class Adam(Optimizer):
     """
 
     def __init__(self, params, lr=1e-3, betas=(0.9, 0.999), eps=1e-8,
-                 weight_decay=0, amsgrad=False):
+                 weight_decay=0, amsgrad=False, foreach=False):
         if not 0.0 <= lr:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if not 0.0 <= eps:
@@ -40,13 +44,14 @@ class Adam(Optimizer):
         if not 0.0 <= weight_decay:
             raise ValueError("Invalid weight_decay value: {}".format(weight_decay))
         defaults = dict(lr=lr, betas=betas, eps=eps,
-                        weight_decay=weight_decay, amsgrad=amsgrad)
+                        weight_decay=weight_decay, amsgrad=amsgrad, foreach=foreach)
         super(Adam, self).__init__(params, defaults)
 
     def __setstate__(self, state):
         super(Adam, self).__setstate__(state)
         for group in self.param_groups:
             group.setdefault('amsgrad', False)
+            group.setdefault('foreach', False)
 
     @torch.no_grad()
     def step(self, closure=None):
@@ -62,6 +67,9 @@ class Adam(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
+                continue
             for p in group['params']:
                 if p.grad is None:
                     continue
@@ -111,3 +119,49 @@ class Adam(Optimizer):
                 p.addcdiv_(exp_avg, denom, value=-step_size)
 
         return loss
+
+    def _foreach_step(self, group):
+        params = [p for p in group['params'] if p.grad is not None]
+        if any(p.grad.is_sparse for p in params):
+            raise RuntimeError('Adam does not support sparse gradients, please consider SparseAdam instead')
+        amsgrad = group['amsgrad']
+        beta1, beta2 = group['betas']
+
+        # Parameters are updated together if they have the same step count
+        for params in _group_params(params, key=lambda p: self.state[p].get('step', 0)):
+            grad = _flatten([p.grad for p in params])
+
+            # State initialization
+            if len(self.state[params[0]]) == 0:
+                for p in params:
+                    self.state[p]['step'] = 0
+                _init_flat_state(self.state, params, 'exp_avg', torch.zeros_like(grad))
+                _init_flat_state(self.state, params, 'exp_avg_sq', torch.zeros_like(grad))
+                if amsgrad:
+                    _init_flat_state(self.state, params, 'max_exp_avg_sq', torch.zeros_like(grad))
+
+            exp_avg = _flat_state(self.state, params, 'exp_avg')
+            exp_avg_sq = _flat_state(self.state, params, 'exp_avg_sq')
+
+            step = self.state[params[0]]['step'] + 1
+            for p in params:
+                self.state[p]['step'] = step
+            bias_correction1 = 1 - beta1 ** step
+            bias_correction2 = 1 - beta2 ** step
+
+            if group['weight_decay'] != 0:
+                grad = grad.add(_flatten(params), alpha=group['weight_decay'])
+
+            exp_avg.mul_(beta1).add_(grad, alpha=1 - beta1)
+            exp_avg_sq.mul_(beta2).addcmul_(grad, grad, value=1 - beta2)
+            if amsgrad:
+                max_exp_avg_sq = _flat_state(self.state, params, 'max_exp_avg_sq')
+                torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
+                denom = (max_exp_avg_sq.sqrt() / math.sqrt(bias_correction2)).add_(group['eps'])
+            else:
+                denom = (exp_avg_sq.sqrt() / math.sqrt(bias_correction2)).add_(group['eps'])
+
+            step_size = group['lr'] / bias_correction1
+
+            _update_params(params, lambda p, exp_avg, denom: p.addcdiv_(exp_avg, denom, value=-step_size),
+                           exp_avg, denom)
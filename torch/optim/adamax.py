@@ -1,5 +1,6 @@
 import torch
 from .optimizer import Optimizer
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class Adamax(Optimizer):
@@ -16,12 +17,15 @@ class Adamax(Optimizer):
         eps (float, optional): term added to the denominator to improve
             numerical stability (default: 1e-8)
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter (default: False)
 
     __ https://arxiv.org/abs/1412.6980
     """
 
     def __init__(self, params, lr=2e-3, betas=(0.9, 0.999), eps=1e-8,
-                 weight_decay=0):
+                 weight_decay=0, foreach=False):
         if not 0.0 <= lr:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if not 0.0 <= eps:
@@ -33,9 +37,14 @@ class Adamax(Optimizer):
         if not 0.0 <= weight_decay:
             raise ValueError("Invalid weight_decay value: {}".format(weight_decay))
 
-        defaults = dict(lr=lr, betas=betas, eps=eps, weight_decay=weight_decay)
+        defaults = dict(lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, foreach=foreach)
         super(Adamax, self).__init__(params, defaults)
 
+    def __setstate__(self, state):
+        super(Adamax, self).__setstate__(state)
+        for group in self.param_groups:
+            group.setdefault('foreach', False)
+
     @torch.no_grad()
     def step(self, closure=None):
         """Performs a single optimization step.
@@ -50,6 +59,9 @@ class Adamax(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
+                continue
             for p in group['params']:
                 if p.grad is None:
                     continue
@@ -88,3 +100,46 @@ class Adamax(Optimizer):
                 p.addcdiv_(exp_avg, exp_inf, value=-clr)
 
         return loss
+
+    def _foreach_step(self, group):
+        params = [p for p in group['params'] if p.grad is not None]
+        if any(p.grad.is_sparse for p in params):
+            raise RuntimeError('Adamax does not support sparse gradients')
+        beta1, beta2 = group['betas']
+        eps = group['eps']
+
+        # Parameters are updated together if they have the same step count
+        for params in _group_params(params, key=lambda p: self.state[p].get('step', 0)):
+            grad = _flatten([p.grad for p in params])
+
+            # State initialization
+            if len(self.state[params[0]]) == 0:
+                for p in params:
+                    self.state[p]['step'] = 0
+                _init_flat_state(self.state, params, 'exp_avg', torch.zeros_like(grad))
+                _init_flat_state(self.state, params, 'exp_inf', torch.zeros_like(grad))
+
+            exp_avg = _flat_state(self.state, params, 'exp_avg')
+            exp_inf = _flat_state(self.state, params, 'exp_inf')
+
+            step = self.state[params[0]]['step'] + 1
+            for p in params:
+                self.state[p]['step'] = step
+
+            if group['weight_decay'] != 0:
+                grad = grad.add(_flatten(params), alpha=group['weight_decay'])
+
+            # Update biased first moment estimate.
+            exp_avg.mul_(beta1).add_(grad, alpha=1 - beta1)
+            # Update the exponentially weighted infinity norm.
+            norm_buf = torch.cat([
+                exp_inf.mul_(beta2).unsqueeze(0),
+                grad.abs().add_(eps).unsqueeze_(0)
+            ], 0)
+            torch.max(norm_buf, 0, keepdim=False, out=(exp_inf, exp_inf.new().long()))
+
+            bias_correction = 1 - beta1 ** step
+            clr = group['lr'] / bias_correction
+
+            _update_params(params, lambda p, exp_avg, exp_inf: p.addcdiv_(exp_avg, exp_inf, value=-clr),
+                           exp_avg, exp_inf)
@@ -5,6 +5,8 @@ import torch
 from copy import deepcopy
 from itertools import chain
 
+from ._multi_tensor import _flatten, _unflatten, _flat_alias, _group_params, _flat_state
+
 
 class _RequiredParameter(object):
     """Singleton class representing a required parameter for an Optimizer."""
@@ -40,6 +42,9 @@ class Optimizer(object):
 
         self.state = defaultdict(dict)
         self.param_groups = []
+        # Set by flatten_parameters()
+        self._flat_grads = []
+        self._grad_views = {}
 
         param_groups = list(params)
         if len(param_groups) == 0:
@@ -59,6 +64,8 @@ class Optimizer(object):
 
     def __setstate__(self, state):
         self.__dict__.update(state)
+        self.__dict__.setdefault('_flat_grads', [])
+        self.__dict__.setdefault('_grad_views', {})
 
     def __repr__(self):
         format_string = self.__class__.__name__ + ' ('
@@ -162,14 +169,96 @@ class Optimizer(object):
         param_groups = [
             update_group(g, ng) for g, ng in zip(groups, saved_groups)]
         self.__setstate__({'state': state, 'param_groups': param_groups})
+        if self._flat_grads:
+            self.flatten_parameters()
+
+    def flatten_parameters(self):
+        r"""Moves the parameters of every param group, their gradients and
+        their optimizer state into flat buffers, one per group, device and dtype,
+        and makes them views into these buffers.
+
+        Afterwards, :meth:`zero_grad` zeroes each gradient buffer with a single
+        operation, and optimizers constructed with ``foreach=True`` update all
+        parameters of a buffer at once. Gradients are allocated for all
+        parameters, so parameters that don't receive a gradient in the backward
+        pass are updated with a zero gradient, like after :meth:`zero_grad`.
+
+        This should be called after the parameters are moved to their final
+        device, and again after :meth:`add_param_group`.
+
+        Returns:
+            the list of flat gradient buffers, e.g., to all-reduce or clip the
+            gradients with one operation per buffer.
+        """
+        self._flat_grads = []
+        self._grad_views = {}
+        with torch.no_grad():
+            for group in self.param_groups:
+                params = [p for p in group['params'] if p.layout == torch.strided]
+                for params in _group_params(params):
+                    # Parameters that already are views into a flat buffer
+                    # (e.g., on a second call) are kept as they are
+                    flat_param = _flat_alias(params)
+                    if flat_param is None:
+                        flat_param = _flatten(params)
+                        for p, view in zip(params, _unflatten(flat_param, params)):
+                            p.data = view
+
+                    grads = [p.grad for p in params]
+                    flat_grad = None
+                    if all(g is not None and g.layout == torch.strided for g in grads):
+                        flat_grad = _flat_alias(grads)
+                    if flat_grad is None:
+                        flat_grad = torch.zeros_like(flat_param)
+                        for p, view in zip(params, _unflatten(flat_grad, params)):
+                            if p.grad is not None:
+                                view.copy_(p.grad)
+                            p.grad = view
+                    self._flat_grads.append(flat_grad)
+                    self._grad_views.update(zip(params, (p.grad for p in params)))
+
+                    states = [self.state.get(p, {}) for p in params]
+                    for name in set(chain.from_iterable(states)):
+                        if all(isinstance(state.get(name), torch.Tensor) and state[name].size() == p.size()
+                               for p, state in zip(params, states)):
+                            _flat_state(self.state, params, name)
+        return list(self._flat_grads)
+
+    def zero_grad(self, set_to_none=False):
+        r"""Sets the gradients of all optimized :class:`torch.Tensor` s to zero.
 
-    def zero_grad(self):
-        r"""Clears the gradients of all optimized :class:`torch.Tensor` s."""
+        Arguments:
+            set_to_none (bool): instead of setting to zero, set the grads to None.
+                This will in general have lower memory footprint, and can modestly improve performance.
+                However, it changes certain behaviors. For example:
+                1. When the user tries to access a gradient and perform manual ops on it,
+                a None attribute or a Tensor full of 0s will behave differently.
+                2. If the user requests ``zero_grad(set_to_none=True)`` followed by a backward pass, ``.grad``\ s
+                are guaranteed to be None for params that did not receive a gradient.
+                3. ``torch.optim`` optimizers have a different behavior if the gradient is 0 or None
+                (in one case it does the step with a gradient of 0 and in the other it skips
+                the step altogether).
+                Gradients that live in the flat buffers of :meth:`flatten_parameters`
+                are always zeroed, with a single operation per buffer.
+        """
+        for flat_grad in self._flat_grads:
+            flat_grad.zero_()
         for group in self.param_groups:
             for p in group['params']:
-                if p.grad is not None:
-                    p.grad.detach_()
-                    p.grad.zero_()
+                grad_view = self._grad_views.get(p)
+                if grad_view is not None:
+                    # Already zeroed above, make sure it is still the gradient
+                    if p.grad is not grad_view:
+                        p.grad = grad_view
+                elif p.grad is not None:
+                    if set_to_none:
+                        p.grad = None
+                    else:
+                        if p.grad.grad_fn is not None:
+                            p.grad.detach_()
+                        else:
+                            p.grad.requires_grad_(False)
+                        p.grad.zero_()
 
     def step(self, closure):
         r"""Performs a single optimization step (parameter update).
@@ -13,6 +13,7 @@ class Optimizer:
     def __setstate__(self, statue: dict) -> None: ...
     def state_dict(self) -> dict: ...
     def load_state_dict(self, state_dict: dict) -> None: ...
-    def zero_grad(self) -> None: ...
+    def flatten_parameters(self) -> List[Tensor]: ...
+    def zero_grad(self, set_to_none: bool=...) -> None: ...
     def step(self, closure: Optional[Callable[[], float]]=...) -> Optional[float]: ...
     def add_param_group(self, param_group: dict) -> None: ...
@@ -1,5 +1,6 @@
 import torch
 from .optimizer import Optimizer
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class RMSprop(Optimizer):
@@ -28,10 +29,14 @@ class RMSprop(Optimizer):
         centered (bool, optional) : if ``True``, compute the centered RMSProp,
             the gradient is normalized by an estimation of its variance
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter (default: False)
 
     """
 
-    def __init__(self, params, lr=1e-2, alpha=0.99, eps=1e-8, weight_decay=0, momentum=0, centered=False):
+    def __init__(self, params, lr=1e-2, alpha=0.99, eps=1e-8, weight_decay=0, momentum=0, centered=False,
+                 foreach=False):
         if not 0.0 <= lr:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if not 0.0 <= eps:
@@ -43,12 +48,14 @@ class RMSprop(Optimizer):
         if not 0.0 <= alpha:
             raise ValueError("Invalid alpha value: {}".format(alpha))
 
-        defaults = dict(lr=lr, momentum=momentum, alpha=alpha, eps=eps, centered=centered, weight_decay=weight_decay)
+        defaults = dict(lr=lr, momentum=momentum, alpha=alpha, eps=eps, centered=centered, weight_decay=weight_decay,
+                        foreach=foreach)
         super(RMSprop, self).__init__(params, defaults)
 
     def __setstate__(self, state):
         super(RMSprop, self).__setstate__(state)
         for group in self.param_groups:
+            group.setdefault('foreach', False)
             group.setdefault('momentum', 0)
             group.setdefault('centered', False)
 
@@ -66,6 +73,9 @@ class RMSprop(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
+                continue
             for p in group['params']:
                 if p.grad is None:
                     continue
@@ -108,3 +118,46 @@ class RMSprop(Optimizer):
                     p.addcdiv_(grad, avg, value=-group['lr'])
 
         return loss
+
+    def _foreach_step(self, group):
+        params = [p for p in group['params'] if p.grad is not None]
+        if any(p.grad.is_sparse for p in params):
+            raise RuntimeError('RMSprop does not support sparse gradients')
+        alpha = group['alpha']
+
+        for params in _group_params(params, key=lambda p: len(self.state[p]) == 0):
+            grad = _flatten([p.grad for p in params])
+
+            # State initialization
+            if len(self.state[params[0]]) == 0:
+                for p in params:
+                    self.state[p]['step'] = 0
+                _init_flat_state(self.state, params, 'square_avg', torch.zeros_like(grad))
+                if group['momentum'] > 0:
+                    _init_flat_state(self.state, params, 'momentum_buffer', torch.zeros_like(grad))
+                if group['centered']:
+                    _init_flat_state(self.state, params, 'grad_avg', torch.zeros_like(grad))
+
+            square_avg = _flat_state(self.state, params, 'square_avg')
+
+            for p in params:
+                self.state[p]['step'] += 1
+
+            if group['weight_decay'] != 0:
+                grad = grad.add(_flatten(params), alpha=group['weight_decay'])
+
+            square_avg.mul_(alpha).addcmul_(grad, grad, value=1 - alpha)
+
+            if group['centered']:
+                grad_avg = _flat_state(self.state, params, 'grad_avg')
+                grad_avg.mul_(alpha).add_(grad, alpha=1 - alpha)
+                avg = square_avg.addcmul(grad_avg, grad_avg, value=-1).sqrt_().add_(group['eps'])
+            else:
+                avg = square_avg.sqrt().add_(group['eps'])
+
+            if group['momentum'] > 0:
+                buf = _flat_state(self.state, params, 'momentum_buffer')
+                buf.mul_(group['momentum']).addcdiv_(grad, avg)
+                _update_params(params, lambda p, buf: p.add_(buf, alpha=-group['lr']), buf)
+            else:
+                _update_params(params, lambda p, grad, avg: p.addcdiv_(grad, avg, value=-group['lr']), grad, avg)
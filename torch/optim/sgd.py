@@ -1,5 +1,6 @@
 import torch
 from .optimizer import Optimizer, required
+from ._multi_tensor import _flatten, _group_params, _init_flat_state, _flat_state, _update_params
 
 
 class SGD(Optimizer):
@@ -16,6 +17,9 @@ class SGD(Optimizer):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         dampening (float, optional): dampening for momentum (default: 0)
         nesterov (bool, optional): enables Nesterov momentum (default: False)
+        foreach (bool, optional): whether to use the multi-tensor implementation,
+            which applies each step of the update to all parameters of a group
+            at once instead of parameter by parameter (default: False)
 
     Example:
         >>> optimizer = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
@@ -53,7 +57,7 @@ class SGD(Optimizer):
     """
 
     def __init__(self, params, lr=required, momentum=0, dampening=0,
-                 weight_decay=0, nesterov=False):
+                 weight_decay=0, nesterov=False, foreach=False):
         if lr is not required and lr < 0.0:
             raise ValueError("Invalid learning rate: {}".format(lr))
         if momentum < 0.0:
@@ -62,7 +66,7 @@ class SGD(Optimizer):
             raise ValueError("Invalid weight_decay value: {}".format(weight_decay))
 
         defaults = dict(lr=lr, momentum=momentum, dampening=dampening,
-                        weight_decay=weight_decay, nesterov=nesterov)
+                        weight_decay=weight_decay, nesterov=nesterov, foreach=foreach)
         if nesterov and (momentum <= 0 or dampening != 0):
             raise ValueError("Nesterov momentum requires a momentum and zero dampening")
         super(SGD, self).__init__(params, defaults)
@@ -71,6 +75,7 @@ class SGD(Optimizer):
         super(SGD, self).__setstate__(state)
         for group in self.param_groups:
             group.setdefault('nesterov', False)
+            group.setdefault('foreach', False)
 
     @torch.no_grad()
     def step(self, closure=None):
@@ -86,13 +91,15 @@ class SGD(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
+            if group['foreach']:
+                self._foreach_step(group)
             weight_decay = group['weight_decay']
             momentum = group['momentum']
             dampening = group['dampening']
             nesterov = group['nesterov']
 
             for p in group['params']:
-                if p.grad is None:
+                if p.grad is None or (group['foreach'] and not p.grad.is_sparse):
                     continue
                 d_p = p.grad
                 if weight_decay != 0:
@@ -112,3 +119,29 @@ class SGD(Optimizer):
                 p.add_(d_p, alpha=-group['lr'])
 
         return loss
+
+    def _foreach_step(self, group):
+        weight_decay = group['weight_decay']
+        momentum = group['momentum']
+        dampening = group['dampening']
+        nesterov = group['nesterov']
+
+        # Sparse gradients are handled by the per-parameter loop in step()
+        params = [p for p in group['params'] if p.grad is not None and not p.grad.is_sparse]
+        for params in _group_params(params, key=lambda p: 'momentum_buffer' in self.state[p]):
+            d_p = _flatten([p.grad for p in params])
+            if weight_decay != 0:
+                d_p = d_p.add(_flatten(params), alpha=weight_decay)
+            if momentum != 0:
+                if 'momentum_buffer' not in self.state[params[0]]:
+                    buf = torch.clone(d_p).detach()
+                    _init_flat_state(self.state, params, 'momentum_buffer', buf)
+                else:
+                    buf = _flat_state(self.state, params, 'momentum_buffer')
+                    buf.mul_(momentum).add_(d_p, alpha=1 - dampening)
+                if nesterov:
+                    d_p = d_p.add(buf, alpha=momentum)
+                else:
+                    d_p = buf
+
+            _update_params(params, lambda p, d_p: p.add_(d_p, alpha=-group['lr']), d_p)
@@ -1,4 +1,8 @@
+import collections
+import ctypes
 import difflib
+import hashlib
+import json
 import os
 import io
 import shutil
@@ -7,7 +11,9 @@ import sys
 import torch
 import tarfile
 import tempfile
+import threading
 import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import closing, contextmanager
 from ._utils import _import_dotted_name
 from ._six import string_classes as _string_classes
@@ -28,6 +34,17 @@ MAGIC_NUMBER = 0x1950a86a20f9469cfc6c
 PROTOCOL_VERSION = 1001
 STORAGE_KEY_SEPARATOR = ','
 
+# Upper bound on the number of bytes of device storages that torch.save copies
+# to host memory ahead of the record currently being written.
+_SAVE_STAGING_BYTES = 256 * 1024 * 1024
+# Number of threads used to copy device storages to host memory while saving.
+_SAVE_STAGING_THREADS = 4
+
+DELTA_RECORD = 'delta.json'
+
+SHARDED_FORMAT_VERSION = 1
+SHARDED_INDEX_FILE = 'index.json'
+
 class SourceChangeWarning(Warning):
     pass
 
@@ -244,6 +261,9 @@ class _open_zipfile_reader(_opener):
 
 class _open_zipfile_writer_file(_opener):
     def __init__(self, name) -> None:
+        # Open the file in Python first, so that e.g. a missing directory
+        # raises the usual OSError rather than a RuntimeError from the writer.
+        open(name, 'wb').close()
         super(_open_zipfile_writer_file, self).__init__(torch._C.PyTorchFileWriter(str(name)))
 
     def __exit__(self, *args) -> None:
@@ -366,6 +386,13 @@ def save(obj, f: Union[str, os.PathLike, BinaryIO],
     """
     _check_dill_version(pickle_module)
 
+    if _use_new_zipfile_serialization and _is_path(f):
+        # Let the zipfile writer stream records straight to the file instead
+        # of routing every record through a Python file object.
+        with _open_zipfile_writer(f) as opened_zipfile:
+            _save(obj, opened_zipfile, pickle_module, pickle_protocol)
+            return
+
     with _open_file_like(f, 'wb') as opened_file:
         if _use_new_zipfile_serialization:
             with _open_zipfile_writer(opened_file) as opened_zipfile:
@@ -374,6 +401,190 @@ def save(obj, f: Union[str, os.PathLike, BinaryIO],
         _legacy_save(obj, opened_file, pickle_module, pickle_protocol)
 
 
+def save_async(obj, f: Union[str, os.PathLike, BinaryIO],
+               pickle_module=pickle, pickle_protocol=DEFAULT_PROTOCOL) -> 'torch.futures.Future':
+    """Saves an object to a disk file in a background thread.
+
+    Before returning, this pickles :attr:`obj` and takes a snapshot of all
+    the storages it references: CPU storages are cloned and CUDA storages
+    are copied into pinned host memory. :attr:`obj` can therefore be
+    modified (e.g. by the next optimizer step) as soon as this function
+    returns, while the snapshot is written to :attr:`f` by a background
+    thread. The file is written in the same format as :func:`torch.save`.
+
+    Args:
+        obj: saved object
+        f: a file-like object (has to implement write and flush) or a string or
+           os.PathLike object containing a file name. A file-like object must
+           not be used until the returned future is completed.
+        pickle_module: module used for pickling metadata and objects
+        pickle_protocol: can be specified to override the default protocol
+
+    Returns:
+        A :class:`torch.futures.Future` that is completed with ``None`` once
+        the file has been written. If writing fails, ``wait()`` on the future
+        raises the same exception as :func:`torch.save` would.
+
+    Example:
+        >>> fut = torch.save_async(model.state_dict(), 'checkpoint.pt')
+        >>> # keep training while the checkpoint is written
+        >>> fut.wait()
+    """
+    _check_dill_version(pickle_module)
+
+    data_value, serialized_storages = _pickle_zipfile_data(obj, pickle_module, pickle_protocol)
+    snapshots = {key: _snapshot_storage(storage) for key, storage in serialized_storages.items()}
+
+    write_fut = torch.futures.Future()
+
+    def write():
+        try:
+            if _is_path(f):
+                with _open_zipfile_writer(f) as opened_zipfile:
+                    _write_zipfile_records(opened_zipfile, data_value, snapshots)
+            else:
+                with _open_file_like(f, 'wb') as opened_file:
+                    with _open_zipfile_writer(opened_file) as opened_zipfile:
+                        _write_zipfile_records(opened_zipfile, data_value, snapshots)
+        except Exception as e:
+            write_fut.set_exception(e)
+        else:
+            write_fut.set_result(None)
+
+    threading.Thread(target=write, name='torch.serialization.save_async').start()
+    return write_fut
+
+
+def save_delta(obj, f: Union[str, os.PathLike], base: Optional[Union[str, os.PathLike]],
+               pickle_module=pickle, pickle_protocol=DEFAULT_PROTOCOL) -> None:
+    """Saves an object to a disk file, only writing the storages that differ
+    from those in the checkpoint :attr:`base`.
+
+    Every storage is hashed, and storages whose contents are already present
+    in :attr:`base` are stored as references to the record in :attr:`base`
+    instead of being written again. :func:`torch.load` resolves these
+    references transparently, so :attr:`base` (and the checkpoints it refers
+    to in turn) has to stay at the same location relative to :attr:`f`.
+
+    Checkpoints written by this function also store the hashes of all their
+    storages, which makes them cheap to use as :attr:`base` of the next delta
+    checkpoint. Any other zipfile checkpoint can be used as :attr:`base`
+    too, but then its records have to be read to be hashed.
+
+    Args:
+        obj: saved object
+        f: a string or os.PathLike object containing a file name
+        base: a string or os.PathLike object containing the file name of the
+            checkpoint to compute the delta against. If ``None``, all storages
+            are written.
+        pickle_module: module used for pickling metadata and objects
+        pickle_protocol: can be specified to override the default protocol
+
+    Example:
+        >>> torch.serialization.save_delta(model.state_dict(), 'step0.pt', None)
+        >>> # ... train the unfrozen parameters ...
+        >>> torch.serialization.save_delta(model.state_dict(), 'step1.pt', base='step0.pt')
+        >>> model.load_state_dict(torch.load('step1.pt'))
+    """
+    _check_dill_version(pickle_module)
+    if not _is_path(f) or (base is not None and not _is_path(base)):
+        raise ValueError("save_delta: f and base have to be file names")
+
+    # Maps the hash of each storage in `base` to its record key
+    base_keys = {}
+    if base is not None:
+        with _open_zipfile_reader(str(base)) as base_zipfile:
+            delta_info = _read_delta_info(base_zipfile)
+            if delta_info is not None:
+                base_hashes = delta_info['hashes']
+            else:
+                base_hashes = _hash_records(base_zipfile)
+        base_keys = {h: key for key, h in base_hashes.items()}
+
+    data_value, serialized_storages = _pickle_zipfile_data(obj, pickle_module, pickle_protocol)
+    hashes = {}
+    base_records = {}
+    with _open_zipfile_writer(f) as zip_file:
+        zip_file.write_record('data.pkl', data_value, len(data_value))
+        records = [(key, serialized_storages[key]) for key in sorted(serialized_storages.keys())]
+        for key, storage in _staged_storages(records):
+            num_bytes = storage.size() * storage.element_size()
+            storage_hash = _hash_bytes(storage.data_ptr(), num_bytes)
+            hashes[key] = storage_hash
+            if storage_hash in base_keys:
+                base_records[key] = base_keys[storage_hash]
+            else:
+                zip_file.write_record('data/{}'.format(key), storage.data_ptr(), num_bytes)
+
+        if base is not None:
+            base = os.path.relpath(os.path.abspath(base), os.path.dirname(os.path.abspath(f)))
+        delta_value = json.dumps(dict(base=base, hashes=hashes, base_records=base_records)).encode('utf-8')
+        zip_file.write_record(DELTA_RECORD, delta_value, len(delta_value))
+
+
+def _hash_bytes(data_ptr, num_bytes):
+    data = (ctypes.c_char * num_bytes).from_address(data_ptr) if num_bytes > 0 else b''
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hash_records(zip_file):
+    hashes = {}
+    for name in zip_file.get_all_records():
+        # Record names are prefixed with the name of the archive
+        parts = name.split('/')
+        if len(parts) == 3 and parts[1] == 'data':
+            data = zip_file.get_record('data/' + parts[2])
+            hashes[parts[2]] = hashlib.sha256(data).hexdigest()
+    return hashes
+
+
+def _read_delta_info(zip_file):
+    if not zip_file.has_record(DELTA_RECORD):
+        return None
+    return json.loads(zip_file.get_record(DELTA_RECORD).decode('utf-8'))
+
+
+def _get_storage_from_delta_base(base_readers, path, delta_info, key, size, dtype, expected_hash=None):
+    # Resolves a record that a delta checkpoint at `path` refers to in its
+    # base, following the chain of bases as needed. The data found is checked
+    # against the hash the delta checkpoint recorded for it.
+    if expected_hash is None:
+        expected_hash = delta_info['hashes'][key]
+    base_path = delta_info['base']
+    if not os.path.isabs(base_path):
+        base_path = os.path.join(os.path.dirname(os.path.abspath(path)), base_path)
+    if base_path not in base_readers:
+        reader = torch._C.PyTorchFileReader(base_path)
+        base_readers[base_path] = (reader, _read_delta_info(reader))
+    reader, base_delta_info = base_readers[base_path]
+    base_key = delta_info['base_records'][key]
+    if base_delta_info is not None:
+        if base_delta_info['hashes'].get(base_key) != expected_hash:
+            raise _delta_base_mismatch_error(path, key, base_path, base_key)
+        if base_key in base_delta_info['base_records']:
+            return _get_storage_from_delta_base(base_readers, base_path, base_delta_info, base_key,
+                                                size, dtype, expected_hash)
+    name = 'data/{}'.format(base_key)
+    if not reader.has_record(name):
+        raise _delta_base_mismatch_error(path, key, base_path, base_key)
+    storage = reader.get_storage_from_record(name, size, dtype).storage()
+    if _hash_bytes(storage.data_ptr(), storage.size() * storage.element_size()) != expected_hash:
+        raise _delta_base_mismatch_error(path, key, base_path, base_key)
+    return storage
+
+
+def _delta_base_mismatch_error(path, key, base_path, base_key):
+    return RuntimeError("torch.load: record {} of the delta checkpoint {} refers to record {} of {}, "
+                        "which holds different data. The base checkpoint was modified or replaced "
+                        "after the delta checkpoint was saved.".format(key, path, base_key, base_path))
+
+
+def _snapshot_storage(storage):
+    if storage.device.type == 'cpu':
+        return storage.clone()
+    return _stage_storage(storage)
+
+
 def _legacy_save(obj, f, pickle_module, pickle_protocol) -> None:
     import torch.nn as nn
     serialized_container_types = {}
@@ -448,6 +659,13 @@ def _legacy_save(obj, f, pickle_module, pickle_protocol) -> None:
 
 
 def _save(obj, zip_file, pickle_module, pickle_protocol):
+    data_value, serialized_storages = _pickle_zipfile_data(obj, pickle_module, pickle_protocol)
+    _write_zipfile_records(zip_file, data_value, serialized_storages)
+
+
+def _pickle_zipfile_data(obj, pickle_module, pickle_protocol):
+    # Pickles `obj` with its storages replaced by references to records;
+    # returns the pickle data and the storages to write, keyed by record key.
     serialized_storages = {}
 
     def persistent_id(obj):
@@ -474,26 +692,68 @@ def _save(obj, zip_file, pickle_module, pickle_protocol):
     pickler = pickle_module.Pickler(data_buf, protocol=pickle_protocol)
     pickler.persistent_id = persistent_id
     pickler.dump(obj)
-    data_value = data_buf.getvalue()
+    return data_buf.getvalue(), serialized_storages
+
+
+def _write_zipfile_records(zip_file, data_value, serialized_storages):
     zip_file.write_record('data.pkl', data_value, len(data_value))
 
     # Write each tensor to a file named tensor/the_tensor_key in the zip archive
-    for key in sorted(serialized_storages.keys()):
-        name = 'data/{}'.format(key)
-        storage = serialized_storages[key]
-        if storage.device.type == 'cpu':
-            # If it's on the CPU we can directly copy it into the zip file
+    records = [('data/{}'.format(key), serialized_storages[key])
+               for key in sorted(serialized_storages.keys())]
+    for name, storage in _staged_storages(records):
+        num_bytes = storage.size() * storage.element_size()
+        zip_file.write_record(name, storage.data_ptr(), num_bytes)
+
+
+def _stage_storage(storage):
+    # CUDA storages are copied into pinned memory, which the caching host
+    # allocator recycles from one record to the next.
+    if storage.is_cuda:
+        cpu_storage_type = getattr(torch, type(storage).__name__)
+        staged = cpu_storage_type(storage.size(), allocator=torch.cuda._host_allocator())
+        with torch.cuda.device(storage.get_device()):
+            return staged.copy_(storage)
+    return storage.cpu()
+
+
+def _staged_storages(records):
+    """Yields ``(name, storage)`` for each of ``records`` with every storage
+    on the CPU, in order.
+
+    Storages that live on another device are copied to host memory by a
+    thread pool ahead of time, so these copies overlap with writing the
+    records that precede them. At most ``_SAVE_STAGING_BYTES`` of copies are
+    kept in flight (a single larger storage is still staged on its own).
+    """
+    num_device_records = sum(storage.device.type != 'cpu' for _, storage in records)
+    if num_device_records == 0:
+        for name, storage in records:
+            yield name, storage
+        return
+
+    pending: collections.deque = collections.deque()
+    staged_bytes = 0
+    with ThreadPoolExecutor(max_workers=min(_SAVE_STAGING_THREADS, num_device_records)) as pool:
+        for name, storage in records:
+            if storage.device.type == 'cpu':
+                staged = Future()
+                staged.set_result(storage)
+                pending.append((name, staged, 0))
+                continue
             num_bytes = storage.size() * storage.element_size()
-            zip_file.write_record(name, storage.data_ptr(), num_bytes)
-        else:
-            # Copy to a buffer, then serialize that
-            buf = io.BytesIO()
-            storage._write_file(buf, _should_read_directly(buf))
-            buf_value = buf.getvalue()
-            zip_file.write_record(name, buf_value, len(buf_value))
-
-
-def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
+            while pending and staged_bytes + num_bytes > _SAVE_STAGING_BYTES:
+                staged_name, staged, staged_num_bytes = pending.popleft()
+                staged_bytes -= staged_num_bytes
+                yield staged_name, staged.result()
+            pending.append((name, pool.submit(_stage_storage, storage), num_bytes))
+            staged_bytes += num_bytes
+        while pending:
+            staged_name, staged, _ = pending.popleft()
+            yield staged_name, staged.result()
+
+
+def load(f, map_location=None, pickle_module=pickle, mmap=False, **pickle_load_args):
     """Loads an object saved with :func:`torch.save` from a file.
 
     :func:`torch.load` uses Python's unpickling facilities but treats storages,
@@ -532,6 +792,10 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
             locations
         pickle_module: module used for unpickling metadata and objects (has to
             match the :attr:`pickle_module` used to serialize file)
+        mmap: if ``True``, the file is memory-mapped instead of read into memory
+            and storages alias the mapping, so their contents are only paged in
+            when first accessed. Requires :attr:`f` to be a file name and the
+            file to be saved in the zipfile-based format (default: ``False``)
         pickle_load_args: (Python 3 only) optional keyword arguments passed over to
             :func:`pickle_module.load` and :func:`pickle_module.Unpickler`, e.g.,
             :attr:`errors=...`.
@@ -572,9 +836,15 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
         >>> torch.load(buffer)
         # Load a module with 'ascii' encoding for unpickling
         >>> torch.load('module.pt', encoding='ascii')
+        # Memory-map the checkpoint; storages are read lazily on first access
+        >>> torch.load('tensors.pt', mmap=True)
     """
     _check_dill_version(pickle_module)
 
+    if mmap and not _is_path(f):
+        raise ValueError("torch.load: mmap=True requires f to be a file name, "
+                         "but got {}".format(type(f)))
+
     if 'encoding' not in pickle_load_args.keys():
         pickle_load_args['encoding'] = 'utf-8'
 
@@ -591,10 +861,22 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
                                   " silence this warning)", UserWarning)
                     opened_file.seek(orig_position)
                     return torch.jit.load(opened_file)
-                return _load(opened_zipfile, map_location, pickle_module, **pickle_load_args)
+                mapped_file = _mmap_file(f) if mmap else None
+                return _load(opened_zipfile, map_location, pickle_module, mapped_file=mapped_file,
+                             path=f if _is_path(f) else None, **pickle_load_args)
+        if mmap:
+            raise RuntimeError("torch.load: mmap=True is only supported for files saved "
+                               "with the zipfile-based format (the default since 1.6)")
         return _legacy_load(opened_file, map_location, pickle_module, **pickle_load_args)
 
 
+def _mmap_file(name):
+    # Map the whole archive privately (copy-on-write), so that in-place
+    # modifications of loaded tensors never reach the file on disk.
+    size = os.path.getsize(name)
+    return torch.from_file(str(name), shared=False, size=size, dtype=torch.uint8)
+
+
 # Register pickling support for layout instances such as
 # torch.sparse_coo, etc
 def _get_layout(name):
@@ -822,16 +1104,27 @@ def _get_restore_location(map_location):
     return restore_location
 
 
-def _load(zip_file, map_location, pickle_module, **pickle_load_args):
+def _load(zip_file, map_location, pickle_module, mapped_file=None, path=None, **pickle_load_args):
     restore_location = _get_restore_location(map_location)
 
     loaded_storages = {}
 
+    delta_info = _read_delta_info(zip_file)
+    if delta_info is not None and delta_info['base_records'] and path is None:
+        raise RuntimeError("torch.load: checkpoints saved with save_delta that refer to a base "
+                           "checkpoint can only be loaded from a file name")
+    base_readers: Dict[str, Any] = {}
+
     def load_tensor(data_type, size, key, location):
         name = 'data/{}'.format(key)
         dtype = data_type(0).dtype
 
-        storage = zip_file.get_storage_from_record(name, size, dtype).storage()
+        if delta_info is not None and key in delta_info['base_records']:
+            storage = _get_storage_from_delta_base(base_readers, path, delta_info, key, size, dtype)
+        elif mapped_file is not None:
+            storage = zip_file.get_storage_from_mapped_record(name, size, dtype, mapped_file).storage()
+        else:
+            storage = zip_file.get_storage_from_record(name, size, dtype).storage()
         loaded_storages[key] = restore_location(storage, location)
 
     def persistent_load(saved_id):
@@ -851,7 +1144,12 @@ def _load(zip_file, map_location, pickle_module, **pickle_load_args):
     data_file = io.BytesIO(zip_file.get_record('data.pkl'))
     unpickler = pickle_module.Unpickler(data_file, **pickle_load_args)
     unpickler.persistent_load = persistent_load
-    result = unpickler.load()
+    try:
+        result = unpickler.load()
+    finally:
+        # Storages read from a base checkpoint own a copy of their data, so
+        # the base files can be closed.
+        base_readers.clear()
 
     torch._utils._validate_loaded_sparse_tensors()
 
@@ -864,3 +1162,161 @@ def _is_torchscript_zip(zip_file):
         if len(parts) > 1 and parts[1] == 'constants.pkl':
             return True
     return False
+
+
+def save_sharded(state_dict, dirname: Union[str, os.PathLike],
+                 max_shard_size: int = 1024 ** 3) -> None:
+    """Saves a state dict as a sharded checkpoint in directory :attr:`dirname`.
+
+    The tensors are spread over several zipfile archives ("shards") of at most
+    :attr:`max_shard_size` bytes of storage data each, next to an
+    ``index.json`` file that maps every key of :attr:`state_dict` to the
+    shard, record and offset holding its data. :func:`load_sharded` uses the
+    index to read only the shards needed for the requested keys. Each shard
+    can also be loaded on its own with :func:`torch.load`, which returns the
+    dict of the tensors stored in it.
+
+    Tensors that share a storage (e.g. tied weights) are always put into the
+    same shard, and sharing is preserved when loading them back. A single
+    storage larger than :attr:`max_shard_size` gets a shard of its own.
+
+    Args:
+        state_dict: a dict mapping string keys to dense tensors, as returned
+            by :meth:`torch.nn.Module.state_dict`
+        dirname: a string or os.PathLike object containing the name of the
+            directory to write to. It is created if it doesn't exist.
+        max_shard_size: maximum number of bytes of storage data per shard
+
+    Example:
+        >>> model = torch.nn.Linear(10, 10)
+        >>> torch.serialization.save_sharded(model.state_dict(), 'checkpoint')
+        >>> state_dict = torch.serialization.load_sharded('checkpoint', keys=['bias'])
+    """
+    # Group the keys by storage, so that views of the same storage land in the
+    # same shard, keeping the order of the state dict.
+    storage_keys: Dict[int, list] = collections.OrderedDict()
+    storages = {}
+    for key, tensor in state_dict.items():
+        if not isinstance(key, str):
+            raise TypeError("save_sharded: expected state_dict keys to be strings, "
+                            "but got {}".format(type(key)))
+        if not isinstance(tensor, torch.Tensor) or tensor.layout != torch.strided or tensor.is_quantized:
+            raise TypeError("save_sharded: expected state_dict['{}'] to be a dense tensor, "
+                            "but got {}".format(key, torch.typename(tensor)))
+        storage = tensor.storage()
+        storage_keys.setdefault(storage._cdata, []).append(key)
+        storages[storage._cdata] = storage
+
+    shards: list = []
+    current_size = 0
+    for cdata, keys in storage_keys.items():
+        storage = storages[cdata]
+        num_bytes = storage.size() * storage.element_size()
+        if not shards or (shards[-1] and current_size + num_bytes > max_shard_size):
+            shards.append([])
+            current_size = 0
+        shards[-1].extend(keys)
+        current_size += num_bytes
+
+    os.makedirs(dirname, exist_ok=True)
+    shard_files = []
+    shard_of_key = {}
+    for i, keys in enumerate(shards):
+        shard_file = 'shard-{:05d}-of-{:05d}.pt'.format(i, len(shards))
+        shard_state_dict = collections.OrderedDict((key, state_dict[key]) for key in keys)
+        with _open_zipfile_writer(os.path.join(dirname, shard_file)) as opened_zipfile:
+            _save(shard_state_dict, opened_zipfile, pickle, DEFAULT_PROTOCOL)
+        shard_of_key.update((key, i) for key in keys)
+        shard_files.append(shard_file)
+
+    tensors = collections.OrderedDict()
+    for key, tensor in state_dict.items():
+        storage = tensor.storage()
+        tensors[key] = dict(
+            shard=shard_of_key[key],
+            # Same record name as written by `_save`
+            record='data/{}'.format(storage._cdata),
+            offset=tensor.storage_offset(),
+            dtype=str(tensor.dtype).split('.')[-1],
+            location=location_tag(storage),
+            storage_size=storage.size(),
+            size=list(tensor.size()),
+            stride=list(tensor.stride()),
+            requires_grad=tensor.requires_grad,
+        )
+
+    index = dict(format_version=SHARDED_FORMAT_VERSION, shards=shard_files, tensors=tensors)
+    metadata = getattr(state_dict, '_metadata', None)
+    if metadata is not None:
+        index['metadata'] = metadata
+    with open(os.path.join(dirname, SHARDED_INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+
+
+def load_sharded(dirname: Union[str, os.PathLike], keys=None, map_location=None, mmap=False):
+    """Loads a state dict saved with :func:`save_sharded`.
+
+    Only the records of the requested keys are read, and shards that don't
+    hold any of them are never opened.
+
+    Args:
+        dirname: a string or os.PathLike object containing the name of the
+            checkpoint directory
+        keys: an iterable of the keys to load. If ``None``, all keys are loaded
+        map_location: a function, :class:`torch.device`, string or a dict
+            specifying how to remap storage locations, see :func:`torch.load`
+        mmap: if ``True``, memory-map the shards instead of reading them,
+            see :func:`torch.load`
+
+    Returns:
+        an ``OrderedDict`` with the requested keys, in the order in which
+        they were saved
+    """
+    with open(os.path.join(dirname, SHARDED_INDEX_FILE), 'r') as f:
+        index = json.load(f)
+    if index.get('format_version') != SHARDED_FORMAT_VERSION:
+        raise RuntimeError("Unsupported sharded checkpoint format version: {}"
+                           .format(index.get('format_version')))
+
+    tensors_meta = index['tensors']
+    if keys is None:
+        keys = list(tensors_meta.keys())
+    else:
+        keys = set(keys)
+        missing_keys = keys - set(tensors_meta.keys())
+        if missing_keys:
+            raise KeyError("load_sharded: keys {} not found in checkpoint {}"
+                           .format(sorted(missing_keys), dirname))
+        keys = [key for key in tensors_meta.keys() if key in keys]
+
+    keys_by_shard: Dict[int, list] = collections.OrderedDict()
+    for key in keys:
+        keys_by_shard.setdefault(tensors_meta[key]['shard'], []).append(key)
+
+    restore_location = _get_restore_location(map_location)
+    loaded = {}
+    for shard, shard_keys in keys_by_shard.items():
+        shard_path = os.path.join(dirname, index['shards'][shard])
+        mapped_file = _mmap_file(shard_path) if mmap else None
+        loaded_storages: Dict[str, Any] = {}
+        with _open_zipfile_reader(str(shard_path)) as zip_file:
+            for key in shard_keys:
+                meta = tensors_meta[key]
+                record = meta['record']
+                if record not in loaded_storages:
+                    dtype = getattr(torch, meta['dtype'])
+                    if mapped_file is not None:
+                        storage = zip_file.get_storage_from_mapped_record(
+                            record, meta['storage_size'], dtype, mapped_file).storage()
+                    else:
+                        storage = zip_file.get_storage_from_record(record, meta['storage_size'], dtype).storage()
+                    loaded_storages[record] = restore_location(storage, meta['location'])
+                tensor = torch._utils._rebuild_tensor(
+                    loaded_storages[record], meta['offset'], tuple(meta['size']), tuple(meta['stride']))
+                tensor.requires_grad = meta['requires_grad']
+                loaded[key] = tensor
+
+    result: Dict[str, Any] = collections.OrderedDict((key, loaded[key]) for key in keys)
+    if 'metadata' in index:
+        result._metadata = index['metadata']  # type: ignore[attr-defined]
+    return result
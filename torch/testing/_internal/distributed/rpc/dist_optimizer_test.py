@@ -7,6 +7,7 @@ import torch.distributed.autograd as dist_autograd
 import torch.distributed.rpc as rpc
 from torch import optim
 from torch.distributed.optim import DistributedOptimizer
+from torch.distributed.optim.optimizer import _LocalOptimizer
 from torch.testing._internal.dist_utils import dist_init
 from torch.testing._internal.distributed.rpc.rpc_agent_test_fixture import (
     RpcAgentTestFixture,
@@ -203,6 +204,82 @@ class DistOptimizerTest(RpcAgentTestFixture):
             self.assertEqual(new_w1, module1.get_w())
             self.assertEqual(new_w2, module2.get_w())
 
+    @dist_init()
+    def test_dist_optim_async(self):
+        # local version
+        module1 = MyModule()
+        module2 = MyModule()
+        local_optim = optim.SGD([module1.get_w(), module2.get_w()], lr=0.05)
+
+        g_cpu = torch.Generator()
+        g_cpu.manual_seed(0)
+        t1 = torch.rand((3, 3), requires_grad=True, generator=g_cpu)
+        t2 = torch.rand((3, 3), requires_grad=True, generator=g_cpu)
+        loss = torch.add(module2.forward(module1.forward(t2)), t1).sum()
+        loss.backward()
+        local_optim.step()
+
+        # distributed version
+        owner1 = "worker%d" % ((self.rank + 1) % self.world_size)
+        owner2 = "worker%d" % ((self.rank + 2) % self.world_size)
+
+        remote_module1 = rpc.remote(owner1, MyModule)
+        remote_module2 = rpc.remote(owner2, MyModule)
+        remote_param1 = remote_method(MyModule.get_w, remote_module1)
+        remote_param2 = remote_method(MyModule.get_w, remote_module2)
+
+        dist_optim = DistributedOptimizer(
+            optim.SGD, [remote_param1, remote_param2], lr=0.05
+        )
+
+        with dist_autograd.context() as context_id:
+            g_cpu.manual_seed(0)
+            t1 = torch.rand((3, 3), requires_grad=True, generator=g_cpu)
+            t2 = torch.rand((3, 3), requires_grad=True, generator=g_cpu)
+            output1 = rpc_async_method(MyModule.forward, remote_module1, t2)
+            output2 = rpc_async_method(MyModule.forward, remote_module2, output1.wait())
+            loss = torch.add(output2.wait(), t1)
+
+            dist_autograd.backward(context_id, [loss.sum()])
+            fut = dist_optim.step(context_id, async_op=True)
+            self.assertIsInstance(fut, torch.futures.Future)
+            fut.wait()
+
+            new_w1 = rpc_async_method(MyModule.get_w, remote_module1).wait()
+            new_w2 = rpc_async_method(MyModule.get_w, remote_module2).wait()
+            self.assertEqual(new_w1, module1.get_w())
+            self.assertEqual(new_w2, module2.get_w())
+
+        # errors are raised when waiting for the future
+        dist_optim = DistributedOptimizer(
+            FailingOptimizer, [remote_param1, remote_param2]
+        )
+        with dist_autograd.context() as context_id:
+            output1 = rpc_async_method(MyModule.forward, remote_module1, t2)
+            output2 = rpc_async_method(MyModule.forward, remote_module2, output1.wait())
+            dist_autograd.backward(context_id, [torch.add(output2.wait(), t1).sum()])
+            fut = dist_optim.step(context_id, async_op=True)
+            with self.assertRaisesRegex(Exception, "Error running optimizer"):
+                fut.wait()
+
+    @dist_init()
+    def test_local_optimizer_locks(self):
+        w1 = torch.rand(3, requires_grad=True)
+        w2 = torch.rand(3, requires_grad=True)
+        w3 = torch.rand(3, requires_grad=True)
+        optim1 = _LocalOptimizer(optim.SGD, [rpc.RRef(w1), rpc.RRef(w2)], lr=0.05)
+        optim2 = _LocalOptimizer(optim.SGD, [rpc.RRef(w2), rpc.RRef(w1)], lr=0.05)
+        optim3 = _LocalOptimizer(optim.SGD, [rpc.RRef(w3)], lr=0.05)
+        optim4 = _LocalOptimizer(optim.SGD, [rpc.RRef(w2), rpc.RRef(w3)], lr=0.05)
+
+        # Optimizers of the same parameters share their locks, in the same
+        # order, and optimizers of disjoint parameters don't.
+        self.assertEqual(len(optim1._locks), 2)
+        self.assertTrue(all(a is b for a, b in zip(optim1._locks, optim2._locks)))
+        self.assertFalse(set(map(id, optim1._locks)) & set(map(id, optim3._locks)))
+        self.assertEqual(set(map(id, optim4._locks)),
+                         set(map(id, optim3._locks)) | {id(_LocalOptimizer._param_locks[id(w2)])})
+
 class TensorPipeRpcAgentDistOptimizerTest(TensorPipeRpcAgentTestFixture,
                                           DistOptimizerTest):
 
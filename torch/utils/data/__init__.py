@@ -1,4 +1,4 @@
 from .sampler import Sampler, SequentialSampler, RandomSampler, SubsetRandomSampler, WeightedRandomSampler, BatchSampler
 from .distributed import DistributedSampler
-from .dataset import Dataset, IterableDataset, TensorDataset, ConcatDataset, ChainDataset, Subset, random_split
+from .dataset import Dataset, IterableDataset, AsyncDataset, TensorDataset, ConcatDataset, ChainDataset, Subset, random_split
 from .dataloader import DataLoader, _DatasetKind, get_worker_info
@@ -3,5 +3,5 @@ from .sampler import Sampler as Sampler, SequentialSampler as SequentialSampler,
 from .distributed import DistributedSampler as DistributedSampler
 from .dataset import Dataset as Dataset, TensorDataset as TensorDataset, ConcatDataset as ConcatDataset, \
     Subset as Subset, random_split as random_split, IterableDataset as IterableDataset, \
-    ChainDataset as ChainDataset
+    ChainDataset as ChainDataset, AsyncDataset as AsyncDataset
 from .dataloader import DataLoader as DataLoader, get_worker_info as get_worker_info
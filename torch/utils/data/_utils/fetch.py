@@ -3,6 +3,11 @@ data from an iterable-style or map-style dataset. This logic is shared in both
 single- and multi-processing data loading.
 """
 
+import asyncio
+import collections
+import os
+import threading
+
 
 class _BaseDatasetFetcher(object):
     def __init__(self, dataset, auto_collation, collate_fn, drop_last):
@@ -41,7 +46,73 @@ class _MapDatasetFetcher(_BaseDatasetFetcher):
 
     def fetch(self, possibly_batched_index):
         if self.auto_collation:
-            data = [self.dataset[idx] for idx in possibly_batched_index]
+            if hasattr(self.dataset, '__getitems__'):
+                data = self.dataset.__getitems__(possibly_batched_index)
+            else:
+                data = [self.dataset[idx] for idx in possibly_batched_index]
         else:
             data = self.dataset[possibly_batched_index]
         return self.collate_fn(data)
+
+
+class _AsyncMapDatasetFetcher(_BaseDatasetFetcher):
+    # Fetches from an `AsyncDataset`. Batches are submitted (in order) before
+    # they are fetched (in the same order), so that the samples of the next
+    # batches are in flight while the current one is waited for, up to
+    # `dataset.max_in_flight` samples. Fetches run on the event loop of the
+    # process (see `_get_fetch_loop`), or on the caller's loop for
+    # `submit(..., loop)` and `fetch_async`.
+    def __init__(self, dataset, auto_collation, collate_fn, drop_last):
+        super(_AsyncMapDatasetFetcher, self).__init__(dataset, auto_collation, collate_fn, drop_last)
+        self.max_in_flight = max(1, dataset.max_in_flight)
+        # (number of samples, future) of the submitted batches, in order
+        self.submitted = collections.deque()
+        self.num_in_flight = 0
+
+    async def _get(self, possibly_batched_index):
+        if self.auto_collation:
+            return await asyncio.gather(*[self.dataset[idx] for idx in possibly_batched_index])
+        return await self.dataset[possibly_batched_index]
+
+    def can_submit(self):
+        return self.num_in_flight < self.max_in_flight
+
+    def submit(self, possibly_batched_index, loop=None):
+        if loop is None:
+            future = asyncio.run_coroutine_threadsafe(self._get(possibly_batched_index), _get_fetch_loop())
+        else:
+            future = loop.create_task(self._get(possibly_batched_index))
+        num_samples = len(possibly_batched_index) if self.auto_collation else 1
+        self.submitted.append((num_samples, future))
+        self.num_in_flight += num_samples
+
+    def _pop(self, possibly_batched_index, loop=None):
+        if not self.submitted:
+            self.submit(possibly_batched_index, loop)
+        num_samples, future = self.submitted.popleft()
+        self.num_in_flight -= num_samples
+        return future
+
+    def fetch(self, possibly_batched_index):
+        return self.collate_fn(self._pop(possibly_batched_index).result())
+
+    async def fetch_async(self, possibly_batched_index):
+        return self.collate_fn(await self._pop(possibly_batched_index, asyncio.get_event_loop()))
+
+
+_fetch_loop = None
+_fetch_loop_lock = threading.Lock()
+
+
+def _get_fetch_loop():
+    # Returns the event loop on which `AsyncDataset`s are fetched, which runs
+    # in a daemon thread. There is one per process, i.e., per worker process,
+    # shared by the thread workers and the main process.
+    global _fetch_loop
+    with _fetch_loop_lock:
+        if _fetch_loop is None or _fetch_loop[0] != os.getpid():
+            # (A forked worker doesn't inherit the thread of its parent's loop)
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='torch.utils.data fetch loop', daemon=True).start()
+            _fetch_loop = (os.getpid(), loop)
+        return _fetch_loop[1]
@@ -7,11 +7,11 @@ static methods.
 
 import torch
 from torch._six import queue, container_abcs, string_classes
-from . import MP_STATUS_CHECK_INTERVAL
+from . import MP_STATUS_CHECK_INTERVAL, shm_slots
 from torch._utils import ExceptionWrapper
 
 
-def _pin_memory_loop(in_queue, out_queue, device_id, done_event):
+def _pin_memory_loop(in_queue, out_queue, device_id, done_event, slots=None):
     # This setting is thread local, and prevents the copy in pin_memory from
     # consuming all CPU cores.
     torch.set_num_threads(1)
@@ -28,7 +28,16 @@ def _pin_memory_loop(in_queue, out_queue, device_id, done_event):
         idx, data = r
         if not done_event.is_set() and not isinstance(data, ExceptionWrapper):
             try:
-                data = pin_memory(data)
+                if slots is not None and isinstance(data, shm_slots._SlotBatch):
+                    # Once pinned, the batch no longer refers to the slot.
+                    # See NOTE [ Shared Memory Slots ]
+                    slot_batch = data
+                    try:
+                        data = pin_memory(slots.unpack(slot_batch))
+                    finally:
+                        slots.release(slot_batch)
+                else:
+                    data = pin_memory(data)
             except Exception:
                 data = ExceptionWrapper(
                     where="in pin memory thread for device {}".format(device_id))
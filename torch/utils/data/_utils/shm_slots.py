@@ -0,0 +1,170 @@
+r"""Shared memory slots through which DataLoader worker processes send
+batches to the main process (``DataLoader(..., shared_memory_slots=K)``).
+See NOTE [ Shared Memory Slots ].
+"""
+
+import torch
+from collections import namedtuple
+from torch._six import queue, container_abcs, string_classes
+from . import MP_STATUS_CHECK_INTERVAL
+
+# NOTE [ Shared Memory Slots ]
+#
+# With `DataLoader(..., shared_memory_slots=K)`, every worker owns `K` slots.
+# A slot holds one shared memory storage per dtype, which only grows (and is
+# therefore only sent to the main process once per growth). For every batch,
+# the worker picks a free slot, copies the tensors of the batch into the slot's
+# storages and sends a `_SlotBatch` that describes where each tensor lives,
+# i.e., in the steady state only a slot index and some small metadata go
+# through the queue, and no file descriptors are passed.
+#
+# The main process rebuilds the tensors as views of the slot storages, and
+# gives the slot back to the worker via the worker's `free_slot_queue` once it
+# can no longer be observed by the user:
+#   (1) with `pin_memory=True`, right after the batch is copied into pinned
+#       memory by the pin memory thread, or
+#   (2) otherwise, when the next batch is requested from the iterator. That is,
+#       a batch is only valid until the following `next(...)` call and has to
+#       be cloned if it needs to live longer.
+#
+# Since workers process tasks in order and the main process releases the slot
+# of the previous batch before it waits for the next one, the worker that
+# produces the batch the main process waits for always gets a free slot, as
+# long as `K` is at least the number of outstanding tasks per worker plus one.
+
+_SlotTensor = namedtuple('_SlotTensor', ['dtype', 'offset', 'size', 'stride'])
+_SlotBatch = namedtuple('_SlotBatch', ['worker_id', 'slot_id', 'new_storages', 'data'])
+
+
+class _WorkerSlots(object):
+    r"""Worker side of the shared memory slots of one worker."""
+
+    def __init__(self, worker_id, num_slots, free_slot_queue):
+        self.worker_id = worker_id
+        self.free_slot_queue = free_slot_queue
+        self.free_slots = list(range(num_slots))
+        # slot id => {dtype: shared storage}
+        self.storages = [{} for _ in range(num_slots)]
+
+    def _acquire_slot(self, watchdog, done_event):
+        while not self.free_slots:
+            if done_event.is_set() or not watchdog.is_alive():
+                return None
+            try:
+                self.free_slots.append(self.free_slot_queue.get(timeout=MP_STATUS_CHECK_INTERVAL))
+            except queue.Empty:
+                continue
+        return self.free_slots.pop(0)
+
+    def pack(self, data, watchdog, done_event):
+        r"""Copies the tensors in ``data`` into a free slot and returns the
+        ``_SlotBatch`` describing them, or ``None`` if shutting down while
+        waiting for a free slot."""
+        slot_id = self._acquire_slot(watchdog, done_event)
+        if slot_id is None:
+            return None
+        # First pass: compute how many elements of each dtype are needed.
+        numels = {}
+        for t in _iter_tensors(data):
+            numels[t.dtype] = numels.get(t.dtype, 0) + t.numel()
+        storages = self.storages[slot_id]
+        new_storages = {}
+        for dtype, numel in numels.items():
+            if dtype not in storages or storages[dtype].size() < numel:
+                tensor_type = torch.tensor([], dtype=dtype)
+                # Grow with some headroom, so that variable-sized batches
+                # don't reallocate every time.
+                storage = tensor_type.storage()._new_shared(max(numel, numel * 5 // 4))
+                storages[dtype] = new_storages[dtype] = storage
+        offsets = dict.fromkeys(numels.keys(), 0)
+
+        def copy_into_slot(t):
+            offset = offsets[t.dtype]
+            view = torch.tensor([], dtype=t.dtype).set_(storages[t.dtype], offset, t.size())
+            view.copy_(t)
+            offsets[t.dtype] += t.numel()
+            return _SlotTensor(t.dtype, offset, tuple(view.size()), view.stride())
+
+        return _SlotBatch(self.worker_id, slot_id, new_storages, _map_tensors(copy_into_slot, data))
+
+
+class _MainSlots(object):
+    r"""Main process side of the shared memory slots of all workers."""
+
+    def __init__(self, free_slot_queues):
+        self.free_slot_queues = free_slot_queues
+        # (worker id, slot id) => {dtype: shared storage}
+        self.storages = {}
+
+    def unpack(self, batch):
+        storages = self.storages.setdefault((batch.worker_id, batch.slot_id), {})
+        storages.update(batch.new_storages)
+
+        def rebuild(t):
+            return torch.tensor([], dtype=t.dtype).set_(storages[t.dtype], t.offset, t.size, t.stride)
+
+        return _rebuild_slot_tensors(rebuild, batch.data)
+
+    def release(self, batch):
+        self.free_slot_queues[batch.worker_id].put(batch.slot_id)
+
+
+def _is_slot_tensor(t):
+    return t.device.type == 'cpu' and t.layout == torch.strided and not t.is_quantized
+
+
+def _iter_tensors(data):
+    if isinstance(data, torch.Tensor):
+        if _is_slot_tensor(data):
+            yield data
+    elif isinstance(data, string_classes):
+        return
+    elif isinstance(data, container_abcs.Mapping):
+        for sample in data.values():
+            yield from _iter_tensors(sample)
+    elif isinstance(data, container_abcs.Sequence):
+        for sample in data:
+            yield from _iter_tensors(sample)
+
+
+def _rebuild_container(data, items):
+    # Builds a container of the same type as `data` (a mapping or a sequence)
+    # from `items` (a dict or a list), so that batches have the same structure
+    # as with the default transport. Falls back to `items` for types that
+    # can't be built from them.
+    if isinstance(data, tuple) and hasattr(data, '_fields'):  # namedtuple
+        return type(data)(*items)
+    try:
+        return type(data)(items)
+    except TypeError:
+        return items
+
+
+def _map_tensors(fn, data):
+    # Applies `fn` to the CPU tensors of `data`, in the same order as
+    # `_iter_tensors`, and rebuilds the containers.
+    if isinstance(data, torch.Tensor):
+        if _is_slot_tensor(data):
+            return fn(data)
+        return data
+    elif isinstance(data, string_classes):
+        return data
+    elif isinstance(data, container_abcs.Mapping):
+        return _rebuild_container(data, {k: _map_tensors(fn, sample) for k, sample in data.items()})
+    elif isinstance(data, container_abcs.Sequence):
+        return _rebuild_container(data, [_map_tensors(fn, sample) for sample in data])
+    else:
+        return data
+
+
+def _rebuild_slot_tensors(fn, data):
+    if isinstance(data, _SlotTensor):
+        return fn(data)
+    elif isinstance(data, string_classes):
+        return data
+    elif isinstance(data, container_abcs.Mapping):
+        return _rebuild_container(data, {k: _rebuild_slot_tensors(fn, sample) for k, sample in data.items()})
+    elif isinstance(data, container_abcs.Sequence):
+        return _rebuild_container(data, [_rebuild_slot_tensors(fn, sample) for sample in data])
+    else:
+        return data
@@ -7,10 +7,11 @@ static methods.
 import torch
 import random
 import os
-from collections import namedtuple
+import threading
+from collections import deque, namedtuple
 from torch._six import queue
 from torch._utils import ExceptionWrapper
-from . import signal_handling, MP_STATUS_CHECK_INTERVAL, IS_WINDOWS
+from . import signal_handling, shm_slots, fetch, MP_STATUS_CHECK_INTERVAL, IS_WINDOWS
 
 if IS_WINDOWS:
     import ctypes
@@ -54,8 +55,33 @@ else:
                 self.manager_dead = os.getppid() != self.manager_pid
             return not self.manager_dead
 
+
+class _ThreadManagerWatchdog(object):
+    # Thread workers run in the same process as the main thread, so they only
+    # need to stop if the main thread is gone.
+    def is_alive(self):
+        return threading.main_thread().is_alive()
+
+
 _worker_info = None
 
+# `WorkerInfo` of the current thread, if it is a thread worker (i.e., created
+# with `DataLoader(worker_type='thread')`).
+_thread_local = threading.local()
+
+# Whether batches of this worker process are sent through shared memory slots.
+# See NOTE [ Shared Memory Slots ]
+_use_shared_memory_slots = False
+
+
+def _collate_into_shared_memory():
+    # Whether `default_collate` should stack batches directly into newly
+    # allocated shared memory. Only worker processes need that, and not when
+    # the worker loop copies batches into shared memory slots anyways. Note
+    # that thread workers live in the main process, where `_worker_info` is
+    # always `None`.
+    return _worker_info is not None and not _use_shared_memory_slots
+
 
 class WorkerInfo(object):
     __initialized = False
@@ -94,7 +120,11 @@ def get_worker_info():
       that this will be a different object in a different process than the one
       in the main process.
 
-    When called in the main process, this returns ``None``.
+    When called in the main process, this returns ``None``. When called in a
+    thread worker (see the ``worker_type`` argument of
+    :class:`~torch.utils.data.DataLoader`), this returns the information
+    about that thread, and :attr:`dataset` is the same object as in the main
+    thread.
 
     .. note::
        When used in a :attr:`worker_init_fn` passed over to
@@ -104,34 +134,83 @@ def get_worker_info():
        sharded dataset, or use ``seed`` to seed other libraries used in dataset
        code (e.g., NumPy).
     """
-    return _worker_info
+    return getattr(_thread_local, 'worker_info', _worker_info)
 
 
 r"""Dummy class used to signal the end of an IterableDataset"""
 _IterableDatasetStopIteration = namedtuple('_IterableDatasetStopIteration', ['worker_id'])
 
 
+class _ResumeIteration(object):
+    r"""Dummy class used to resume the fetching when worker reuse is enabled"""
+    pass
+
+
+def _submit_ahead(fetcher, index, index_queue, lookahead):
+    # With an `AsyncDataset`, starts fetching `index` and the tasks that are
+    # already waiting (in `lookahead`, or in `index_queue`, from which they are
+    # moved to `lookahead`) as far as the window of the fetcher allows, so
+    # that the next batches are in flight while this one is waited for.
+    #
+    # Tasks are submitted in order, so that all submitted tasks but `index`
+    # (if any) are at the front of `lookahead`.
+    if not fetcher.submitted:
+        fetcher.submit(index)
+    num_submitted_ahead = len(fetcher.submitted) - 1
+    for i, r in enumerate(lookahead):
+        if i < num_submitted_ahead:
+            continue
+        if not isinstance(r, tuple) or not fetcher.can_submit():
+            # `None` or `_ResumeIteration` are handled in order by the loop
+            return
+        fetcher.submit(r[1])
+    while fetcher.can_submit():
+        try:
+            r = index_queue.get_nowait()
+        except queue.Empty:
+            return
+        lookahead.append(r)
+        if not isinstance(r, tuple):
+            return
+        fetcher.submit(r[1])
+
+
 def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
                  auto_collation, collate_fn, drop_last, seed, init_fn, worker_id,
-                 num_workers):
+                 num_workers, shared_memory_slots=0, free_slot_queue=None, use_thread=False):
     # See NOTE [ Data Loader Multiprocessing Shutdown Logic ] for details on the
     # logic of this function.
+    #
+    # With `use_thread=True`, this runs in a thread of the main process. All
+    # process-wide state (signal handlers, number of threads and RNGs) is then
+    # left alone, as it is shared with the main thread.
 
-    try:
-        # Initialize C side signal handlers for SIGBUS and SIGSEGV. Python signal
-        # module's handlers are executed after Python returns from C low-level
-        # handlers, likely when the same fatal signal had already happened
-        # again.
-        # https://docs.python.org/3/library/signal.html#execution-of-python-signal-handlers
-        signal_handling._set_worker_signal_handlers()
-
-        torch.set_num_threads(1)
-        random.seed(seed)
-        torch.manual_seed(seed)
+    global _worker_info, _use_shared_memory_slots
 
-        global _worker_info
-        _worker_info = WorkerInfo(id=worker_id, num_workers=num_workers,
-                                  seed=seed, dataset=dataset)
+    try:
+        if not use_thread:
+            # Initialize C side signal handlers for SIGBUS and SIGSEGV. Python signal
+            # module's handlers are executed after Python returns from C low-level
+            # handlers, likely when the same fatal signal had already happened
+            # again.
+            # https://docs.python.org/3/library/signal.html#execution-of-python-signal-handlers
+            signal_handling._set_worker_signal_handlers()
+
+            torch.set_num_threads(1)
+            random.seed(seed)
+            torch.manual_seed(seed)
+
+        worker_info = WorkerInfo(id=worker_id, num_workers=num_workers,
+                                 seed=seed, dataset=dataset)
+        if use_thread:
+            _thread_local.worker_info = worker_info
+        else:
+            _worker_info = worker_info
+
+        slots = None
+        if shared_memory_slots > 0:
+            _use_shared_memory_slots = True
+            slots = shm_slots._WorkerSlots(worker_id, shared_memory_slots, free_slot_queue)
 
         from torch.utils.data import _DatasetKind
 
@@ -157,17 +236,37 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
         # among all processes. Instead, we set the `iteration_end` flag to
         # signify that the iterator is exhausted. When either `done_event` or
         # `iteration_end` is set, we skip all processing step and just wait for
-        # `None`.
+        # `None`, or, with persistent workers, for a `_ResumeIteration` that
+        # starts the next epoch.
         iteration_end = False
 
-        watchdog = ManagerWatchdog()
+        watchdog = _ThreadManagerWatchdog() if use_thread else ManagerWatchdog()
+
+        # Messages read from `index_queue` ahead of time, see `_submit_ahead`
+        lookahead = deque()
 
         while watchdog.is_alive():
-            try:
-                r = index_queue.get(timeout=MP_STATUS_CHECK_INTERVAL)
-            except queue.Empty:
+            if lookahead:
+                r = lookahead.popleft()
+            else:
+                try:
+                    r = index_queue.get(timeout=MP_STATUS_CHECK_INTERVAL)
+                except queue.Empty:
+                    continue
+            if isinstance(r, _ResumeIteration):
+                # Acknowledge the main process
+                data_queue.put((r, None))
+                iteration_end = False
+                # Recreate the fetcher for worker-reuse policy, so that an
+                # iterable-style dataset starts over.
+                try:
+                    fetcher = _DatasetKind.create_fetcher(
+                        dataset_kind, dataset, auto_collation, collate_fn, drop_last)
+                except Exception:
+                    init_exception = ExceptionWrapper(
+                        where="in DataLoader worker process {}".format(worker_id))
                 continue
-            if r is None:
+            elif r is None:
                 # Received the final signal
                 assert done_event.is_set() or iteration_end
                 break
@@ -182,6 +281,8 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
                 init_exception = None
             else:
                 try:
+                    if isinstance(fetcher, fetch._AsyncMapDatasetFetcher):
+                        _submit_ahead(fetcher, index, index_queue, lookahead)
                     data = fetcher.fetch(index)
                 except Exception as e:
                     if isinstance(e, StopIteration) and dataset_kind == _DatasetKind.Iterable:
@@ -196,11 +297,20 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
                         # See NOTE [ Python Traceback Reference Cycle Problem ]
                         data = ExceptionWrapper(
                             where="in DataLoader worker process {}".format(worker_id))
+            if slots is not None and not isinstance(data, (ExceptionWrapper, _IterableDatasetStopIteration)):
+                try:
+                    data = slots.pack(data, watchdog, done_event)
+                except Exception:
+                    data = ExceptionWrapper(
+                        where="in DataLoader worker process {}".format(worker_id))
+                if data is None:
+                    # Shutting down while waiting for a free slot
+                    continue
             data_queue.put((idx, data))
             del data, idx, index, r  # save memory
     except KeyboardInterrupt:
         # Main process will raise KeyboardInterrupt anyways.
         pass
-    if done_event.is_set():
+    if done_event.is_set() and not use_thread:
         data_queue.cancel_join_thread()
         data_queue.close()
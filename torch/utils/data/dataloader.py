@@ -5,10 +5,13 @@ functions to be run in multiprocessing. E.g., the data loading worker loop is
 in `./_utils/worker.py`.
 """
 
+import asyncio
 import threading
 import itertools
+import collections
+import time
 import warnings
-from typing import Any, Callable, TypeVar, Generic, Sequence, List, Optional
+from typing import Any, Callable, Dict, TypeVar, Generic, Sequence, List, Optional
 
 import multiprocessing as python_multiprocessing
 import torch
@@ -16,7 +19,7 @@ import torch.multiprocessing as multiprocessing
 from torch._utils import ExceptionWrapper
 from torch._six import queue, string_classes
 
-from . import IterableDataset, Sampler, SequentialSampler, RandomSampler, BatchSampler, Dataset
+from . import IterableDataset, AsyncDataset, Sampler, SequentialSampler, RandomSampler, BatchSampler, Dataset
 from . import _utils
 
 T_co = TypeVar('T_co', covariant=True)
@@ -45,11 +48,22 @@ class _DatasetKind(object):
     @staticmethod
     def create_fetcher(kind, dataset, auto_collation, collate_fn, drop_last):
         if kind == _DatasetKind.Map:
+            if isinstance(dataset, AsyncDataset):
+                return _utils.fetch._AsyncMapDatasetFetcher(dataset, auto_collation, collate_fn, drop_last)
             return _utils.fetch._MapDatasetFetcher(dataset, auto_collation, collate_fn, drop_last)
         else:
             return _utils.fetch._IterableDatasetFetcher(dataset, auto_collation, collate_fn, drop_last)
 
 
+class _ThreadingContext(object):
+    # Stands in for a multiprocessing context in `_MultiProcessingDataLoaderIter`
+    # to run the workers as threads of the main process, see the `worker_type`
+    # argument of `DataLoader`.
+    Queue = queue.Queue
+    Event = threading.Event
+    Process = threading.Thread
+
+
 class _InfiniteConstantSampler(Sampler):
     r"""Analogous to ``itertools.repeat(None, None)``.
     Used as sampler for :class:`~torch.utils.data.IterableDataset`.
@@ -109,7 +123,42 @@ class DataLoader(Generic[T_co]):
         worker_init_fn (callable, optional): If not ``None``, this will be called on each
             worker subprocess with the worker id (an int in ``[0, num_workers - 1]``) as
             input, after seeding and before data loading. (default: ``None``)
-
+        shared_memory_slots (int, optional): if positive, each worker preallocates
+            this many reusable shared memory slots and sends batches through them,
+            so that only slot indices are passed between processes instead of new
+            shared memory (and file descriptors) for every batch. A batch is then
+            only valid until the next batch is requested, unless
+            :attr:`pin_memory` is ``True``; clone it to keep it longer. Must be
+            greater than :attr:`prefetch_factor` and can only be used with
+            multi-process loading. (default: ``0``)
+        worker_type (str, optional): ``'process'`` to run the :attr:`num_workers`
+            workers as subprocesses, or ``'thread'`` to run them as threads of the
+            main process. Thread workers avoid starting processes and sending data
+            between them, which pays off for datasets that are I/O bound or that
+            release the GIL while loading (e.g., decoding in C extensions). They
+            share the dataset object, RNGs and the number of threads with the main
+            process. (default: ``'process'``)
+        persistent_workers (bool, optional): If ``True``, the data loader will not shutdown
+            the worker processes after a dataset has been consumed once. This allows to
+            maintain the workers' `Dataset` instances alive, and avoids starting the
+            workers (and sending the dataset to them) at every epoch. The workers are
+            shut down when the data loader is garbage collected. (default: ``False``)
+        prefetch_factor (int, optional): Number of batches loaded
+            in advance by each worker. ``2`` means there will be a total of
+            2 * num_workers batches prefetched across all workers. (default: ``2``)
+        adaptive_prefetch (bool, optional): If ``True``, the
+            number of batches loaded in advance is adjusted while iterating,
+            between ``num_workers`` and ``prefetch_factor * num_workers``. It
+            grows whenever the main process has to wait for a batch for a
+            noticeable part of the time it spends on a batch, and shrinks while
+            batches are ready before they are requested, so that no more host
+            memory than needed is held by prefetched batches. (default: ``False``)
+
+
+    .. warning:: With :attr:`shared_memory_slots`, batches are views into
+                 memory that is reused for later batches. Don't keep references
+                 to a batch (e.g., in a list) across iterations without cloning
+                 it.
 
     .. warning:: If the ``spawn`` start method is used, :attr:`worker_init_fn`
                  cannot be an unpicklable object, e.g., a lambda function. See
@@ -141,7 +190,10 @@ class DataLoader(Generic[T_co]):
                  num_workers: int = 0, collate_fn: _collate_fn_t = None,
                  pin_memory: bool = False, drop_last: bool = False,
                  timeout: float = 0, worker_init_fn: _worker_init_fn_t = None,
-                 multiprocessing_context=None, generator=None):
+                 multiprocessing_context=None, generator=None,
+                 shared_memory_slots: int = 0, worker_type: str = 'process',
+                 persistent_workers: bool = False, prefetch_factor: int = 2,
+                 adaptive_prefetch: bool = False):
         torch._C._log_api_usage_once("python.data_loader")  # type: ignore
 
         if num_workers < 0:
@@ -151,12 +203,44 @@ class DataLoader(Generic[T_co]):
         if timeout < 0:
             raise ValueError('timeout option should be non-negative')
 
+        if worker_type not in ('process', 'thread'):
+            raise ValueError("worker_type option should be either 'process' or 'thread', "
+                             "but got worker_type={!r}".format(worker_type))
+        self.worker_type = worker_type
+
+        if shared_memory_slots != 0:
+            if worker_type == 'thread':
+                raise ValueError('shared_memory_slots option can only be used with '
+                                 "worker_type='process'")
+            if num_workers == 0:
+                raise ValueError('shared_memory_slots option can only be used with '
+                                 'multi-process loading (num_workers > 0)')
+            if shared_memory_slots <= prefetch_factor:
+                # See NOTE [ Shared Memory Slots ]
+                raise ValueError('shared_memory_slots option should be at least {} (prefetch_factor + 1), '
+                                 'but got shared_memory_slots={}'.format(prefetch_factor + 1,
+                                                                         shared_memory_slots))
+
+        if persistent_workers and num_workers == 0:
+            raise ValueError('persistent_workers option needs num_workers > 0')
+
+        if num_workers == 0 and (prefetch_factor != 2 or adaptive_prefetch):
+            raise ValueError('prefetch_factor and adaptive_prefetch options could only be specified '
+                             'in multiprocessing. let num_workers > 0 to enable multiprocessing.')
+        if prefetch_factor <= 0:
+            raise ValueError('prefetch_factor option should be positive, '
+                             'but got prefetch_factor={}'.format(prefetch_factor))
+
         self.dataset = dataset
         self.num_workers = num_workers
         self.pin_memory = pin_memory
         self.timeout = timeout
         self.worker_init_fn = worker_init_fn
         self.multiprocessing_context = multiprocessing_context
+        self.shared_memory_slots = shared_memory_slots
+        self.persistent_workers = persistent_workers
+        self.prefetch_factor = prefetch_factor
+        self.adaptive_prefetch = adaptive_prefetch
 
         # Arg-check dataset related before checking samplers because we want to
         # tell users that iterable-style datasets are incompatible with custom
@@ -256,6 +340,15 @@ class DataLoader(Generic[T_co]):
         self.__initialized = True
         self._IterableDataset_len_called = None  # See NOTE [ IterableDataset and __len__ ]
 
+        self._iterator = None
+        self._resume_state = None  # iterator state to resume from, see `load_state_dict`
+
+    def _get_iterator(self) -> '_BaseDataLoaderIter':
+        if self.num_workers == 0:
+            return _SingleProcessDataLoaderIter(self)
+        else:
+            return _MultiProcessingDataLoaderIter(self)
+
     @property
     def multiprocessing_context(self):
         return self.__multiprocessing_context
@@ -263,6 +356,9 @@ class DataLoader(Generic[T_co]):
     @multiprocessing_context.setter
     def multiprocessing_context(self, multiprocessing_context):
         if multiprocessing_context is not None:
+            if self.worker_type == 'thread':
+                raise ValueError("multiprocessing_context can only be used with "
+                                 "worker_type='process'")
             if self.num_workers > 0:
                 if not multiprocessing._supports_context:
                     raise ValueError('multiprocessing_context relies on Python >= 3.4, with '
@@ -299,10 +395,52 @@ class DataLoader(Generic[T_co]):
     # We quote '_BaseDataLoaderIter' since it isn't defined yet and the definition can't be moved up
     # since '_BaseDataLoaderIter' references 'DataLoader'.
     def __iter__(self) -> '_BaseDataLoaderIter':
-        if self.num_workers == 0:
-            return _SingleProcessDataLoaderIter(self)
+        # When using a single worker the returned iterator should be
+        # created everytime to avoid reseting its state
+        # However, in the case of a multiple workers iterator
+        # the iterator is only created once in the lifetime of the
+        # DataLoader object so that workers can be reused
+        if self.persistent_workers and self.num_workers > 0:
+            if self._iterator is None:
+                self._iterator = self._get_iterator()
+            else:
+                self._iterator._reset(self)
+            return self._iterator
         else:
-            return _MultiProcessingDataLoaderIter(self)
+            return self._get_iterator()
+
+    def __aiter__(self) -> '_AsyncDataLoaderIter':
+        return _AsyncDataLoaderIter(iter(self))
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        r"""Makes the next iterator over this loader resume from a saved
+        iteration.
+
+        The next iterator continues with the first batch that the saved
+        iterator did not yield, and the index sampler is restored so that the
+        order of the remaining batches is the same. Skipped batches are not
+        loaded from the dataset. Only map-style datasets are supported.
+
+        Arguments:
+            state_dict (dict): iterator state. Should be an object returned
+                from a call to ``state_dict()`` of an iterator over this (or an
+                equally configured) loader.
+
+        Example::
+
+            >>> it = iter(loader)
+            >>> for batch in it:
+            ...     train(batch)
+            ...     torch.save(it.state_dict(), 'loader.pt')
+            >>> # after a restart
+            >>> loader.load_state_dict(torch.load('loader.pt'))
+            >>> for batch in loader:  # continues where the saved iteration stopped
+            ...     train(batch)
+        """
+        if self._dataset_kind == _DatasetKind.Iterable:
+            raise ValueError('DataLoader with IterableDataset: resuming an iteration '
+                             'is only supported for map-style datasets')
+        self._resume_state = state_dict
 
     @property
     def _auto_collation(self):
@@ -362,14 +500,74 @@ class _BaseDataLoaderIter(object):
         self._pin_memory = loader.pin_memory and torch.cuda.is_available()
         self._timeout = loader.timeout
         self._collate_fn = loader.collate_fn
-        self._sampler_iter = iter(self._index_sampler)
+        self._start_sampler_iter(loader)
         self._base_seed = torch.empty((), dtype=torch.int64).random_(generator=loader.generator).item()
-        self._num_yielded = 0
+        self._persistent_workers = loader.persistent_workers
 
     def __iter__(self) -> '_BaseDataLoaderIter':
         return self
 
+    def _reset(self, loader, first_iter=False):
+        if not first_iter:
+            self._start_sampler_iter(loader)
+        self._IterableDataset_len_called = loader._IterableDataset_len_called
+
+    def _start_sampler_iter(self, loader):
+        # Starts a new pass over the index sampler, or resumes the one saved in
+        # `loader.load_state_dict(...)`. The state of the index sampler is only
+        # taken (and the batches yielded before are only skipped) when the
+        # first index is needed, see `_begin_pass`.
+        resume_state, loader._resume_state = loader._resume_state, None
+        if resume_state is not None and resume_state['sampler'] is not None:
+            self._index_sampler.load_state_dict(resume_state['sampler'])
+        self._sampler_iter = iter(self._index_sampler)
+        self._resume_pass_state = resume_state
+        self._sampler_state = None
+        self._first_indices: List[Any] = []
+        self._pass_begun = False
+        self._num_yielded = resume_state['num_yielded'] if resume_state is not None else 0
+
+    def _begin_pass(self):
+        # Deferred from `_start_sampler_iter`, because samplers like
+        # `BatchSampler` start iterating their own sampler lazily, which must
+        # happen after `_base_seed` is drawn from the same global RNG, as it
+        # always did.
+        self._pass_begun = True
+        resume_state, self._resume_pass_state = self._resume_pass_state, None
+        if resume_state is not None and resume_state['sampler'] is not None:
+            # The index sampler was loaded with a state taken right after the
+            # first index of the saved pass was drawn.
+            self._sampler_state = resume_state['sampler']
+            self._first_indices = resume_state['first_indices']
+        else:
+            # Samplers may only set up their state for a pass when its first
+            # index is drawn. Take it right away, before other iterators over
+            # the same sampler can start theirs, and keep the index to replay it.
+            self._first_indices = list(itertools.islice(self._sampler_iter, 1))
+            self._sampler_state = self._index_sampler.state_dict() \
+                if hasattr(self._index_sampler, 'state_dict') else None
+        self._sampler_iter = itertools.chain(self._first_indices, self._sampler_iter)
+        # Skip the indices of the batches yielded before a resumed pass. The
+        # dataset isn't read for them.
+        for _ in itertools.islice(self._sampler_iter, self._num_yielded):
+            pass
+
+    def state_dict(self) -> Dict[str, Any]:
+        r"""Returns the state of this iteration as a :class:`dict`, i.e., the
+        state of the index sampler right after the first index of this
+        iteration was drawn, that index, and the number of batches yielded so
+        far. See :meth:`DataLoader.load_state_dict`."""
+        if self._dataset_kind == _DatasetKind.Iterable:
+            raise ValueError('DataLoader with IterableDataset: resuming an iteration '
+                             'is only supported for map-style datasets')
+        if not self._pass_begun:
+            self._begin_pass()
+        return {'sampler': self._sampler_state, 'first_indices': self._first_indices,
+                'num_yielded': self._num_yielded}
+
     def _next_index(self):
+        if not self._pass_begun:
+            self._begin_pass()
         return next(self._sampler_iter)  # may raise StopIteration
 
     def _next_data(self):
@@ -405,6 +603,47 @@ class _BaseDataLoaderIter(object):
         raise NotImplementedError("{} cannot be pickled", self.__class__.__name__)
 
 
+class _AsyncDataLoaderIter(object):
+    r"""Asynchronous iterator returned by ``DataLoader.__aiter__``.
+
+    Waits for each batch of the wrapped iterator in an executor thread, so that
+    ``async for`` over a :class:`DataLoader` does not block the event loop of
+    the caller. Without workers, the samples of an
+    :class:`~torch.utils.data.AsyncDataset` are awaited on the caller's loop
+    instead.
+    """
+
+    _end = object()
+
+    def __init__(self, loader_iter: _BaseDataLoaderIter) -> None:
+        self._loader_iter = loader_iter
+
+    def __aiter__(self) -> '_AsyncDataLoaderIter':
+        return self
+
+    def _next_or_end(self):
+        # `StopIteration` can't be raised into a future, see PEP 479.
+        try:
+            return next(self._loader_iter)
+        except StopIteration:
+            return self._end
+
+    async def __anext__(self) -> Any:
+        loader_iter = self._loader_iter
+        if isinstance(loader_iter, _SingleProcessDataLoaderIter) and loader_iter._async_fetch:
+            data = await loader_iter._next_data_async()
+            if data is not self._end:
+                loader_iter._num_yielded += 1
+        else:
+            data = await asyncio.get_event_loop().run_in_executor(None, self._next_or_end)
+        if data is self._end:
+            raise StopAsyncIteration
+        return data
+
+    def __len__(self) -> int:
+        return len(self._loader_iter)
+
+
 class _SingleProcessDataLoaderIter(_BaseDataLoaderIter):
     def __init__(self, loader):
         super(_SingleProcessDataLoaderIter, self).__init__(loader)
@@ -413,14 +652,48 @@ class _SingleProcessDataLoaderIter(_BaseDataLoaderIter):
 
         self._dataset_fetcher = _DatasetKind.create_fetcher(
             self._dataset_kind, self._dataset, self._auto_collation, self._collate_fn, self._drop_last)
+        self._async_fetch = isinstance(self._dataset_fetcher, _utils.fetch._AsyncMapDatasetFetcher)
+        # Indices of the batches that were submitted to an async fetcher ahead
+        # of time, in order.
+        self._lookahead = collections.deque()
+
+    def _next_async_index(self, loop=None):
+        # Starts fetching the next batches, as far as the window of the async
+        # fetcher allows, and returns the index of the first one.
+        while not self._lookahead or self._dataset_fetcher.can_submit():
+            try:
+                index = self._next_index()
+            except StopIteration:
+                break
+            self._dataset_fetcher.submit(index, loop)
+            self._lookahead.append(index)
+        if not self._lookahead:
+            raise StopIteration
+        return self._lookahead.popleft()
 
     def _next_data(self):
-        index = self._next_index()  # may raise StopIteration
+        if self._async_fetch:
+            index = self._next_async_index()  # may raise StopIteration
+        else:
+            index = self._next_index()  # may raise StopIteration
         data = self._dataset_fetcher.fetch(index)  # may raise StopIteration
         if self._pin_memory:
             data = _utils.pin_memory.pin_memory(data)
         return data
 
+    async def _next_data_async(self):
+        # Like `_next_data`, but awaits the samples of an async dataset on the
+        # running event loop. Returns `_AsyncDataLoaderIter._end` at the end,
+        # as a coroutine can't raise `StopIteration` (PEP 479).
+        try:
+            index = self._next_async_index(asyncio.get_event_loop())
+        except StopIteration:
+            return _AsyncDataLoaderIter._end
+        data = await self._dataset_fetcher.fetch_async(index)
+        if self._pin_memory:
+            data = _utils.pin_memory.pin_memory(data)
+        return data
+
 
 class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
     r"""Iterates once over the DataLoader's dataset, as specified by the sampler"""
@@ -708,43 +981,54 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
 
         assert self._num_workers > 0
 
-        if loader.multiprocessing_context is None:
+        self._use_threads = loader.worker_type == 'thread'
+        if self._use_threads:
+            multiprocessing_context = _ThreadingContext
+        elif loader.multiprocessing_context is None:
             multiprocessing_context = multiprocessing
         else:
             multiprocessing_context = loader.multiprocessing_context
 
         self._worker_init_fn = loader.worker_init_fn
+        self._shared_memory_slots = loader.shared_memory_slots
+        self._prefetch_factor = loader.prefetch_factor
+        self._adaptive_prefetch = loader.adaptive_prefetch
+        # Maximum number of outstanding tasks. Fixed to `prefetch_factor *
+        # num_workers`, unless adjusted by `_adapt_prefetch_window`.
+        self._prefetch_window = self._prefetch_factor * self._num_workers
+        # Only used with adaptive prefetching
+        self._last_yield_time = None  # when the last batch was returned
+        self._ready_streak = 0  # number of consecutive batches that were ready in time
         self._worker_queue_idx_cycle = itertools.cycle(range(self._num_workers))
         # No certainty which module multiprocessing_context is
         self._worker_result_queue = multiprocessing_context.Queue()  # type: ignore
         self._worker_pids_set = False
         self._shutdown = False
-        self._send_idx = 0  # idx of the next task to be sent to workers
-        self._rcvd_idx = 0  # idx of the next task to be returned in __next__
-        # information about data not yet yielded, i.e., tasks w/ indices in range [rcvd_idx, send_idx).
-        # map: task idx => - (worker_id,)        if data isn't fetched (outstanding)
-        #                  \ (worker_id, data)   if data is already fetched (out-of-order)
-        self._task_info = {}
-        self._tasks_outstanding = 0  # always equal to count(v for v in task_info.values() if len(v) == 1)
         self._workers_done_event = multiprocessing_context.Event()
 
         self._index_queues = []
+        # Only used with shared memory slots, see NOTE [ Shared Memory Slots ]
+        self._free_slot_queues = []
+        self._slot_batch = None  # slot of the last yielded batch, if not released yet
         self._workers = []
         # A list of booleans representing whether each worker still has work to
         # do, i.e., not having exhausted its iterable dataset object. It always
         # contains all `True`s if not using an iterable-style dataset
-        # (i.e., if kind != Iterable).
+        # (i.e., if kind != Iterable). Note that this only means that a worker
+        # has work to do *for this epoch*, see `persistent_workers`.
         self._workers_status = []
         for i in range(self._num_workers):
             # No certainty which module multiprocessing_context is
             index_queue = multiprocessing_context.Queue()  # type: ignore
+            free_slot_queue = multiprocessing_context.Queue() if self._shared_memory_slots > 0 else None  # type: ignore
             # index_queue.cancel_join_thread()
             w = multiprocessing_context.Process(
                 target=_utils.worker._worker_loop,
                 args=(self._dataset_kind, self._dataset, index_queue,
                       self._worker_result_queue, self._workers_done_event,
                       self._auto_collation, self._collate_fn, self._drop_last,
-                      self._base_seed + i, self._worker_init_fn, i, self._num_workers))
+                      self._base_seed + i, self._worker_init_fn, i, self._num_workers,
+                      self._shared_memory_slots, free_slot_queue, self._use_threads))
             w.daemon = True
             # NB: Process.start() actually take some time as it needs to
             #     start a process and pass the arguments over via a pipe.
@@ -754,9 +1038,13 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
             #     AssertionError: can only join a started process.
             w.start()
             self._index_queues.append(index_queue)
+            self._free_slot_queues.append(free_slot_queue)
             self._workers.append(w)
             self._workers_status.append(True)
 
+        self._slots = _utils.shm_slots._MainSlots(self._free_slot_queues) \
+            if self._shared_memory_slots > 0 else None
+
         if self._pin_memory:
             self._pin_memory_thread_done_event = threading.Event()
 
@@ -766,7 +1054,7 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 target=_utils.pin_memory._pin_memory_loop,
                 args=(self._worker_result_queue, self._data_queue,
                       torch.cuda.current_device(),
-                      self._pin_memory_thread_done_event))
+                      self._pin_memory_thread_done_event, self._slots))
             pin_memory_thread.daemon = True
             pin_memory_thread.start()
             # Similar to workers (see comment above), we only register
@@ -775,12 +1063,43 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         else:
             self._data_queue = self._worker_result_queue
 
-        _utils.signal_handling._set_worker_pids(id(self), tuple(w.pid for w in self._workers))
-        _utils.signal_handling._set_SIGCHLD_handler()
-        self._worker_pids_set = True
+        if not self._use_threads:
+            _utils.signal_handling._set_worker_pids(id(self), tuple(w.pid for w in self._workers))
+            _utils.signal_handling._set_SIGCHLD_handler()
+            self._worker_pids_set = True
+        self._reset(loader, first_iter=True)
 
+    def _reset(self, loader, first_iter=False):
+        super(_MultiProcessingDataLoaderIter, self)._reset(loader, first_iter)
+        self._send_idx = 0  # idx of the next task to be sent to workers
+        self._rcvd_idx = 0  # idx of the next task to be returned in __next__
+        # information about data not yet yielded, i.e., tasks w/ indices in range [rcvd_idx, send_idx).
+        # map: task idx => - (worker_id,)        if data isn't fetched (outstanding)
+        #                  \ (worker_id, data)   if data is already fetched (out-of-order)
+        self._task_info = {}
+        self._tasks_outstanding = 0  # always equal to count(v for v in task_info.values() if len(v) == 1)
+        # With persistent workers, a worker that exhausted its iterable dataset
+        # object in the last epoch is still alive and has work to do again.
+        self._workers_status = [True for i in range(self._num_workers)]
+        # We resume the prefetching in case it was enabled
+        if not first_iter:
+            if self._slot_batch is not None:
+                self._release_slot(self._slot_batch)
+                self._slot_batch = None
+            for idx in range(self._num_workers):
+                self._index_queues[idx].put(_utils.worker._ResumeIteration())
+            resume_iteration_cnt = self._num_workers
+            while resume_iteration_cnt > 0:
+                return_idx, return_data = self._get_data()
+                if isinstance(return_idx, _utils.worker._ResumeIteration):
+                    assert return_data is None
+                    resume_iteration_cnt -= 1
+                elif isinstance(return_data, _utils.shm_slots._SlotBatch):
+                    # Stale batch of an epoch that was not run to the end
+                    self._slots.release(return_data)
+        self._last_yield_time = None
         # prime the prefetch loop
-        for _ in range(2 * self._num_workers):
+        for _ in range(self._prefetch_window):
             self._try_put_index()
 
     def _try_get_data(self, timeout=_utils.MP_STATUS_CHECK_INTERVAL):
@@ -808,6 +1127,9 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                     failed_workers.append(w)
                     self._shutdown_worker(worker_id)
             if len(failed_workers) > 0:
+                if self._use_threads:
+                    names_str = ', '.join(w.name for w in failed_workers)
+                    raise RuntimeError('DataLoader worker thread(s) {} exited unexpectedly'.format(names_str))
                 pids_str = ', '.join(str(w.pid) for w in failed_workers)
                 raise RuntimeError('DataLoader worker (pid(s) {}) exited unexpectedly'.format(pids_str))
             if isinstance(e, queue.Empty):
@@ -963,6 +1285,12 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                     return data
 
     def _next_data(self):
+        if self._slot_batch is not None:
+            # The previously yielded batch is no longer valid, give its slot
+            # back. See NOTE [ Shared Memory Slots ]
+            self._release_slot(self._slot_batch)
+            self._slot_batch = None
+        self._wait_time = 0.
         while True:
             # If the worker responsible for `self._rcvd_idx` has already ended
             # and was unable to fulfill this task (due to exhausting an `IterableDataset`),
@@ -980,7 +1308,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 self._rcvd_idx += 1
             else:
                 # no valid `self._rcvd_idx` is found (i.e., didn't break)
-                self._shutdown_workers()
+                if not self._persistent_workers:
+                    self._shutdown_workers()
                 raise StopIteration
 
             # Now `self._rcvd_idx` is the batch index we want to fetch
@@ -991,13 +1320,22 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 return self._process_data(data)
 
             assert not self._shutdown and self._tasks_outstanding > 0
-            idx, data = self._get_data()
+            if self._adaptive_prefetch:
+                wait_start = time.perf_counter()
+                idx, data = self._get_data()
+                self._wait_time += time.perf_counter() - wait_start
+            else:
+                idx, data = self._get_data()
             self._tasks_outstanding -= 1
 
             if self._dataset_kind == _DatasetKind.Iterable:
                 # Check for _IterableDatasetStopIteration
                 if isinstance(data, _utils.worker._IterableDatasetStopIteration):
-                    self._shutdown_worker(data.worker_id)
+                    if self._persistent_workers:
+                        # Keep the worker alive for the next epoch
+                        self._workers_status[data.worker_id] = False
+                    else:
+                        self._shutdown_worker(data.worker_id)
                     self._try_put_index()
                     continue
 
@@ -1009,7 +1347,10 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 return self._process_data(data)
 
     def _try_put_index(self):
-        assert self._tasks_outstanding < 2 * self._num_workers
+        if self._tasks_outstanding >= self._prefetch_window:
+            # Only happens right after the adaptive window shrank
+            assert self._adaptive_prefetch
+            return
         try:
             index = self._next_index()
         except StopIteration:
@@ -1027,19 +1368,53 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         self._tasks_outstanding += 1
         self._send_idx += 1
 
+    def _adapt_prefetch_window(self):
+        # Grows the window of outstanding tasks by one if the main process
+        # waited for this batch for more than 5% of the time it spent on the
+        # previous one (i.e., workers didn't keep up), and shrinks it by one
+        # once a full window of batches was ready in time.
+        now = time.perf_counter()
+        if self._last_yield_time is not None:
+            consumer_time = now - self._last_yield_time - self._wait_time
+            if self._wait_time > 0.05 * consumer_time:
+                self._ready_streak = 0
+                if self._prefetch_window < self._prefetch_factor * self._num_workers:
+                    self._prefetch_window += 1
+                    self._try_put_index()
+            else:
+                self._ready_streak += 1
+                if self._ready_streak >= self._prefetch_window and \
+                        self._prefetch_window > self._num_workers:
+                    self._ready_streak = 0
+                    self._prefetch_window -= 1
+        self._last_yield_time = now
+
     def _process_data(self, data):
         self._rcvd_idx += 1
+        if self._adaptive_prefetch:
+            self._adapt_prefetch_window()
         self._try_put_index()
         if isinstance(data, ExceptionWrapper):
             data.reraise()
+        if isinstance(data, _utils.shm_slots._SlotBatch):
+            self._slot_batch = data
+            data = self._slots.unpack(data)
         return data
 
+    def _release_slot(self, slot_batch):
+        # The worker may have exited already, e.g., after exhausting its
+        # `IterableDataset` replica, in which case the slot isn't needed.
+        if self._persistent_workers or self._workers_status[slot_batch.worker_id]:
+            self._slots.release(slot_batch)
+
     def _shutdown_worker(self, worker_id):
         # Mark a worker as having finished its work and dead, e.g., due to
         # exhausting an `IterableDataset`. This should be used only when this
-        # `_MultiProcessingDataLoaderIter` is going to continue running.
+        # `_MultiProcessingDataLoaderIter` is going to continue running, or
+        # when shutting down persistent workers.
 
-        assert self._workers_status[worker_id]
+        assert self._workers_status[worker_id] or \
+            (self._persistent_workers and self._workers_done_event.is_set())
 
         # Signal termination to that specific worker.
         q = self._index_queues[worker_id]
@@ -1080,28 +1455,36 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                     # so that it can wake up and check `pin_memory_thread_done_event`
                     self._worker_result_queue.put((None, None))
                     self._pin_memory_thread.join()
-                    self._worker_result_queue.cancel_join_thread()
-                    self._worker_result_queue.close()
+                    if not self._use_threads:
+                        self._worker_result_queue.cancel_join_thread()
+                        self._worker_result_queue.close()
 
                 # Exit workers now.
                 self._workers_done_event.set()
                 for worker_id in range(len(self._workers)):
                     # Get number of workers from `len(self._workers)` instead of
                     # `self._num_workers` in case we error before starting all
-                    # workers.
-                    if self._workers_status[worker_id]:
+                    # workers. Persistent workers are alive even if they are
+                    # done with the current epoch.
+                    if self._persistent_workers or self._workers_status[worker_id]:
                         self._shutdown_worker(worker_id)
                 for w in self._workers:
                     w.join(timeout=_utils.MP_STATUS_CHECK_INTERVAL)
-                    if w.is_alive():
+                    if w.is_alive() and not self._use_threads:
                         # Existing mechanisms try to make the workers exit
                         # peacefully, but in case that we unfortunately reach
                         # here, which we shouldn't, (e.g., pytorch/pytorch#39570),
-                        # we kill the worker.
+                        # we kill the worker. Threads can't be killed, but
+                        # are daemonic and exit once they receive `None`.
                         w.terminate()
-                for q in self._index_queues:
-                    q.cancel_join_thread()
-                    q.close()
+                if not self._use_threads:
+                    for q in self._index_queues:
+                        q.cancel_join_thread()
+                        q.close()
+                    for q in self._free_slot_queues:
+                        if q is not None:
+                            q.cancel_join_thread()
+                            q.close()
             finally:
                 # Even though all this function does is putting into queues that
                 # we have called `cancel_join_thread` on, weird things can
@@ -5,7 +5,7 @@ from torch._utils import _accumulate
 from torch import randperm
 # No 'default_generator' in torch/__init__.pyi
 from torch import default_generator  # type: ignore
-from typing import TypeVar, Generic, Iterable, Iterator, Sequence, List, Optional, Tuple
+from typing import Any, Dict, TypeVar, Generic, Iterable, Iterator, Sequence, List, Optional, Tuple
 from ... import Tensor, Generator
 
 T_co = TypeVar('T_co', covariant=True)
@@ -31,6 +31,12 @@ class Dataset(Generic[T_co]):
     def __getitem__(self, index) -> T_co:
         raise NotImplementedError
 
+    # Subclasses could also optionally define `def __getitems__(self, indices)`,
+    # returning the list of samples for a batch of keys, i.e., the same as
+    # `[self[idx] for idx in indices]`. `DataLoader` then fetches every batch
+    # with a single call to it, which lets datasets read all samples of a batch
+    # at once. See also `_get_items` below.
+
     def __add__(self, other: 'Dataset[T_co]') -> 'ConcatDataset[T_co]':
         return ConcatDataset([self, other])
 
@@ -39,6 +45,67 @@ class Dataset(Generic[T_co]):
     # in pytorch/torch/utils/data/sampler.py
 
 
+class AsyncDataset(Dataset[T_co]):
+    r"""A map-style dataset whose samples are fetched by coroutines.
+
+    All subclasses should overwrite :meth:`__getitem__` with an ``async def``
+    method, i.e., ``dataset[idx]`` returns an awaitable that resolves to the
+    data sample for the given key. This suits datasets that read samples from
+    high-latency storage, e.g., object stores or remote services.
+
+    When used with :class:`~torch.utils.data.DataLoader`, the fetches of the
+    samples of the next batches are started before the current batch is
+    waited for, so that up to :attr:`max_in_flight` samples are in flight at a
+    time. They run on an :mod:`asyncio` event loop in a background thread of
+    each worker process (or of the main process, shared by thread workers and
+    by ``num_workers == 0``). Besides the usual ``for`` loop, the
+    :class:`~torch.utils.data.DataLoader` also supports ``async for``, which
+    waits for batches without blocking the caller's event loop. With
+    ``num_workers == 0``, ``async for`` awaits the samples on the caller's
+    event loop, so the dataset may use clients bound to that loop; a plain
+    ``for`` loop blocks the calling thread (and its event loop, if any) while
+    waiting for a batch.
+
+    Clients bound to an event loop should otherwise be created on first use in
+    :meth:`__getitem__`, i.e., on the loop that awaits them.
+
+    Example::
+
+        >>> class MyAsyncDataset(torch.utils.data.AsyncDataset):
+        ...     max_in_flight = 256
+        ...
+        ...     def __init__(self, keys):
+        ...         self.keys = keys
+        ...         self.client = None
+        ...
+        ...     async def __getitem__(self, index):
+        ...         if self.client is None:
+        ...             self.client = make_client()
+        ...         blob = await self.client.get(self.keys[index])
+        ...         return decode(blob)
+        ...
+        ...     def __len__(self):
+        ...         return len(self.keys)
+        ...
+        >>> loader = torch.utils.data.DataLoader(MyAsyncDataset(keys), batch_size=64, num_workers=4)
+        >>> async def train():
+        ...     async for batch in loader:
+        ...         step(batch)
+
+    Attributes:
+        max_in_flight (int): the maximum number of samples that are fetched
+            ahead of the batch being returned, per worker. Batches larger than
+            this are still fetched at once. Set it to a few times the batch
+            size, so that the next batches are fetched while the current one
+            completes. Default: ``256``.
+    """
+
+    max_in_flight: int = 256
+
+    async def __getitem__(self, index) -> T_co:  # type: ignore
+        raise NotImplementedError
+
+
 class IterableDataset(Dataset[T_co]):
     r"""An iterable Dataset.
 
@@ -169,6 +236,12 @@ class TensorDataset(Dataset[Tuple[Tensor, ...]]):
     def __getitem__(self, index):
         return tuple(tensor[index] for tensor in self.tensors)
 
+    def __getitems__(self, indices):
+        # One gather per tensor for the whole batch, instead of one indexing
+        # op per sample and tensor.
+        batch = [tensor[indices].unbind(0) for tensor in self.tensors]
+        return list(zip(*batch))
+
     def __len__(self):
         return self.tensors[0].size(0)
 
@@ -205,7 +278,7 @@ class ConcatDataset(Dataset[T_co]):
     def __len__(self):
         return self.cumulative_sizes[-1]
 
-    def __getitem__(self, idx):
+    def _locate(self, idx):
         if idx < 0:
             if -idx > len(self):
                 raise ValueError("absolute value of index should not exceed dataset length")
@@ -215,8 +288,27 @@ class ConcatDataset(Dataset[T_co]):
             sample_idx = idx
         else:
             sample_idx = idx - self.cumulative_sizes[dataset_idx - 1]
+        return dataset_idx, sample_idx
+
+    def __getitem__(self, idx):
+        dataset_idx, sample_idx = self._locate(idx)
         return self.datasets[dataset_idx][sample_idx]
 
+    def __getitems__(self, indices):
+        # Group the indices by dataset, fetch each group in one go, and put the
+        # samples back in the requested order.
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        for position, idx in enumerate(indices):
+            dataset_idx, sample_idx = self._locate(idx)
+            groups.setdefault(dataset_idx, []).append((position, sample_idx))
+        samples: List[Any] = [None] * len(indices)
+        for dataset_idx, group in groups.items():
+            positions, sample_indices = zip(*group)
+            group_samples = _get_items(self.datasets[dataset_idx], list(sample_indices))
+            for position, sample in zip(positions, group_samples):
+                samples[position] = sample
+        return samples
+
     @property
     def cummulative_sizes(self):
         warnings.warn("cummulative_sizes attribute is renamed to "
@@ -271,10 +363,22 @@ class Subset(Dataset[T_co]):
     def __getitem__(self, idx):
         return self.dataset[self.indices[idx]]
 
+    def __getitems__(self, indices):
+        return _get_items(self.dataset, [self.indices[idx] for idx in indices])
+
     def __len__(self):
         return len(self.indices)
 
 
+def _get_items(dataset, indices):
+    r"""Returns the samples of ``dataset`` at ``indices``, fetched with a single
+    ``__getitems__`` call if the dataset supports it."""
+    getitems = getattr(dataset, '__getitems__', None)
+    if getitems is not None:
+        return getitems(indices)
+    return [dataset[idx] for idx in indices]
+
+
 def random_split(dataset: Dataset[T], lengths: Sequence[int],
                  generator: Optional[Generator] = default_generator) -> List[Subset[T]]:
     r"""
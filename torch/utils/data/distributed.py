@@ -64,6 +64,8 @@ class DistributedSampler(Sampler):
         self.total_size = self.num_samples * self.num_replicas
         self.shuffle = shuffle
         self.seed = seed
+        self._samples_yielded = 0
+        self._resume_samples = None
 
     def __iter__(self):
         if self.shuffle:
@@ -83,7 +85,17 @@ class DistributedSampler(Sampler):
         indices = indices[self.rank:self.total_size:self.num_replicas]
         assert len(indices) == self.num_samples
 
-        return iter(indices)
+        start = 0
+        if self._resume_samples is not None:
+            start = self._resume_samples
+            self._resume_samples = None
+        self._samples_yielded = start
+        return self._iter_from(indices, start)
+
+    def _iter_from(self, indices, start):
+        for idx in indices[start:]:
+            self._samples_yielded += 1
+            yield idx
 
     def __len__(self):
         return self.num_samples
@@ -98,3 +110,25 @@ class DistributedSampler(Sampler):
             epoch (int): Epoch number.
         """
         self.epoch = epoch
+
+    def state_dict(self):
+        r"""Returns the state of the sampler as a :class:`dict`.
+
+        It contains the epoch and the number of samples yielded in the current
+        (or last) iteration. Together with :attr:`seed`, these determine the
+        remaining samples of the epoch.
+        """
+        samples_yielded = self._resume_samples if self._resume_samples is not None else self._samples_yielded
+        return {'epoch': self.epoch, 'seed': self.seed, 'samples_yielded': samples_yielded}
+
+    def load_state_dict(self, state_dict):
+        r"""Loads the sampler state. The next iteration continues the saved
+        epoch after the last sample yielded.
+
+        Arguments:
+            state_dict (dict): sampler state. Should be an object returned
+                from a call to :meth:`state_dict`.
+        """
+        self.epoch = state_dict['epoch']
+        self.seed = state_dict['seed']
+        self._resume_samples = state_dict['samples_yielded']
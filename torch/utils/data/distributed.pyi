@@ -1,4 +1,4 @@
-from typing import TypeVar, Optional, Iterator
+from typing import Any, Dict, TypeVar, Optional, Iterator
 from . import Sampler, Dataset
 
 T_co = TypeVar('T_co', covariant=True)
@@ -7,3 +7,5 @@ class DistributedSampler(Sampler[T_co]):
     def __iter__(self) -> Iterator[T_co]: ...
     def __len__(self) -> int: ...
     def set_epoch(self, epoch: int) -> None: ...
+    def state_dict(self) -> Dict[str, Any]: ...
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None: ...
@@ -2,7 +2,7 @@ import torch
 from torch._six import int_classes as _int_classes
 from torch import Tensor
 
-from typing import Iterator, Optional, Sequence, List, TypeVar, Generic, Sized
+from typing import Any, Dict, Iterator, Optional, Sequence, List, TypeVar, Generic, Sized
 
 T_co = TypeVar('T_co', covariant=True)
 
@@ -74,6 +74,10 @@ class RandomSampler(Sampler[int]):
     r"""Samples elements randomly. If without replacement, then sample from a shuffled dataset.
     If with replacement, then user can specify :attr:`num_samples` to draw.
 
+    The position in the current iteration and the generator state it started
+    from can be saved with :meth:`state_dict`. After :meth:`load_state_dict`,
+    the next iteration continues right after the last sample drawn.
+
     Arguments:
         data_source (Dataset): dataset to sample from
         replacement (bool): samples are drawn with replacement if ``True``, default=``False``
@@ -90,6 +94,11 @@ class RandomSampler(Sampler[int]):
         self.replacement = replacement
         self._num_samples = num_samples
         self.generator = generator
+        # State of the generator when the current iteration started, and the
+        # number of samples drawn in it so far. See `state_dict`.
+        self._generator_state: Optional[Tensor] = None
+        self._samples_yielded = 0
+        self._resume_state: Optional[Dict[str, Any]] = None
 
         if not isinstance(self.replacement, bool):
             raise TypeError("replacement should be a boolean value, but got "
@@ -112,14 +121,54 @@ class RandomSampler(Sampler[int]):
 
     def __iter__(self):
         n = len(self.data_source)
+        generator = self.generator if self.generator is not None else torch.default_generator
+        start = 0
+        if self._resume_state is not None:
+            if self.generator is None:
+                # Don't rewind the global RNG, replay on a private generator instead.
+                generator = torch.Generator()
+            generator.set_state(self._resume_state['generator_state'])
+            start = self._resume_state['samples_yielded']
+            self._resume_state = None
+        self._generator_state = generator.get_state()
+        self._samples_yielded = start
         if self.replacement:
-            rand_tensor = torch.randint(high=n, size=(self.num_samples,), dtype=torch.int64, generator=self.generator)
-            return iter(rand_tensor.tolist())
-        return iter(torch.randperm(n, generator=self.generator).tolist())
+            rand_tensor = torch.randint(high=n, size=(self.num_samples,), dtype=torch.int64, generator=generator)
+            return self._iter_from(rand_tensor.tolist(), start)
+        return self._iter_from(torch.randperm(n, generator=generator).tolist(), start)
+
+    def _iter_from(self, indices, start):
+        for idx in indices[start:]:
+            self._samples_yielded += 1
+            yield idx
 
     def __len__(self):
         return self.num_samples
 
+    def state_dict(self) -> Dict[str, Any]:
+        r"""Returns the state of the sampler as a :class:`dict`.
+
+        It contains the state of the generator at the beginning of the current
+        (or last) iteration, and the number of samples drawn in it so far.
+        """
+        if self._resume_state is not None:
+            return dict(self._resume_state)
+        generator_state = self._generator_state
+        if generator_state is None:
+            generator = self.generator if self.generator is not None else torch.default_generator
+            generator_state = generator.get_state()
+        return {'generator_state': generator_state, 'samples_yielded': self._samples_yielded}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        r"""Loads the sampler state. The next iteration replays the permutation
+        (or draws) of the saved iteration, starting after the last sample drawn.
+
+        Arguments:
+            state_dict (dict): sampler state. Should be an object returned
+                from a call to :meth:`state_dict`.
+        """
+        self._resume_state = dict(state_dict)
+
 
 class SubsetRandomSampler(Sampler[int]):
     r"""Samples elements randomly from a given list of indices, without replacement.
@@ -234,3 +283,23 @@ class BatchSampler(Sampler[List[int]]):
             return len(self.sampler) // self.batch_size  # type: ignore
         else:
             return (len(self.sampler) + self.batch_size - 1) // self.batch_size  # type: ignore
+
+    def state_dict(self) -> Optional[Dict[str, Any]]:
+        r"""Returns the state of the sampler as a :class:`dict`, i.e., the
+        state of :attr:`sampler`. Returns ``None`` if :attr:`sampler` has no
+        ``state_dict`` method, since a batch sampler can't resume by itself.
+        """
+        if not hasattr(self.sampler, 'state_dict'):
+            return None
+        return {'sampler': self.sampler.state_dict()}  # type: ignore
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        r"""Loads the sampler state. As batches are made of consecutive indices
+        of :attr:`sampler`, the next iteration continues after the last batch
+        yielded in the saved iteration.
+
+        Arguments:
+            state_dict (dict): sampler state. Should be an object returned
+                from a call to :meth:`state_dict`.
+        """
+        self.sampler.load_state_dict(state_dict['sampler'])  # type: ignore